@@ -0,0 +1,76 @@
+"""
+Shared fixtures for the benchmark suite.
+
+Kitfiles come in two sizes: "small", the full example Kitfile used by the
+tests, and "large", a generated Kitfile with thousands of model parts and
+datasets and a sizeable `parameters` block, like the ones produced for
+sharded LLM checkpoints.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+import pytest
+
+from kitops.modelkit.kitfile import Kitfile
+from kitops.modelkit.serialization import AVAILABLE_BACKENDS, set_yaml_backend
+from tests.fake_kit import FakeKit
+
+FIXTURES = Path(__file__).parent.parent / "tests" / "fixtures"
+LARGE_ENTRY_COUNT = 5000
+
+
+def make_kitfile_data(entries: int) -> Dict[str, Any]:
+    """Builds a Kitfile dictionary with `entries` model parts and datasets."""
+    return {
+        "manifestVersion": "1.0",
+        "package": {
+            "name": "benchmark",
+            "version": "1.0.0",
+            "description": "A generated Kitfile for benchmarks.",
+            "authors": ["Author 1", "Author 2"],
+        },
+        "model": {
+            "name": "sharded-model",
+            "path": "model",
+            "framework": "pytorch",
+            "version": "1.0",
+            "description": "A model split into many parts.",
+            "license": "Apache-2.0",
+            "parts": [{"name": f"shard-{i}", "path": f"model/shard-{i:05d}.safetensors"} for i in range(entries)],
+            "parameters": {"layers": [{"index": i, "heads": 32, "dim": 4096} for i in range(entries // 10)]},
+        },
+        "code": [{"path": "src", "description": "Training code", "license": "Apache-2.0"}],
+        "datasets": [
+            {"name": f"split-{i}", "path": f"data/split-{i:05d}.parquet", "description": "A split", "license": "MIT"}
+            for i in range(entries)
+        ],
+        "docs": [{"path": "README.md", "description": "Documentation"}],
+    }
+
+
+@pytest.fixture(scope="session", params=["small", "large"])
+def kitfile_path(request, tmp_path_factory) -> Path:
+    """The path of a small or a large Kitfile on disk."""
+    if request.param == "small":
+        return FIXTURES / "Kitfile_full"
+    path = tmp_path_factory.mktemp("kitfiles") / "Kitfile"
+    Kitfile(**make_kitfile_data(LARGE_ENTRY_COUNT)).save(str(path), print=False)
+    return path
+
+
+@pytest.fixture
+def fake_kit(tmp_path, monkeypatch) -> FakeKit:
+    """A fake `kit` executable placed first on PATH."""
+    kit = FakeKit(tmp_path / "fake-kit-bin")
+    for key, value in kit.env.items():
+        monkeypatch.setenv(key, value)
+    return kit
+
+
+@pytest.fixture(params=AVAILABLE_BACKENDS)
+def yaml_backend(request) -> Iterator[str]:
+    """Selects each available YAML backend in turn."""
+    set_yaml_backend(request.param)
+    yield request.param
+    set_yaml_backend(None)
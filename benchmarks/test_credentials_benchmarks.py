@@ -0,0 +1,37 @@
+"""
+Constructing UserCredentials from a .env file through the cached
+credential providers, against searching for and parsing the file on every
+call as UserCredentials used to, and with explicit credentials.
+"""
+
+import pytest
+from dotenv import dotenv_values, find_dotenv
+
+from kitops.modelkit.credentials import clear_credentials_cache
+from kitops.modelkit.user import UserCredentials
+
+
+@pytest.fixture
+def dotenv(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("JOZU_USERNAME=user\nJOZU_PASSWORD=secret\nJOZU_REGISTRY=jozu.ml\n")
+    monkeypatch.chdir(tmp_path)
+    for name in ("JOZU_USERNAME", "JOZU_PASSWORD", "JOZU_REGISTRY", "JOZU_NAMESPACE"):
+        monkeypatch.delenv(name, raising=False)
+    clear_credentials_cache()
+    yield
+    clear_credentials_cache()
+
+
+@pytest.mark.benchmark(group="credentials")
+def test_user_credentials_from_dotenv(benchmark, dotenv):
+    assert benchmark(UserCredentials).username == "user"
+
+
+@pytest.mark.benchmark(group="credentials")
+def test_dotenv_uncached(benchmark, dotenv):
+    assert benchmark(lambda: dotenv_values(find_dotenv(usecwd=True)))["JOZU_USERNAME"] == "user"
+
+
+@pytest.mark.benchmark(group="credentials")
+def test_user_credentials_explicit(benchmark, dotenv):
+    assert benchmark(UserCredentials, username="user", password="secret").registry is None
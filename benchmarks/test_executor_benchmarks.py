@@ -0,0 +1,41 @@
+"""
+Per-call latency of short `kit` commands through the default
+`SubprocessExecutor`, against the fake `kit` executable, next to the cost
+of spawning the same process directly. The difference is the SDK's own
+overhead per call; the rest is process startup, which every call pays
+because `kit` has no long-lived mode to send commands to.
+"""
+
+import functools
+import subprocess
+
+import pytest
+
+from kitops.cli import kit
+from kitops.cli.executor import SubprocessExecutor
+
+COMMANDS = {
+    "version": kit.version,
+    "list": kit.list,
+    "info": functools.partial(kit.info, "jozu.ml/jozu/model:latest"),
+}
+
+
+@pytest.mark.benchmark(group="kit-executor")
+def test_spawn_baseline(benchmark, fake_kit):
+    """A bare `subprocess.run` of the fake `kit`, for comparison."""
+    result = benchmark(subprocess.run, ["kit", "version"], capture_output=True, text=True, check=True)
+    assert result.stdout.startswith("Version")
+
+
+@pytest.mark.benchmark(group="kit-executor")
+def test_executor_run(benchmark, fake_kit):
+    executor = SubprocessExecutor()
+    assert benchmark(executor.run, ["kit", "version"]).stdout.startswith("Version")
+
+
+@pytest.mark.benchmark(group="kit-executor")
+@pytest.mark.parametrize("command", COMMANDS)
+def test_kit_command(benchmark, fake_kit, command):
+    """A full call through `kitops.cli.kit`: flags, instrumentation and the executor."""
+    benchmark(COMMANDS[command])
@@ -0,0 +1,41 @@
+import pytest
+
+from kitops.cli.utils import _process_command_flags, validate_flags
+
+NETWORK_FLAGS = {
+    "plain-http": True,
+    "tls-verify": True,
+    "concurrency": 8,
+    "proxy": "http://proxy:3128",
+}
+GLOBAL_FLAGS = {"v": True, "progress": "none"}
+FLAGS = {
+    "info": {**NETWORK_FLAGS, "remote": True},
+    "inspect": {**NETWORK_FLAGS, "remote": True},
+    "list": NETWORK_FLAGS,
+    "pack": {"compression": "zstd"},
+    "pull": NETWORK_FLAGS,
+    "push": NETWORK_FLAGS,
+    "remove": {**NETWORK_FLAGS, "force": True, "remote": True},
+    "unpack": {**NETWORK_FLAGS, "overwrite": True},
+    "version": {"show_update_notifications": True},
+}
+COMMANDS = list(FLAGS)
+
+
+@pytest.mark.benchmark(group="flags")
+def test_process_command_flags_empty(benchmark):
+    benchmark(lambda: [_process_command_flags(command) for command in COMMANDS])
+
+
+@pytest.mark.benchmark(group="flags")
+def test_process_command_flags_populated(benchmark):
+    flags = benchmark(
+        lambda: [_process_command_flags(command, **FLAGS[command], **GLOBAL_FLAGS) for command in COMMANDS]
+    )
+    assert "--plain-http" in flags[0]
+
+
+@pytest.mark.benchmark(group="flags")
+def test_validate_flags(benchmark):
+    benchmark(lambda: [validate_flags(command, **FLAGS[command], **GLOBAL_FLAGS) for command in COMMANDS])
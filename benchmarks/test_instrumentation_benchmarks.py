@@ -0,0 +1,37 @@
+"""
+Overhead of instrumentation on a traced call that does nothing, with no
+sink registered (instrumentation disabled) and with an InMemorySink.
+"""
+
+import pytest
+
+from kitops.cli.instrumentation import InMemorySink, add_sink, remove_sink, traced
+
+
+@traced()
+def noop():
+    return None
+
+
+def plain():
+    return None
+
+
+@pytest.mark.benchmark(group="instrumentation")
+def test_untraced(benchmark):
+    benchmark(plain)
+
+
+@pytest.mark.benchmark(group="instrumentation")
+def test_traced_disabled(benchmark):
+    benchmark(noop)
+
+
+@pytest.mark.benchmark(group="instrumentation")
+def test_traced_in_memory(benchmark):
+    sink = InMemorySink()
+    add_sink(sink)
+    try:
+        benchmark(noop)
+    finally:
+        remove_sink(sink)
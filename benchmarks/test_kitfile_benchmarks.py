@@ -0,0 +1,94 @@
+import pytest
+
+from benchmarks.conftest import FIXTURES, LARGE_ENTRY_COUNT, make_kitfile_data
+from kitops.modelkit.kitfile import Kitfile
+from kitops.modelkit.serialization import load_yaml
+
+
+@pytest.mark.benchmark(group="kitfile-load")
+def test_load(benchmark, kitfile_path, yaml_backend):
+    kitfile = benchmark(Kitfile, kitfile_path)
+    assert kitfile.manifestVersion
+
+
+@pytest.mark.benchmark(group="kitfile-to-yaml")
+def test_to_yaml(benchmark, kitfile_path, yaml_backend):
+    kitfile = Kitfile(kitfile_path)
+    assert benchmark(kitfile.to_yaml)
+
+
+@pytest.mark.benchmark(group="kitfile-save")
+def test_save(benchmark, kitfile_path, yaml_backend, tmp_path):
+    kitfile = Kitfile(kitfile_path)
+    target = str(tmp_path / "Kitfile")
+    benchmark(kitfile.save, target, print=False)
+    assert Kitfile(target).manifestVersion == kitfile.manifestVersion
+
+
+@pytest.fixture(scope="module", params=["small", "large"])
+def kitfile_data(request):
+    if request.param == "small":
+        return load_yaml((FIXTURES / "Kitfile_full").read_text(encoding="utf-8"))
+    return make_kitfile_data(LARGE_ENTRY_COUNT)
+
+
+@pytest.mark.benchmark(group="kitfile-construct")
+def test_construct_validated(benchmark, kitfile_data):
+    benchmark(lambda: Kitfile(**kitfile_data))
+
+
+@pytest.mark.benchmark(group="kitfile-construct")
+def test_construct_from_data(benchmark, kitfile_data):
+    benchmark(Kitfile.from_data, kitfile_data)
+
+
+@pytest.mark.benchmark(group="kitfile-assign")
+def test_assign_datasets(benchmark):
+    datasets = make_kitfile_data(LARGE_ENTRY_COUNT)["datasets"]
+    kitfile = Kitfile()
+
+    def assign():
+        kitfile.datasets = datasets
+
+    benchmark(assign)
+    assert len(kitfile.datasets) == LARGE_ENTRY_COUNT
+
+
+@pytest.mark.benchmark(group="kitfile-lookup")
+def test_find_by_path(benchmark):
+    kitfile = Kitfile.from_data(make_kitfile_data(LARGE_ENTRY_COUNT))
+    path = f"data/split-{LARGE_ENTRY_COUNT - 1:05d}.parquet"
+    assert benchmark(kitfile.find_by_path, path).section == "datasets"
+
+
+@pytest.mark.benchmark(group="kitfile-lookup")
+def test_find_by_path_linear_scan(benchmark):
+    """The scan over the entry lists that `find_by_path` replaces, for comparison."""
+    kitfile = Kitfile.from_data(make_kitfile_data(LARGE_ENTRY_COUNT))
+    path = f"data/split-{LARGE_ENTRY_COUNT - 1:05d}.parquet"
+
+    def scan():
+        for entries in (kitfile.model.parts, kitfile.code, kitfile.datasets, kitfile.docs, kitfile.prompts):
+            for entry in entries:
+                if entry.path == path:
+                    return entry
+        return None
+
+    assert benchmark(scan) is not None
+
+
+@pytest.mark.benchmark(group="kitfile-lookup")
+def test_entries_under(benchmark):
+    kitfile = Kitfile.from_data(make_kitfile_data(LARGE_ENTRY_COUNT))
+    assert len(benchmark(kitfile.entries_under, "data")) == LARGE_ENTRY_COUNT
+
+
+@pytest.mark.benchmark(group="kitfile-scan")
+def test_scan_datasets_streaming(benchmark, kitfile_path, yaml_backend):
+    benchmark(lambda: sum(1 for _ in Kitfile.iter_entries(kitfile_path, "datasets")))
+
+
+@pytest.mark.benchmark(group="kitfile-scan")
+def test_scan_datasets_loaded(benchmark, kitfile_path, yaml_backend):
+    """Loading the whole Kitfile to scan one section, for comparison."""
+    benchmark(lambda: sum(1 for _ in Kitfile(kitfile_path).datasets))
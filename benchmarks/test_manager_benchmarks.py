@@ -0,0 +1,43 @@
+"""
+End-to-end ModelKitManager operations against the fake `kit` executable.
+These measure the SDK's own overhead per operation, process spawning
+included, rather than any real registry transfer.
+"""
+
+import pytest
+
+from kitops.modelkit.manager import ModelKitManager
+from kitops.modelkit.user import UserCredentials
+
+
+@pytest.fixture
+def manager(fake_kit, tmp_path):
+    (tmp_path / "work").mkdir()
+    (tmp_path / "work" / "Kitfile").write_text("manifestVersion: '1.0'\npackage:\n  name: bench\n")
+    return ModelKitManager(
+        working_directory=str(tmp_path / "work"),
+        user_credentials=UserCredentials(username="user", password="secret"),
+        modelkit_tag="jozu.ml/jozu/bench:latest",
+    )
+
+
+@pytest.mark.benchmark(group="manager")
+def test_pull_and_unpack(benchmark, manager):
+    benchmark(manager.pull_and_unpack_modelkit)
+
+
+@pytest.mark.benchmark(group="manager")
+def test_pack_and_push(benchmark, manager):
+    benchmark(manager.pack_and_push_modelkit)
+
+
+@pytest.mark.benchmark(group="manager")
+def test_inspect(benchmark, manager):
+    assert benchmark(manager.inspect_modelkit)["schemaVersion"] == 2
+
+
+@pytest.mark.benchmark(group="manager")
+def test_pull_many(benchmark, manager):
+    tags = [f"jozu.ml/jozu/bench-{i}:latest" for i in range(8)]
+    results = benchmark(manager.pull_many, tags, max_workers=4)
+    assert all(result.ok for result in results.values())
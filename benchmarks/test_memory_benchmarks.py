@@ -0,0 +1,81 @@
+"""
+Memory used by large Kitfiles: kept resident with and without compact entry
+storage, and at peak while scanning one section.
+
+Each benchmark times the operation and records the memory it measured with
+tracemalloc in the extra info of the results ("retained_bytes" or
+"peak_bytes", shown by `--benchmark-json` and `pytest-benchmark compare`).
+"""
+
+import gc
+import tracemalloc
+
+import pytest
+
+from benchmarks.conftest import LARGE_ENTRY_COUNT, make_kitfile_data
+from kitops.modelkit.kitfile import Kitfile
+
+MEMORY_ENTRY_COUNT = 20_000
+
+
+def retained_bytes(compact: bool) -> int:
+    """Measures the memory held by a large Kitfile, including its strings."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        kitfile = Kitfile.from_data(make_kitfile_data(MEMORY_ENTRY_COUNT), compact=compact)
+        gc.collect()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(kitfile.datasets) == MEMORY_ENTRY_COUNT
+    return retained
+
+
+@pytest.mark.benchmark(group="kitfile-memory")
+@pytest.mark.parametrize("compact", [False, True], ids=["models", "compact"])
+def test_build_large_kitfile(benchmark, compact):
+    benchmark.extra_info["retained_bytes"] = retained_bytes(compact)
+    data = make_kitfile_data(MEMORY_ENTRY_COUNT)
+    benchmark.pedantic(Kitfile.from_data, args=(data,), kwargs={"compact": compact}, rounds=5)
+
+
+def test_compact_storage_uses_less_memory():
+    assert retained_bytes(compact=True) * 3 < retained_bytes(compact=False)
+
+
+@pytest.fixture(scope="module")
+def large_kitfile_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("kitfiles") / "Kitfile"
+    Kitfile.from_data(make_kitfile_data(LARGE_ENTRY_COUNT)).save(str(path), print=False)
+    return path
+
+
+def peak_bytes(scan) -> int:
+    """Measures the peak memory allocated while running scan."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        assert scan() == LARGE_ENTRY_COUNT
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+SCANS = {
+    "streaming": lambda path: sum(1 for _ in Kitfile.iter_entries(path, "datasets")),
+    "loaded": lambda path: len(Kitfile(path).datasets),
+}
+
+
+@pytest.mark.benchmark(group="kitfile-scan-memory")
+@pytest.mark.parametrize("scan", SCANS)
+def test_scan_large_kitfile(benchmark, large_kitfile_path, scan):
+    benchmark.extra_info["peak_bytes"] = peak_bytes(lambda: SCANS[scan](large_kitfile_path))
+    benchmark.pedantic(SCANS[scan], args=(large_kitfile_path,), rounds=3)
+
+
+def test_streaming_scan_has_a_small_peak(large_kitfile_path):
+    streaming = peak_bytes(lambda: SCANS["streaming"](large_kitfile_path))
+    assert streaming * 10 < peak_bytes(lambda: SCANS["loaded"](large_kitfile_path))
@@ -0,0 +1,64 @@
+"""
+Running a command that prints a lot of output, 50,000 progress lines
+(about 3 MB), with the output captured whole and with it streamed to a
+callback. The peak memory allocated by the caller is recorded as
+"peak_bytes" in the results' extra info.
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import pytest
+
+from kitops.cli.executor import SubprocessExecutor
+
+LINE_COUNT = 50_000
+COMMAND = [
+    sys.executable,
+    "-c",
+    f"import sys\nfor i in range({LINE_COUNT}): sys.stderr.write(f'Copying sha256:0123456789ab {{i}} KiB / "
+    f"{LINE_COUNT} KiB\\r')",
+]
+
+
+def capture():
+    return len(SubprocessExecutor().run(COMMAND).stderr)
+
+
+def stream():
+    count = 0
+
+    def on_progress(event):
+        nonlocal count
+        count += event.is_progress
+
+    SubprocessExecutor().stream(COMMAND, on_progress)
+    return count
+
+
+RUNS = {"captured": capture, "streamed": stream}
+
+
+def peak_bytes(run) -> int:
+    """Measures the peak memory allocated while running a command."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.mark.benchmark(group="kit-output")
+@pytest.mark.parametrize("mode", RUNS)
+def test_large_output(benchmark, mode):
+    run = RUNS[mode]
+    benchmark.extra_info["peak_bytes"] = peak_bytes(run)
+    assert benchmark.pedantic(run, rounds=3, iterations=1)
+
+
+def test_streamed_output_peak_memory_is_bounded():
+    assert peak_bytes(stream) * 5 < peak_bytes(capture)
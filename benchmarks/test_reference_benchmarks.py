@@ -0,0 +1,30 @@
+import pytest
+
+from kitops.modelkit.reference import ModelKitReference, parse_reference
+from kitops.modelkit.utils import parse_modelkit_tag
+
+TAGS = [f"jozu.ml/namespace-{i % 7}/model-{i}:v{i % 13}" for i in range(1000)]
+
+
+@pytest.mark.benchmark(group="reference")
+def test_parse_modelkit_tag(benchmark):
+    parsed = benchmark(lambda: [parse_modelkit_tag(tag) for tag in TAGS])
+    assert parsed[1]["model"] == "model-1"
+
+
+@pytest.mark.benchmark(group="reference")
+def test_modelkit_reference(benchmark):
+    references = benchmark(lambda: [ModelKitReference(tag) for tag in TAGS])
+    assert references[-1].modelkit_tag == TAGS[-1]
+
+
+@pytest.mark.benchmark(group="reference")
+def test_parse_reference_uncached(benchmark):
+    parsed = benchmark(lambda: [parse_reference.__wrapped__(tag) for tag in TAGS])
+    assert parsed[1].repository == "model-1"
+
+
+@pytest.mark.benchmark(group="reference")
+def test_parse_reference_cached(benchmark):
+    parsed = benchmark(lambda: [parse_reference(tag) for tag in TAGS])
+    assert len(set(parsed)) == len(TAGS)
@@ -0,0 +1,55 @@
+"""
+Kitfile generation for a synthetic tree of several thousand files:
+`Kitfile.from_directory` with and without a thread pool, against `kit.init`.
+
+The `kit.init` benchmark needs the real KitOps CLI on PATH and is skipped
+otherwise.
+"""
+
+import shutil
+
+import pytest
+
+from kitops.cli import kit
+from kitops.modelkit.kitfile import Kitfile
+
+DATASET_DIRECTORIES = 20
+FILES_PER_DIRECTORY = 200
+
+
+@pytest.fixture(scope="session")
+def synthetic_tree(tmp_path_factory):
+    """A model, sharded datasets, a code tree mixing file types, and docs."""
+    root = tmp_path_factory.mktemp("tree") / "project"
+    (root / "model").mkdir(parents=True)
+    (root / "model" / "config.json").write_text("{}")
+    for shard in range(50):
+        (root / "model" / f"model-{shard:05d}.safetensors").write_bytes(b"\0" * 64)
+    for split in range(DATASET_DIRECTORIES):
+        directory = root / "data" / f"split-{split:02d}"
+        directory.mkdir(parents=True)
+        for index in range(FILES_PER_DIRECTORY):
+            (directory / f"part-{index:05d}.parquet").write_bytes(b"\0" * 16)
+    for package in range(50):
+        directory = root / "src" / f"package_{package:02d}"
+        directory.mkdir(parents=True)
+        for index in range(10):
+            (directory / f"module_{index}.py").write_text("")
+        (directory / "fixture.csv").write_text("")
+    (root / "README.md").write_text("# Synthetic\n")
+    return root
+
+
+@pytest.mark.benchmark(group="kitfile-generate")
+@pytest.mark.parametrize("max_workers", [None, 1], ids=["thread-pool", "one-thread"])
+def test_from_directory(benchmark, synthetic_tree, max_workers):
+    kitfile = benchmark(Kitfile.from_directory, synthetic_tree, name="synthetic", max_workers=max_workers)
+    assert kitfile.model.path == "model"
+    assert kitfile.datasets[0].path == "data"
+
+
+@pytest.mark.benchmark(group="kitfile-generate")
+@pytest.mark.skipif(shutil.which("kit") is None, reason="the KitOps CLI is not installed")
+def test_kit_init(benchmark, synthetic_tree):
+    kitfile = benchmark(kit.init, str(synthetic_tree), "synthetic", force=True)
+    assert kitfile.package.name == "synthetic"
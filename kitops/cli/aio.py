@@ -0,0 +1,581 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Asynchronous counterparts of the wrappers in `kitops.cli.kit`.
+
+Each coroutine builds the same `kit` command line as its synchronous
+twin, but runs it with `asyncio.create_subprocess_exec` so the event loop
+is never blocked. Cancelling a coroutine kills the underlying `kit`
+process. The number of `kit` processes running at once can be bounded
+with `set_concurrency_limit()`.
+
+Commands that move data accept an `on_progress` callback, which may be a
+coroutine function, and `iter_progress()` turns any of them into an
+asynchronous iterator of ProgressEvents.
+"""
+
+import asyncio
+import collections
+import inspect as _inspect
+import json
+import subprocess
+import weakref
+from logging import getLogger
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from ..modelkit.utils import IS_A_TTY, Color
+from .cache import ResultCache
+from .instrumentation import command_span, is_enabled, track_bytes
+from .progress import (
+    _CHUNK_SIZE,
+    _QUEUE_SIZE,
+    STDERR,
+    STDOUT,
+    TAIL_LINES,
+    ProgressCallback,
+    ProgressEvent,
+    _LineSplitter,
+    _tail_text,
+    parse_progress_line,
+)
+from .utils import _process_command_flags
+
+LOG = getLogger(__name__)
+
+_settings: Dict[str, Optional[int]] = {"concurrency_limit": None}
+_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_concurrency_limit(limit: Optional[int]) -> None:
+    """
+    Sets the maximum number of `kit` processes that may run at once
+    across all coroutines in this module.
+
+    Args:
+        limit (Optional[int]): The maximum number of concurrent processes,
+            or None to remove the limit.
+
+    Raises:
+        ValueError: If the limit is not a positive integer or None.
+
+    Examples:
+        >>> set_concurrency_limit(8)
+    """
+    if limit is not None and (not isinstance(limit, int) or limit < 1):
+        raise ValueError("Concurrency limit must be a positive integer or None.")
+    _settings["concurrency_limit"] = limit
+    _semaphores.clear()
+
+
+def get_concurrency_limit() -> Optional[int]:
+    """
+    Gets the maximum number of concurrent `kit` processes.
+
+    Returns:
+        Optional[int]: The current limit, or None if unlimited.
+    """
+    return _settings["concurrency_limit"]
+
+
+def _get_semaphore() -> Optional[asyncio.Semaphore]:
+    """
+    Returns the semaphore enforcing the concurrency limit for the running
+    event loop, creating it on first use.
+    """
+    limit = _settings["concurrency_limit"]
+    if limit is None:
+        return None
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(limit)
+        _semaphores[loop] = semaphore
+    return semaphore
+
+
+async def info(
+    repo_path_with_tag: str,
+    filters: Optional[List[str]] = None,
+    remote: Optional[bool] = False,
+    cache: Optional[ResultCache] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Retrieve information about a ModelKit as a string-keyed dictionary.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository along with the tag.
+        filters (Optional[List[str]]): A list of kitfile parts for which to
+            retrieve information. Defaults to None.
+        remote (Optional[bool]): Flag to indicate if the information should be retrieved remotely. Defaults to False.
+        cache (Optional[ResultCache]): A cache to answer from and store the
+            result in. Defaults to None, which always runs the command.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        The output of the 'kit info' command as a dictionary.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+
+    Examples:
+        >>> kit_info = await info("jozu.ml/brett/titanic-survivability:latest")
+        >>> print(kit_info["manifestVersion"])
+        1.0
+    """
+    flags = _process_command_flags(kit_cmd_name="info", **kwargs)
+    if cache is not None:
+        key = ResultCache.key("info", repo_path_with_tag, remote, filters, flags)
+        found, kit_info = cache.get(key)
+        if found:
+            return kit_info
+
+    command = ["kit", "info", repo_path_with_tag]
+    if filters:
+        for filter in filters:
+            command.append("--filter")
+            command.append(filter)
+    if remote:
+        command.append("--remote")
+
+    command.extend(flags)
+    result = await _run(command=command)
+    # imported here so that YAML support is only loaded for `kit info`.
+    from ..modelkit.serialization import load_yaml  # noqa: PLC0415
+
+    kit_info = load_yaml(result.stdout.strip())
+    if cache is not None:
+        cache.put(key, repo_path_with_tag, kit_info)
+    return kit_info
+
+
+async def inspect(
+    repo_path_with_tag: str,
+    remote: Optional[bool] = False,
+    cache: Optional[ResultCache] = None,
+    **kwargs
+) -> Dict[str, Any]:
+    """
+    Inspect a ModelKit, returning its manifest as a string-keyed dictionary.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository along with the tag.
+        remote (Optional[bool]): Flag to indicate if the inspection should be done remotely. Defaults to False.
+        cache (Optional[ResultCache]): A cache to answer from and store the
+            result in. Defaults to None, which always runs the command.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        The output of the 'kit inspect' command as a dictionary.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    flags = _process_command_flags(kit_cmd_name="inspect", **kwargs)
+    if cache is not None:
+        key = ResultCache.key("inspect", repo_path_with_tag, remote, flags=flags)
+        found, kit_inspect = cache.get(key)
+        if found:
+            return kit_inspect
+
+    command = ["kit", "inspect", repo_path_with_tag]
+    if remote:
+        command.append("--remote")
+
+    command.extend(flags)
+    result = await _run(command=command)
+    kit_inspect = json.loads(result.stdout.strip())
+    if cache is not None:
+        cache.put(key, repo_path_with_tag, kit_inspect)
+    return kit_inspect
+
+
+async def list(repo_path_without_tag: Optional[str] = None, **kwargs) -> str:
+    """
+    Lists the ModelKits available in the specified repository path.
+
+    Args:
+        repo_path_without_tag (Optional[str]): The path to the repository without the tag.
+                                               If not provided, lists kits from the local registry.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        The list of available ModelKits as a string.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "list"]
+    if repo_path_without_tag:
+        command.append(repo_path_without_tag)
+
+    command.extend(_process_command_flags(kit_cmd_name="list", **kwargs))
+    result = await _run(command=command)
+    return result.stdout.strip()
+
+
+async def pack(
+    repo_path_with_tag: str,
+    working_directory: Optional[str] = ".",
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
+) -> None:
+    """
+    Packs a directory into a ModelKit package with a specified tag.
+
+    Args:
+        repo_path_with_tag (str): The repository path along with the tag to be used for the package.
+        working_directory (str): The directory where the Kitfile is located. Defaults to ".".
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs; awaited if it
+            returns an awaitable. Defaults to None.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "pack", working_directory, "--tag", repo_path_with_tag]
+
+    command.extend(_process_command_flags(kit_cmd_name="pack", **kwargs))
+    result = await _run(command=command, on_progress=on_progress)
+    LOG.info(result.stdout)
+
+
+async def pull(repo_path_with_tag: str, on_progress: Optional[ProgressCallback] = None, **kwargs) -> None:
+    """
+    Pulls the specified ModelKit from the remote registry.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository along with the tag to pull.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs; awaited if it
+            returns an awaitable. Defaults to None.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "pull", repo_path_with_tag]
+
+    command.extend(_process_command_flags(kit_cmd_name="pull", **kwargs))
+    result = await _run(command=command, on_progress=on_progress)
+    LOG.info(result.stdout)
+
+
+async def push(repo_path_with_tag: str, on_progress: Optional[ProgressCallback] = None, **kwargs) -> None:
+    """
+    Pushes the specified ModelKit to the remote registry.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository along with the tag to be pushed.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs; awaited if it
+            returns an awaitable. Defaults to None.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "push", repo_path_with_tag]
+
+    command.extend(_process_command_flags(kit_cmd_name="push", **kwargs))
+    result = await _run(command=command, on_progress=on_progress)
+    LOG.info(result.stdout)
+
+
+async def remove(repo_path_with_tag: str, remote: Optional[bool] = False, **kwargs) -> None:
+    """
+    Remove a ModelKit from the registry.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository with its tag.
+        remote (Optional[bool]): Flag to indicate if the removal should be done remotely. Defaults to False.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status,
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "remove", repo_path_with_tag]
+    if remote:
+        command.append("--remote")
+
+    command.extend(_process_command_flags(kit_cmd_name="remove", **kwargs))
+    result = await _run(command=command)
+    LOG.info(result.stdout)
+
+
+async def tag(repo_path_with_tag: str, repo_path_with_new_tag: str, **kwargs) -> None:
+    """
+    Tag a ModelKit with a new tag.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository with its tag.
+        repo_path_with_new_tag (str): The new tag to be assigned to the ModelKit.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status.
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "tag", repo_path_with_tag, repo_path_with_new_tag]
+
+    command.extend(_process_command_flags(kit_cmd_name="tag", **kwargs))
+    result = await _run(command=command)
+    LOG.info(result.stdout)
+
+
+async def unpack(
+    repo_path_with_tag: str,
+    dir: str,
+    filters: Optional[List[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
+) -> None:
+    """
+    Unpacks a ModelKit to the specified directory from the remote registry.
+
+    Args:
+        repo_path_with_tag (str): The path to the repository along with
+            the tag to be unpacked.
+        dir (str): The directory to unpack the ModelKit to.
+        filters (Optional[List[str]]): The Kitfile parts to unpack. Defaults to None.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs; awaited if it
+            returns an awaitable. Defaults to None.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        None
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status.
+        The exception contains the return code and the standard error output.
+    """
+    command = ["kit", "unpack", "--dir", dir, repo_path_with_tag]
+    if filters:
+        for filter in filters:
+            command.append("--filter")
+            command.append(filter)
+
+    command.extend(_process_command_flags(kit_cmd_name="unpack", **kwargs))
+    result = await _run(command=command, on_progress=on_progress)
+    LOG.info(result.stdout)
+
+
+async def _run(
+    command: List[Any],
+    input: Optional[str] = None,
+    verbose: bool = True,
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
+) -> subprocess.CompletedProcess:
+    """
+    Executes a command as a child process without blocking the event loop.
+
+    If the awaiting task is cancelled, the child process is killed and
+    reaped before the cancellation propagates.
+
+    Args:
+        command (List[Any]): The command to be executed as a list of strings.
+        input (Optional[str]): Optional input to be passed to the command.
+        verbose (bool): If True, log the command before executing. Defaults to True.
+        on_progress (Optional[ProgressCallback]): If given, the output is
+            streamed to it while the command runs and only its last lines
+            are returned. Defaults to None.
+        **kwargs: Additional arguments to pass to the command.
+
+    Returns:
+        subprocess.CompletedProcess: The completed process with decoded output.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status.
+        The exception contains the return code and the standard error output.
+    """
+    if verbose:
+        output = "% " + " ".join(command)
+        if IS_A_TTY:
+            output = f"{Color.CYAN.value}{output}{Color.RESET.value}"
+        LOG.info(output)
+
+    semaphore = _get_semaphore()
+    if semaphore is not None:
+        async with semaphore:
+            return await _timed_execute(command, input, on_progress)
+    return await _timed_execute(command, input, on_progress)
+
+
+async def _timed_execute(
+    command: List[Any], input: Optional[str], on_progress: Optional[ProgressCallback]
+) -> subprocess.CompletedProcess:
+    """Runs `_execute`, timed as a span when instrumentation is enabled."""
+    if not is_enabled():
+        return await _execute(command, input, on_progress)
+    with command_span(command) as span:
+        if on_progress is not None:
+            on_progress = track_bytes(span, on_progress)
+        result = await _execute(command, input, on_progress)
+        span.exit_code = result.returncode
+        return result
+
+
+async def _execute(
+    command: List[Any], input: Optional[str], on_progress: Optional[ProgressCallback] = None
+) -> subprocess.CompletedProcess:
+    """
+    Spawns the child process and collects its output, killing it if the
+    caller goes away before it finishes.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdin=asyncio.subprocess.PIPE if input is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        if on_progress is None:
+            stdout, stderr = await process.communicate(input.encode() if input is not None else None)
+            stdout_text = stdout.decode()
+            stderr_text = stderr.decode()
+        else:
+            stdout_text, stderr_text = await _stream(process, input, on_progress)
+    except BaseException:
+        if process.returncode is None:
+            process.kill()
+            await asyncio.shield(process.wait())
+        raise
+
+    if process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, command, output=stdout_text, stderr=stderr_text)
+    return subprocess.CompletedProcess(command, process.returncode, stdout=stdout_text, stderr=stderr_text)
+
+
+async def _stream(
+    process: asyncio.subprocess.Process, input: Optional[str], on_progress: ProgressCallback
+) -> Tuple[str, str]:
+    """
+    Passes the child's output to on_progress line by line as it arrives,
+    and returns the last lines of stdout and stderr once it has exited.
+    """
+    lines: "asyncio.Queue[Tuple[str, Optional[List[str]]]]" = asyncio.Queue(maxsize=_QUEUE_SIZE)
+
+    async def read_lines(reader: asyncio.StreamReader, stream: str) -> None:
+        splitter = _LineSplitter()
+        while chunk := await reader.read(_CHUNK_SIZE):
+            await lines.put((stream, splitter.feed(chunk)))
+        await lines.put((stream, splitter.feed(b"", final=True)))
+        await lines.put((stream, None))
+
+    assert process.stdout is not None and process.stderr is not None
+    readers = [
+        asyncio.ensure_future(read_lines(process.stdout, STDOUT)),
+        asyncio.ensure_future(read_lines(process.stderr, STDERR)),
+    ]
+    tails = {STDOUT: collections.deque(maxlen=TAIL_LINES), STDERR: collections.deque(maxlen=TAIL_LINES)}
+    try:
+        if input is not None and process.stdin is not None:
+            process.stdin.write(input.encode())
+            await process.stdin.drain()
+            process.stdin.close()
+        open_streams = len(readers)
+        while open_streams:
+            stream, chunk = await lines.get()
+            if chunk is None:
+                open_streams -= 1
+                continue
+            tails[stream].extend(chunk)
+            for line in chunk:
+                result = on_progress(parse_progress_line(line, stream))
+                if _inspect.isawaitable(result):
+                    await result
+        await process.wait()
+    finally:
+        for reader in readers:
+            reader.cancel()
+        await asyncio.gather(*readers, return_exceptions=True)
+    return _tail_text(tails[STDOUT]), _tail_text(tails[STDERR])
+
+
+async def iter_progress(
+    function: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any
+) -> AsyncIterator[ProgressEvent]:
+    """
+    Runs one of this module's coroutines that accept `on_progress` and
+    yields its ProgressEvents as they arrive.
+
+    The command is held back while events are not being consumed. Once
+    the command has finished and every event has been yielded, its
+    exception, if any, is raised. Leaving the loop early cancels the
+    command, killing the `kit` process.
+
+    Args:
+        function (Callable[..., Awaitable[Any]]): The coroutine function,
+            such as `pull` or `push`.
+        *args (Any): Positional arguments for function.
+        **kwargs (Any): Keyword arguments for function.
+
+    Yields:
+        ProgressEvent: One event per line the command prints.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero exit status.
+
+    Examples:
+        >>> async for event in iter_progress(pull, "jozu.ml/jozu-demos/llama:latest"):
+        ...     if event.is_progress:
+        ...         print(event.digest, event.transferred, event.total)
+    """
+    events: "asyncio.Queue[ProgressEvent]" = asyncio.Queue(maxsize=1)
+    task = asyncio.ensure_future(function(*args, on_progress=events.put, **kwargs))
+    try:
+        while not task.done():
+            getter = asyncio.ensure_future(events.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                getter.cancel()
+                break
+            yield getter.result()
+        while not events.empty():
+            yield events.get_nowait()
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,283 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Opt-in caching of `kit info` and `kit inspect` results.
+"""
+
+import atexit
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+from ..modelkit.reference import parse_reference
+
+LOG = getLogger(__name__)
+
+
+def _is_pinned(modelkit_tag: str) -> bool:
+    """Whether a ModelKit reference names a manifest digest, so its results cannot change."""
+    try:
+        return parse_reference(modelkit_tag).digest is not None
+    except ValueError:
+        return False
+
+
+def _flush_pending() -> None:
+    """Writes the changes every persisted cache has pending; run when the interpreter exits."""
+    for cache in list(_pending):
+        cache.flush()
+
+
+# persisted caches with changes not yet written. Weak, so that a cache is
+# not kept alive until exit just because it was persisted.
+_pending: "weakref.WeakSet[ResultCache]" = weakref.WeakSet()
+atexit.register(_flush_pending)
+
+
+class ResultCache:
+    """
+    An in-memory LRU cache with a time-to-live for parsed `kit info` and
+    `kit inspect` results, optionally persisted to a JSON file.
+
+    Entries are keyed by (command, modelkit_tag, remote, filters, flags). Results
+    for references pinned to a digest (`...@sha256:...`) are immutable and
+    never expire; all other entries expire `ttl` seconds after they were
+    stored.
+
+    A persisted cache writes its file at most once every `flush_interval`
+    seconds, on `flush()` or `close()`, and when the interpreter exits,
+    rather than on every change.
+
+    Attributes:
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not in the cache.
+
+    Examples:
+        >>> cache = ResultCache(max_entries=128, ttl=30)
+        >>> kit.inspect("jozu.ml/jozu-demos/titanic-survivability:latest", remote=True, cache=cache)
+        >>> kit.inspect("jozu.ml/jozu-demos/titanic-survivability:latest", remote=True, cache=cache)
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        max_entries: int = 256,
+        ttl: float = 60.0,
+        path: str | Path | None = None,
+        clock: Callable[[], float] = time.time,
+        flush_interval: float = 5.0,
+    ):
+        """
+        Initializes the cache, loading any unexpired entries from `path`.
+
+        Args:
+            max_entries (int): The maximum number of entries kept before the
+                least recently used one is evicted. Defaults to 256.
+            ttl (float): Seconds a result for a mutable tag stays valid.
+                Defaults to 60.
+            path (str | Path | None): A JSON file to persist entries to.
+                Defaults to None, which keeps the cache in memory only.
+            clock (Callable[[], float]): The wall-clock source used for
+                expiry and flushing. Defaults to time.time.
+            flush_interval (float): The fewest seconds between two writes
+                of the persistence file. Defaults to 5.
+
+        Raises:
+            ValueError: If max_entries is not positive, or ttl or
+                flush_interval is negative.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be a positive integer.")
+        if ttl < 0:
+            raise ValueError("ttl must not be negative.")
+        if flush_interval < 0:
+            raise ValueError("flush_interval must not be negative.")
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._path = Path(path) if path is not None else None
+        self._clock = clock
+        self._flush_interval = flush_interval
+        self._dirty = False
+        self._saved_at = clock()
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self._path is not None and self._path.exists():
+            self._load()
+
+    @staticmethod
+    def key(
+        command: str,
+        modelkit_tag: str,
+        remote: Optional[bool] = False,
+        filters: Optional[Iterable[str]] = None,
+        flags: Iterable[str] = (),
+    ) -> str:
+        """
+        Builds the cache key for a `kit` query.
+
+        Args:
+            command (str): The kit command, e.g. "info" or "inspect".
+            modelkit_tag (str): The ModelKit queried.
+            remote (Optional[bool]): Whether the query was remote.
+            filters (Optional[Iterable[str]]): The filters applied, if any.
+            flags (Iterable[str]): The other flags passed to `kit`, as
+                returned by `_process_command_flags`. Defaults to none.
+
+        Returns:
+            str: The cache key.
+        """
+        return json.dumps([command, modelkit_tag, bool(remote), sorted(filters or []), list(flags)])
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Looks up a key, counting the hit or miss.
+
+        Args:
+            key (str): The key built with `ResultCache.key`.
+
+        Returns:
+            Tuple[bool, Any]: (True, a copy of the value) on a hit, or
+                (False, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, copy.deepcopy(entry[1])
+
+    def put(self, key: str, modelkit_tag: str, value: Any) -> None:
+        """
+        Stores a result, evicting the least recently used entry if full.
+
+        Args:
+            key (str): The key built with `ResultCache.key`.
+            modelkit_tag (str): The ModelKit the result belongs to; digest
+                references never expire.
+            value (Any): The JSON-compatible result to store.
+        """
+        expires_at = None if _is_pinned(modelkit_tag) else self._clock() + self._ttl
+        with self._lock:
+            self._entries[key] = (expires_at, copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+            self._changed()
+
+    def invalidate(self, modelkit_tag: Optional[str] = None) -> None:
+        """
+        Drops cached results.
+
+        Args:
+            modelkit_tag (Optional[str]): Drop only the results for this
+                ModelKit. Defaults to None, which drops everything.
+        """
+        with self._lock:
+            if modelkit_tag is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if json.loads(k)[1] == modelkit_tag]:
+                    del self._entries[key]
+            self._changed()
+
+    def flush(self) -> None:
+        """Writes any pending changes to the persistence file."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def close(self) -> None:
+        """Writes any pending changes to the persistence file; the cache remains usable."""
+        self.flush()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _load(self) -> None:
+        """Reads unexpired entries from the persistence file."""
+        try:
+            stored = json.loads(self._path.read_text(encoding="utf-8"))  # type: ignore[union-attr]
+        except (OSError, ValueError) as e:
+            LOG.warning(f"Ignoring unreadable kit result cache {self._path}: {e}")
+            return
+        if not isinstance(stored, list):
+            LOG.warning(f"Ignoring kit result cache {self._path}: expected a list of entries")
+            return
+        now = self._clock()
+        for row in stored:
+            if not (
+                isinstance(row, list)
+                and len(row) == 3
+                and isinstance(row[0], str)
+                and (row[1] is None or isinstance(row[1], (int, float)))
+            ):
+                LOG.warning(f"Ignoring malformed entry in kit result cache {self._path}: {row!r:.100}")
+                continue
+            key, expires_at, value = row
+            if expires_at is None or expires_at > now:
+                self._entries[key] = (expires_at, value)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def _changed(self) -> None:
+        """Marks the entries as changed, writing them if flush_interval has passed; called with the lock held."""
+        if self._path is None:
+            return
+        self._dirty = True
+        _pending.add(self)
+        if self._clock() - self._saved_at >= self._flush_interval:
+            self._save()
+
+    def _save(self) -> None:
+        """Atomically writes every entry to the persistence file; called with the lock held."""
+        path: Path = self._path  # type: ignore[assignment]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps([[key, expires_at, value] for key, (expires_at, value) in self._entries.items()])
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_name, path)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+        self._dirty = False
+        self._saved_at = self._clock()
+        _pending.discard(self)
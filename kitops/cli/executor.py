@@ -0,0 +1,139 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pluggable execution of `kit` commands for `kitops.cli.kit`.
+
+Every command runs through the executor set with `set_executor()`. By
+default that is a `SubprocessExecutor`, which starts each command as a
+child of the calling process. To run commands some other way, e.g.
+remotely, in a sandbox or under a test double, subclass `CommandExecutor`.
+Commands whose progress is streamed (see `kitops.cli.progress`) run
+through `CommandExecutor.stream`, which defaults to a child process too.
+"""
+
+import subprocess
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from .progress import ProgressCallback, stream_command
+
+
+class CommandExecutor(ABC):
+    """
+    Base class for the strategies that run `kit` commands.
+
+    Subclasses implement `run` with the semantics of
+    `subprocess.run(command, input=input, text=True, check=True,
+    capture_output=True)`.
+    """
+
+    @abstractmethod
+    def run(self, command: List[Any], input: Optional[str] = None) -> subprocess.CompletedProcess:
+        """
+        Runs a command to completion.
+
+        Args:
+            command (List[Any]): The command and its arguments.
+            input (Optional[str]): Text to write to the command's stdin.
+                Defaults to None.
+
+        Returns:
+            subprocess.CompletedProcess: The completed process with decoded output.
+
+        Raises:
+            subprocess.CalledProcessError: If the command returns a non-zero exit status.
+            OSError: If the command cannot be started.
+        """
+
+    def stream(
+        self, command: List[Any], on_progress: ProgressCallback, input: Optional[str] = None
+    ) -> subprocess.CompletedProcess:
+        """
+        Runs a command to completion, passing each line of its output to
+        on_progress as it is printed; see `kitops.cli.progress.stream_command`.
+
+        Args:
+            command (List[Any]): The command and its arguments.
+            on_progress (ProgressCallback): Called with a ProgressEvent for
+                every line of output.
+            input (Optional[str]): Text to write to the command's stdin.
+                Defaults to None.
+
+        Returns:
+            subprocess.CompletedProcess: The completed process, holding the
+                last lines of each stream.
+
+        Raises:
+            subprocess.CalledProcessError: If the command returns a non-zero exit status.
+            OSError: If the command cannot be started.
+        """
+        return stream_command(command, on_progress, input=input)
+
+    def close(self) -> None:
+        """Releases any resources held by the executor."""
+
+    def __enter__(self) -> "CommandExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SubprocessExecutor(CommandExecutor):
+    """Runs every command as a new child process of the caller."""
+
+    def run(self, command: List[Any], input: Optional[str] = None) -> subprocess.CompletedProcess:
+        # Because check=True is used, any non-zero exit status will raise a CalledProcessError.
+        return subprocess.run(
+            command,
+            input=input,
+            text=True,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+
+_default_executor = SubprocessExecutor()
+_settings: Dict[str, Optional[CommandExecutor]] = {"executor": None}
+
+
+def get_executor() -> CommandExecutor:
+    """
+    Gets the executor that runs `kit` commands.
+
+    Returns:
+        CommandExecutor: The executor set with `set_executor`, or a
+            SubprocessExecutor.
+    """
+    return _settings["executor"] or _default_executor
+
+
+def set_executor(executor: Optional[CommandExecutor]) -> None:
+    """
+    Sets the executor that runs `kit` commands. The previous executor is
+    not closed.
+
+    Args:
+        executor (Optional[CommandExecutor]): The executor, or None to run
+            each command as a new child process again.
+
+    Examples:
+        >>> set_executor(MyExecutor())
+        >>> set_executor(None)
+    """
+    _settings["executor"] = executor
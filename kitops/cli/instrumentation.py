@@ -0,0 +1,417 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Timing spans for `kit` commands and `ModelKitManager` operations.
+
+Every `kit` command run by `kitops.cli.kit` or `kitops.cli.aio`, and every
+public `ModelKitManager` operation, is recorded as a Span with its name,
+ModelKit reference, duration, exit code and, when known, bytes
+transferred. Spans started while another is open are its children, so a
+manager operation's span encloses the spans of the commands it ran.
+
+Spans are handed to sinks registered with `add_sink()`: `LoggingSink`
+logs them, `InMemorySink` collects them, and `OpenTelemetrySink` exports
+them through the OpenTelemetry API. With no sink registered, nothing is
+recorded.
+"""
+
+import contextlib
+import contextvars
+import functools
+import itertools
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from logging import INFO, Logger, getLogger
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+LOG = getLogger(__name__)
+
+COMMAND = "command"
+OPERATION = "operation"
+
+_FunctionT = TypeVar("_FunctionT", bound=Callable[..., Any])
+
+_ids = itertools.count(1)
+_current: "contextvars.ContextVar[Optional[Span]]" = contextvars.ContextVar("kitops_span", default=None)
+
+
+@dataclass
+class Span:
+    """
+    One timed `kit` command or ModelKitManager operation.
+
+    Attributes:
+        name (str): What was timed, e.g. "kit pull" or
+            "ModelKitManager.pull_and_unpack_modelkit".
+        kind (str): "command" or "operation".
+        reference (Optional[str]): The ModelKit reference, if any.
+        span_id (int): Unique within the process.
+        parent_id (Optional[int]): The span this one was started in.
+        start_time_ns (int): When the span started, in nanoseconds since
+            the epoch.
+        duration (Optional[float]): How long it took, in seconds; None
+            until it has ended.
+        exit_code (Optional[int]): The exit status of a command, or None
+            if it did not run to completion.
+        bytes (Optional[int]): The bytes transferred, if known.
+        error (Optional[str]): The error raised, if any.
+        attributes (Dict[str, Any]): Further details.
+    """
+
+    name: str
+    kind: str = OPERATION
+    reference: Optional[str] = None
+    span_id: int = field(default_factory=lambda: next(_ids))
+    parent_id: Optional[int] = None
+    start_time_ns: int = field(default_factory=time.time_ns)
+    duration: Optional[float] = None
+    exit_code: Optional[int] = None
+    bytes: Optional[int] = None
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def end_time_ns(self) -> Optional[int]:
+        """When the span ended, in nanoseconds since the epoch."""
+        if self.duration is None:
+            return None
+        return self.start_time_ns + int(self.duration * 1e9)
+
+
+class SpanSink:
+    """
+    Base class for receivers of spans. Both hooks may be called from any
+    thread.
+    """
+
+    def on_start(self, span: Span) -> None:
+        """Called when a span starts."""
+
+    def on_end(self, span: Span) -> None:
+        """Called when a span ends, with its duration and outcome filled in."""
+
+
+class LoggingSink(SpanSink):
+    """
+    Logs each span as it ends.
+
+    Examples:
+        >>> add_sink(LoggingSink())
+        >>> kit.version()
+        kit version took 12.3 ms (exit code 0)
+    """
+
+    def __init__(self, logger: Optional[Logger] = None, level: int = INFO):
+        """
+        Initializes the LoggingSink.
+
+        Args:
+            logger (Optional[Logger]): The logger to use. Defaults to None,
+                which uses this module's logger.
+            level (int): The level spans are logged at. Defaults to INFO.
+        """
+        self.logger = logger or LOG
+        self.level = level
+
+    def on_end(self, span: Span) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        details = [f"exit code {span.exit_code}"] if span.exit_code is not None else []
+        if span.bytes is not None:
+            details.append(f"{span.bytes} bytes")
+        if span.error is not None:
+            details.append(f"failed: {span.error}")
+        target = f" {span.reference}" if span.reference else ""
+        suffix = f" ({', '.join(details)})" if details else ""
+        self.logger.log(self.level, f"{span.name}{target} took {(span.duration or 0) * 1000:.1f} ms{suffix}")
+
+
+class InMemorySink(SpanSink):
+    """
+    Keeps every ended span, for tests and ad hoc analysis.
+
+    Attributes:
+        spans (List[Span]): The ended spans, in the order they ended.
+
+    Examples:
+        >>> sink = InMemorySink()
+        >>> add_sink(sink)
+        >>> manager.pull_and_unpack_modelkit()
+        >>> [(span.name, span.duration) for span in sink.spans]
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self) -> None:
+        """Forgets the spans collected so far."""
+        with self._lock:
+            self.spans.clear()
+
+
+class OpenTelemetrySink(SpanSink):
+    """
+    Exports spans through the OpenTelemetry API, which must be installed
+    (`pip install opentelemetry-api`) along with an SDK to send them
+    anywhere. Spans without a parent span of their own are children of
+    the current OpenTelemetry span.
+    """
+
+    def __init__(self, tracer: Any = None):
+        """
+        Initializes the OpenTelemetrySink.
+
+        Args:
+            tracer (Any): The OpenTelemetry tracer to create spans with.
+                Defaults to None, which uses the global tracer provider's
+                "kitops" tracer.
+
+        Raises:
+            ImportError: If the OpenTelemetry API is not installed.
+        """
+        try:
+            from opentelemetry import trace  # noqa: PLC0415
+        except ImportError as e:
+            raise ImportError("OpenTelemetrySink requires the opentelemetry-api package.") from e
+        self._trace = trace
+        self._tracer = tracer if tracer is not None else trace.get_tracer("kitops")
+        self._open: Dict[int, Any] = {}
+
+    def on_start(self, span: Span) -> None:
+        parent = self._open.get(span.parent_id) if span.parent_id is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        attributes = {"kitops.kind": span.kind}
+        if span.reference:
+            attributes["kitops.reference"] = span.reference
+        self._open[span.span_id] = self._tracer.start_span(
+            span.name, context=context, start_time=span.start_time_ns, attributes=attributes
+        )
+
+    def on_end(self, span: Span) -> None:
+        exported = self._open.pop(span.span_id, None)
+        if exported is None:
+            return
+        if span.exit_code is not None:
+            exported.set_attribute("kitops.exit_code", span.exit_code)
+        if span.bytes is not None:
+            exported.set_attribute("kitops.bytes", span.bytes)
+        for key, value in span.attributes.items():
+            exported.set_attribute(f"kitops.{key}", value)
+        if span.error is not None:
+            exported.set_status(self._trace.Status(self._trace.StatusCode.ERROR, span.error))
+        exported.end(end_time=span.end_time_ns)
+
+
+_settings: Dict[str, Tuple[SpanSink, ...]] = {"sinks": ()}
+_lock = threading.Lock()
+
+
+def add_sink(sink: SpanSink) -> None:
+    """
+    Starts sending spans to a sink.
+
+    Args:
+        sink (SpanSink): The sink.
+
+    Examples:
+        >>> add_sink(LoggingSink())
+    """
+    with _lock:
+        _settings["sinks"] = (*_settings["sinks"], sink)
+
+
+def remove_sink(sink: SpanSink) -> None:
+    """
+    Stops sending spans to a sink. Does nothing if it was not added.
+
+    Args:
+        sink (SpanSink): The sink.
+    """
+    with _lock:
+        _settings["sinks"] = tuple(added for added in _settings["sinks"] if added is not sink)
+
+
+def get_sinks() -> Tuple[SpanSink, ...]:
+    """
+    Gets the sinks spans are sent to.
+
+    Returns:
+        Tuple[SpanSink, ...]: The sinks, in the order they were added.
+    """
+    return _settings["sinks"]
+
+
+def is_enabled() -> bool:
+    """Whether any sink is registered, i.e. whether spans are recorded."""
+    return bool(_settings["sinks"])
+
+
+def _notify(sinks: Tuple[SpanSink, ...], hook: str, span: Span) -> None:
+    """Calls a hook of every sink, logging rather than raising their errors."""
+    for sink in sinks:
+        try:
+            getattr(sink, hook)(span)
+        except Exception as e:
+            LOG.warning(f"Span sink {type(sink).__name__} failed: {e}")
+
+
+@contextlib.contextmanager
+def span(name: str, kind: str = OPERATION, reference: Optional[str] = None, **attributes: Any) -> Iterator[Span]:
+    """
+    Times the enclosed block as a span.
+
+    Set `exit_code`, `bytes` or `attributes` on the yielded span to record
+    them. If the block raises, the error is recorded, along with the exit
+    status of a subprocess.CalledProcessError, and re-raised.
+
+    Args:
+        name (str): The span's name.
+        kind (str): "command" or "operation". Defaults to "operation".
+        reference (Optional[str]): The ModelKit reference. Defaults to None.
+        **attributes (Any): Further details to record.
+
+    Returns:
+        Iterator[Span]: The span.
+
+    Examples:
+        >>> with span("train", reference="jozu.ml/me/model:v1") as current:
+        ...     current.attributes["epochs"] = 3
+    """
+    sinks = _settings["sinks"]
+    parent = _current.get()
+    current = Span(
+        name=name,
+        kind=kind,
+        reference=reference,
+        parent_id=parent.span_id if parent is not None else None,
+        attributes=attributes,
+    )
+    _notify(sinks, "on_start", current)
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        if isinstance(e, subprocess.CalledProcessError):
+            current.exit_code = e.returncode
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current.reset(token)
+        _notify(sinks, "on_end", current)
+
+
+def traced(
+    name: Optional[str] = None, reference: Optional[Callable[..., Optional[str]]] = None
+) -> Callable[[_FunctionT], _FunctionT]:
+    """
+    Decorates a function so that each call is an "operation" span, when
+    any sink is registered.
+
+    Args:
+        name (Optional[str]): The span's name. Defaults to None, which uses
+            the function's qualified name.
+        reference (Optional[Callable[..., Optional[str]]]): Called with the
+            function's arguments to get the span's ModelKit reference.
+            Defaults to None.
+
+    Returns:
+        Callable[[_FunctionT], _FunctionT]: The decorator.
+    """
+
+    def decorate(function: _FunctionT) -> _FunctionT:
+        span_name = name or function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _settings["sinks"]:
+                return function(*args, **kwargs)
+            with span(span_name, OPERATION, reference(*args, **kwargs) if reference is not None else None):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+# commands whose arguments do not name a ModelKit or registry.
+_UNREFERENCED_COMMANDS = frozenset({"init", "version"})
+
+
+def _command_reference(command: List[Any]) -> Optional[str]:
+    """Returns the ModelKit reference or registry a `kit` command acts on, if any."""
+    args = [str(arg) for arg in command[1:]]
+    if not args or args[0] in _UNREFERENCED_COMMANDS:
+        return None
+    if "--tag" in args[:-1]:
+        return args[args.index("--tag") + 1]
+    position = 1
+    while position < len(args):
+        if args[position] == "--dir":
+            position += 2
+        elif args[position].startswith("-"):
+            position += 1
+        else:
+            return args[position]
+    return None
+
+
+def command_span(command: List[Any]) -> "contextlib.AbstractContextManager[Span]":
+    """
+    Times a `kit` command as a "command" span named after its subcommand,
+    e.g. "kit pull".
+
+    Args:
+        command (List[Any]): The command and its arguments.
+
+    Returns:
+        contextlib.AbstractContextManager[Span]: As returned by `span`.
+    """
+    name = f"kit {command[1]}" if len(command) > 1 else "kit"
+    return span(name, COMMAND, _command_reference(command))
+
+
+def track_bytes(current: Span, on_progress: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    """
+    Wraps a progress callback so that the bytes transferred it is told
+    about are recorded on a span, summed over layers.
+
+    Args:
+        current (Span): The span to record bytes on.
+        on_progress (Callable[[Any], Any]): The callback, taking
+            `kitops.cli.progress.ProgressEvent`s.
+
+    Returns:
+        Callable[[Any], Any]: The wrapped callback.
+    """
+    transferred: Dict[Optional[str], int] = {}
+
+    def record(event: Any) -> Any:
+        if event.transferred is not None:
+            transferred[event.digest] = event.transferred
+            current.bytes = sum(transferred.values())
+        return on_progress(event)
+
+    return record
@@ -20,18 +20,24 @@ import json
 import os
 import subprocess
 from logging import getLogger
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import yaml
-
-from ..modelkit.kitfile import Kitfile
 from ..modelkit.utils import IS_A_TTY, Color
+from .cache import ResultCache
+from .executor import get_executor
+from .instrumentation import command_span, is_enabled, track_bytes
+from .progress import ProgressCallback
 from .utils import _process_command_flags
 
+if TYPE_CHECKING:
+    from ..modelkit.kitfile import Kitfile
+
 LOG = getLogger(__name__)
 
 
-def import_from_hf(repo_path_without_tag: str, **kwargs) -> None:
+def import_from_hf(
+    repo_path_without_tag: str, on_progress: Optional[ProgressCallback] = None, **kwargs
+) -> None:
     """
     Import a model from HuggingFace. Download a repository from HuggingFace and
     package it as a ModelKit.
@@ -44,6 +50,8 @@ def import_from_hf(repo_path_without_tag: str, **kwargs) -> None:
 
     Args:
         repo_path_with_tag (str): The repository path along with the tag to be used for the package.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -56,7 +64,7 @@ def import_from_hf(repo_path_without_tag: str, **kwargs) -> None:
     command = ["kit", "import", repo_path_without_tag]
 
     command.extend(_process_command_flags(kit_cmd_name="import", **kwargs))
-    result = _run(command=command, input="n\n")
+    result = _run(command=command, input="n\n", on_progress=on_progress)
     LOG.info(result.stdout)
 
 
@@ -64,6 +72,7 @@ def info(
     repo_path_with_tag: str,
     filters: Optional[List[str]] = None,
     remote: Optional[bool] = False,
+    cache: Optional[ResultCache] = None,
     **kwargs
 ) -> Dict[str, Any]:
     """
@@ -75,6 +84,8 @@ def info(
         filters (Optional[List[str]]): A list of kitfile parts for which to
             retrieve information. Defaults to None.
         remote (Optional[bool]): Flag to indicate if the information should be retrieved remotely. Defaults to False.
+        cache (Optional[ResultCache]): A cache to answer from and store the
+            result in. Defaults to None, which always runs the command.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -90,6 +101,13 @@ def info(
         >>> print(kit_info["manifestVersion"])
         1.0
     """
+    flags = _process_command_flags(kit_cmd_name="info", **kwargs)
+    if cache is not None:
+        key = ResultCache.key("info", repo_path_with_tag, remote, filters, flags)
+        found, kit_info = cache.get(key)
+        if found:
+            return kit_info
+
     command = ["kit", "info", repo_path_with_tag]
     if filters:
         for filter in filters:
@@ -98,15 +116,20 @@ def info(
     if remote:
         command.append("--remote")
 
-    command.extend(_process_command_flags(kit_cmd_name="info", **kwargs))
+    command.extend(flags)
     result = _run(command=command)
-    kit_info = yaml.safe_load(result.stdout.strip())
+    # imported here so that YAML support is only loaded for `kit info`.
+    from ..modelkit.serialization import load_yaml  # noqa: PLC0415
+
+    kit_info = load_yaml(result.stdout.strip())
+    if cache is not None:
+        cache.put(key, repo_path_with_tag, kit_info)
     return kit_info
 
 
 def init(
     directory: str, name: str, description: str = " ", author: str = " ", **kwargs
-) -> Kitfile:
+) -> "Kitfile":
     """
     Generates a Kitfile for the contents of a given directory.
 
@@ -144,12 +167,18 @@ def init(
     command.extend(_process_command_flags(kit_cmd_name="init", **kwargs))
     result = _run(command=command)
     LOG.info(result.stdout)
+    # imported here so that pydantic is only loaded when a Kitfile is needed.
+    from ..modelkit.kitfile import Kitfile  # noqa: PLC0415
+
     kitfile = Kitfile(os.path.join(directory, "Kitfile"))
     return kitfile
 
 
 def inspect(
-    repo_path_with_tag: str, remote: Optional[bool] = False, **kwargs
+    repo_path_with_tag: str,
+    remote: Optional[bool] = False,
+    cache: Optional[ResultCache] = None,
+    **kwargs
 ) -> Dict[str, Any]:
     """
     Inspect a ModelKit, displaying the contents in the console, while returning
@@ -158,6 +187,8 @@ def inspect(
     Parameters:
     repo_path_with_tag (str): The path to the repository along with the tag.
     remote (Optional[bool]): Flag to indicate if the inspection should be done remotely. Defaults to False.
+    cache (Optional[ResultCache]): A cache to answer from and store the
+        result in. Defaults to None, which always runs the command.
     **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -167,13 +198,22 @@ def inspect(
         subprocess.CalledProcessError: If the command returns a non-zero exit status,
         The exception contains the return code and the standard error output.
     """
+    flags = _process_command_flags(kit_cmd_name="inspect", **kwargs)
+    if cache is not None:
+        key = ResultCache.key("inspect", repo_path_with_tag, remote, flags=flags)
+        found, kit_inspect = cache.get(key)
+        if found:
+            return kit_inspect
+
     command = ["kit", "inspect", repo_path_with_tag]
     if remote:
         command.append("--remote")
 
-    command.extend(_process_command_flags(kit_cmd_name="inspect", **kwargs))
+    command.extend(flags)
     result = _run(command=command)
     kit_inspect = json.loads(result.stdout.strip())
+    if cache is not None:
+        cache.put(key, repo_path_with_tag, kit_inspect)
     return kit_inspect
 
 
@@ -252,13 +292,20 @@ def logout(registry: Optional[str] = "jozu.ml", **kwargs) -> None:
     LOG.info(result.stdout)
 
 
-def pack(repo_path_with_tag: str, working_directory: Optional[str] = ".", **kwargs) -> None:
+def pack(
+    repo_path_with_tag: str,
+    working_directory: Optional[str] = ".",
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
+) -> None:
     """
     Packs the current directory into a ModelKit package with a specified tag.
 
     Args:
         repo_path_with_tag (str): The repository path along with the tag to be used for the package.
         working_direcotry (str): The directory where the Kitfile is located. Defaults to ".".
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -271,16 +318,18 @@ def pack(repo_path_with_tag: str, working_directory: Optional[str] = ".", **kwar
     command = ["kit", "pack", working_directory, "--tag", repo_path_with_tag]
 
     command.extend(_process_command_flags(kit_cmd_name="pack", **kwargs))
-    result = _run(command=command)
+    result = _run(command=command, on_progress=on_progress)
     LOG.info(result.stdout)
 
 
-def pull(repo_path_with_tag: str, **kwargs) -> None:
+def pull(repo_path_with_tag: str, on_progress: Optional[ProgressCallback] = None, **kwargs) -> None:
     """
     Pulls the specified ModelKit from the remote registry.
 
     Args:
         repo_path_with_tag (str): The path to the repository along with the tag to pull.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -293,16 +342,18 @@ def pull(repo_path_with_tag: str, **kwargs) -> None:
     command = ["kit", "pull", repo_path_with_tag]
 
     command.extend(_process_command_flags(kit_cmd_name="pull", **kwargs))
-    result = _run(command=command)
+    result = _run(command=command, on_progress=on_progress)
     LOG.info(result.stdout)
 
 
-def push(repo_path_with_tag: str, **kwargs) -> None:
+def push(repo_path_with_tag: str, on_progress: Optional[ProgressCallback] = None, **kwargs) -> None:
     """
     Pushes the specified ModelKit to the remote registry.
 
     Args:
         repo_path_with_tag (str): The path to the repository along with the tag to be pushed.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -315,7 +366,7 @@ def push(repo_path_with_tag: str, **kwargs) -> None:
     command = ["kit", "push", repo_path_with_tag]
 
     command.extend(_process_command_flags(kit_cmd_name="push", **kwargs))
-    result = _run(command=command)
+    result = _run(command=command, on_progress=on_progress)
     LOG.info(result.stdout)
 
 
@@ -372,7 +423,11 @@ def tag(repo_path_with_tag: str, repo_path_with_new_tag: str, **kwargs) -> None:
 
 
 def unpack(
-    repo_path_with_tag: str, dir: str, filters: Optional[List[str]] = None, **kwargs
+    repo_path_with_tag: str,
+    dir: str,
+    filters: Optional[List[str]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
 ) -> None:
     """
     Unpacks a ModelKit to the specified directory from the remote registry.
@@ -384,6 +439,8 @@ def unpack(
         repo_path_with_tag (str): The path to the repository along with
             the tag to be unpacked.
         dir (str): The directory to unpack the ModelKit to.
+        on_progress (Optional[ProgressCallback]): Called with a ProgressEvent
+            for every line the command prints, while it runs. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -400,7 +457,7 @@ def unpack(
             command.append(filter)
 
     command.extend(_process_command_flags(kit_cmd_name="unpack", **kwargs))
-    result = _run(command=command)
+    result = _run(command=command, on_progress=on_progress)
     LOG.info(result.stdout)
 
 
@@ -428,15 +485,24 @@ def version(**kwargs) -> str:
 
 
 def _run(
-    command: List[Any], input: Optional[str] = None, verbose: bool = True, **kwargs
+    command: List[Any],
+    input: Optional[str] = None,
+    verbose: bool = True,
+    on_progress: Optional[ProgressCallback] = None,
+    **kwargs,
 ) -> subprocess.CompletedProcess:
     """
-    Executes a command in the system shell.
+    Executes a command with the current executor; see
+    `kitops.cli.executor.set_executor`. The command is timed as a span
+    when instrumentation is enabled; see `kitops.cli.instrumentation`.
 
     Args:
         command (List[Any]): The command to be executed as a list of strings.
         input (Optional[str]): Optional input to be passed to the command.
         verbose (bool): If True, print the command before executing. Defaults to True.
+        on_progress (Optional[ProgressCallback]): If given, the output is
+            streamed to it while the command runs and only its last lines
+            are returned. Defaults to None.
         **kwargs: Additional arguments to pass to the command.
 
     Returns:
@@ -452,12 +518,20 @@ def _run(
             output = f"{Color.CYAN.value}{output}{Color.RESET.value}"
         LOG.info(output)
 
-    # Because check=True is used, any non-zero exit status will raise a CalledProcessError.
-    return subprocess.run(
-        command,
-        input=input,
-        text=True,
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
+    if not is_enabled():
+        return _execute(command, input, on_progress)
+    with command_span(command) as span:
+        if on_progress is not None:
+            on_progress = track_bytes(span, on_progress)
+        result = _execute(command, input, on_progress)
+        span.exit_code = result.returncode
+        return result
+
+
+def _execute(
+    command: List[Any], input: Optional[str], on_progress: Optional[ProgressCallback]
+) -> subprocess.CompletedProcess:
+    """Runs a command with the current executor, streaming its output if on_progress is given."""
+    if on_progress is not None:
+        return get_executor().stream(command, on_progress, input=input)
+    return get_executor().run(command, input=input)
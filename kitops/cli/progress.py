@@ -0,0 +1,276 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Structured progress from running `kit` commands.
+
+Commands that move data (`push`, `pull`, `pack`, `unpack`, `import`) report
+their progress as they go. `stream_command` reads a command's output while
+it runs, splitting it into lines on line feeds and carriage returns (so
+progress bars that redraw themselves are seen too), and hands each line to
+a callback as a ProgressEvent. `parse_progress_line` picks out what a line
+mentions: a layer digest, bytes transferred and total, a rate, a
+percentage. Lines mentioning none of these are passed on as plain messages.
+
+Only the last `TAIL_LINES` lines of each stream are kept for the returned
+CompletedProcess, so memory use does not grow with the amount of output.
+"""
+
+import codecs
+import collections
+import os
+import queue
+import re
+import subprocess
+import threading
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Deque, Dict, List, Optional, Tuple
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+# lines kept per stream once a streamed command has finished.
+TAIL_LINES = 200
+# longer lines are cut into pieces of this many characters.
+MAX_LINE_LENGTH = 64 * 1024
+# chunks of output read ahead of a slow callback before the readers wait.
+_QUEUE_SIZE = 4
+_CHUNK_SIZE = 64 * 1024
+
+_UNITS = {
+    "b": 1,
+    "kb": 10**3, "mb": 10**6, "gb": 10**9, "tb": 10**12,
+    "kib": 2**10, "mib": 2**20, "gib": 2**30, "tib": 2**40,
+}  # fmt: skip
+# numbers are only matched from their first digit, which keeps long runs of
+# digits, such as those in digests, from being tried at every position.
+_NUMBER = r"(?<![\w.])(\d+(?:\.\d+)?)"
+_SIZE = _NUMBER + r"\s*([kmgt]i?b|b)\b"
+_DIGEST_RE = re.compile(r"\b((?:sha256:[0-9a-f]{7,64})|(?:sha512:[0-9a-f]{7,128}))")
+_RATE_RE = re.compile(_SIZE + r"\s*/\s*s\b", re.IGNORECASE)
+_TRANSFER_RE = re.compile(_SIZE + r"\s*/\s*" + _SIZE, re.IGNORECASE)
+_PERCENT_RE = re.compile(_NUMBER + r"\s*%")
+_LINE_BREAK_RE = re.compile(r"[\r\n]+")
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    One line of output from a running `kit` command.
+
+    Attributes:
+        line (str): The line, without its line break.
+        stream (str): "stdout" or "stderr".
+        digest (Optional[str]): The digest of the layer the line is about.
+        transferred (Optional[int]): The bytes transferred so far.
+        total (Optional[int]): The bytes to transfer in all.
+        rate (Optional[float]): The transfer rate in bytes per second.
+        percent (Optional[float]): How far along the transfer is, as
+            printed or computed from transferred and total.
+    """
+
+    line: str
+    stream: str = STDERR
+    digest: Optional[str] = None
+    transferred: Optional[int] = None
+    total: Optional[int] = None
+    rate: Optional[float] = None
+    percent: Optional[float] = None
+
+    @property
+    def is_progress(self) -> bool:
+        """Whether the line reported any progress rather than only a message."""
+        return self.transferred is not None or self.percent is not None
+
+
+ProgressCallback = Callable[[ProgressEvent], Any]
+
+
+def _to_bytes(amount: str, unit: str) -> float:
+    return float(amount) * _UNITS[unit.lower()]
+
+
+def parse_progress_line(line: str, stream: str = STDERR) -> ProgressEvent:
+    """
+    Picks the progress details out of one line of `kit` output.
+
+    Sizes are read with their unit (B, KB, KiB, MB, MiB...), a rate is a
+    size followed by "/s", and a transfer is two sizes separated by "/".
+
+    Args:
+        line (str): The line, without its line break.
+        stream (str): The stream the line was read from. Defaults to "stderr".
+
+    Returns:
+        ProgressEvent: The event, with the details the line does not
+            mention left as None.
+
+    Examples:
+        >>> event = parse_progress_line("Pushing sha256:3f2a9c1e 12.5 MiB / 50 MiB (2.5 MiB/s)")
+        >>> event.digest, event.transferred, event.total, event.percent
+        ('sha256:3f2a9c1e', 13107200, 52428800, 25.0)
+    """
+    digest = _DIGEST_RE.search(line)
+    rate = _RATE_RE.search(line)
+    # a rate's size must not be taken for the total of a transfer.
+    remainder = line[: rate.start()] + line[rate.end() :] if rate else line
+    transfer = _TRANSFER_RE.search(remainder)
+    percent = _PERCENT_RE.search(remainder)
+
+    transferred = total = None
+    if transfer:
+        transferred = int(_to_bytes(transfer.group(1), transfer.group(2)))
+        total = int(_to_bytes(transfer.group(3), transfer.group(4)))
+    if percent:
+        percent_value: Optional[float] = float(percent.group(1))
+    elif transferred is not None and total:
+        percent_value = round(100 * transferred / total, 2)
+    else:
+        percent_value = None
+    return ProgressEvent(
+        line=line,
+        stream=stream,
+        digest=digest.group(1) if digest else None,
+        transferred=transferred,
+        total=total,
+        rate=_to_bytes(rate.group(1), rate.group(2)) if rate else None,
+        percent=percent_value,
+    )
+
+
+class _LineSplitter:
+    """Splits bytes into decoded lines as they arrive, on line feeds and carriage returns."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._pending = ""
+
+    def feed(self, data: bytes, final: bool = False) -> List[str]:
+        """Returns the lines completed by data; with final, also the last unterminated one."""
+        pieces = _LINE_BREAK_RE.split(self._pending + self._decoder.decode(data, final))
+        self._pending = "" if final else pieces.pop()
+        lines = [
+            piece[start : start + MAX_LINE_LENGTH]
+            for piece in pieces
+            for start in range(0, len(piece), MAX_LINE_LENGTH)
+        ]
+        while len(self._pending) > MAX_LINE_LENGTH:
+            lines.append(self._pending[:MAX_LINE_LENGTH])
+            self._pending = self._pending[MAX_LINE_LENGTH:]
+        return lines
+
+
+def _tail_text(lines: Deque[str]) -> str:
+    """Joins the kept lines of a stream back into text."""
+    return "".join(line + "\n" for line in lines)
+
+
+def _read_lines(pipe: IO[bytes], stream: str, lines: "queue.Queue[Tuple[str, Optional[List[str]]]]") -> None:
+    """Queues the lines of one pipe as they are read, a chunk at a time, then None once it closes."""
+    splitter = _LineSplitter()
+    try:
+        while chunk := os.read(pipe.fileno(), _CHUNK_SIZE):
+            lines.put((stream, splitter.feed(chunk)))
+        lines.put((stream, splitter.feed(b"", final=True)))
+    finally:
+        pipe.close()
+        lines.put((stream, None))
+
+
+def stream_command(
+    command: List[Any], on_progress: ProgressCallback, input: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Runs a command, calling on_progress with every line it prints as it
+    prints it.
+
+    Callbacks are made from the calling thread, in the order the lines
+    were read. While a callback runs, at most a few hundred kilobytes of
+    output are read ahead, after which the command is left to wait. If a
+    callback raises, or the caller is interrupted, the command is killed.
+
+    Args:
+        command (List[Any]): The command and its arguments.
+        on_progress (ProgressCallback): Called with a ProgressEvent for
+            every line of output, from either stream.
+        input (Optional[str]): Text to write to the command's stdin.
+            Defaults to None.
+
+    Returns:
+        subprocess.CompletedProcess: The completed process, holding the
+            last TAIL_LINES lines of each stream.
+
+    Raises:
+        subprocess.CalledProcessError: If the command returns a non-zero
+            exit status. Its output holds the last lines of each stream.
+        OSError: If the command cannot be started.
+    """
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if input is not None else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    assert process.stdout is not None and process.stderr is not None
+    lines: "queue.Queue[Tuple[str, Optional[List[str]]]]" = queue.Queue(maxsize=_QUEUE_SIZE)
+    readers = [
+        threading.Thread(target=_read_lines, args=(pipe, stream, lines), daemon=True)
+        for pipe, stream in ((process.stdout, STDOUT), (process.stderr, STDERR))
+    ]
+    for reader in readers:
+        reader.start()
+    if input is not None:
+        threading.Thread(target=_write_input, args=(process.stdin, input), daemon=True).start()
+
+    tails: Dict[str, Deque[str]] = {
+        STDOUT: collections.deque(maxlen=TAIL_LINES),
+        STDERR: collections.deque(maxlen=TAIL_LINES),
+    }
+    open_streams = len(readers)
+    try:
+        while open_streams:
+            stream, chunk = lines.get()
+            if chunk is None:
+                open_streams -= 1
+                continue
+            tails[stream].extend(chunk)
+            for line in chunk:
+                on_progress(parse_progress_line(line, stream))
+    except BaseException:
+        process.kill()
+        # let the readers see the pipes close rather than wait on a full queue.
+        while open_streams:
+            if lines.get()[1] is None:
+                open_streams -= 1
+        process.wait()
+        raise
+    returncode = process.wait()
+    for reader in readers:
+        reader.join()
+
+    stdout, stderr = _tail_text(tails[STDOUT]), _tail_text(tails[STDERR])
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command, output=stdout, stderr=stderr)
+    return subprocess.CompletedProcess(command, returncode, stdout=stdout, stderr=stderr)
+
+
+def _write_input(pipe: IO[bytes], input: str) -> None:
+    """Writes a command's input, then closes its stdin."""
+    try:
+        pipe.write(input.encode())
+        pipe.close()
+    except OSError:
+        pass
@@ -16,365 +16,185 @@ limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import List, Optional
-
-
-def _process_flag(
-    full_key_name: str,
-    abbr_key_name: Optional[str] = None,
-    has_value_part: Optional[bool] = False,
-    **kwargs,
-) -> List[str]:
-    """
-    Processes the flag specified by key_full_name, it it exists
-
-    Args:
-        **kwargs: The arguments from which to extract the specified flag to be
-        processed, if found.
-
-    Returns:
-        List[str]: The processed flag, if found; otherwise, an empty list.
-    """
-    flag = []
-    found_full_key_name = kwargs.get(full_key_name, False)
-    found_abbr_key_name = kwargs.get(abbr_key_name, False) if abbr_key_name else False
-    if found_full_key_name:
-        flag.append(f"--{full_key_name}")
-        if has_value_part:
-            value = kwargs.get(full_key_name, None)
-            if value:
-                flag.append(value)
-    elif found_abbr_key_name:
-        flag.append(f"-{abbr_key_name}")
-        if has_value_part:
-            value = found_abbr_key_name
-            if value:
-                flag.append(value)
-    return flag
-
-
-def _get_all_flag(**kwargs) -> List[str]:
-    """
-    Processes the all flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the all flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed all flag, if provided; otherwise, an empty list.
-    """
-    return _process_flag(full_key_name="all", abbr_key_name="a", **kwargs)
-
-
-def _get_cert_flag(**kwargs) -> List[str]:
-    """
-    Processes the cert flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the cert flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed cert flag, if provided; otherwise, an empty list.
-    """
-    return _process_flag(full_key_name="cert", has_value_part=True, **kwargs)
-
-
-def _get_compression_flag(**kwargs) -> List[str]:
-    """
-    Processes the compression flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the compression flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed compression flag, if provided; otherwise,
-            an empty list.
-    """
-    return _process_flag(full_key_name="compression", has_value_part=True, **kwargs)
-
-
-def _get_concurrency_flag(**kwargs) -> List[str]:
-    """
-    Processes the concurrency flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the concurrency flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed concurrency flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="concurrency", has_value_part=True, **kwargs)
-
-
-def _get_dir_flag(**kwargs) -> List[str]:
-    """
-    Processes the dir flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the dir flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed dir flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(
-        full_key_name="dir", abbr_key_name="d", has_value_part=True, **kwargs
-    )
-
-
-def _get_file_flag(**kwargs) -> List[str]:
-    """
-    Processes the file flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the file flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed file flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(
-        full_key_name="file", abbr_key_name="f", has_value_part=True, **kwargs
-    )
-
-
-def _get_force_flag(**kwargs) -> List[str]:
-    """
-    Processes the force flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the force flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed force flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="force", abbr_key_name="f", **kwargs)
-
-
-def _get_key_flag(**kwargs) -> List[str]:
-    """
-    Processes the key flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the key flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed key flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="key", has_value_part=True, **kwargs)
-
-
-def _get_overwrite_flag(**kwargs) -> List[str]:
-    """
-    Processes the overwrite flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the overwrite flag
-        to be processed, if provided.
-
-    Returns:
-        List[str]: The processed overwrite flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="overwrite", abbr_key_name="o", **kwargs)
-
-
-def _get_plain_http_flag(**kwargs) -> List[str]:
-    """
-    Processes the plain-http flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the plain-http
-        flag to be processed, if provided.
-
-    Returns:
-        List[str]: The processed plain-http flag, if provided; otherwise,
-            an empty list.
-    """
-    return _process_flag(full_key_name="plain-http", **kwargs)
-
-
-def _get_proxy_flag(**kwargs) -> List[str]:
-    """
-    Processes the proxy flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the proxy flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed proxy flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="proxy", has_value_part=True, **kwargs)
-
-
-def _get_remote_flag(**kwargs) -> List[str]:
-    """
-    Processes the remote flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the remote flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed remote flag, if provided; otherwise,
-        an empty list.
-    """
-    return _process_flag(full_key_name="remote", abbr_key_name="r", **kwargs)
-
-
-def _get_show_update_notifications_flag(**kwargs) -> List[str]:
-    """
-    Processes the show-update-notifications flag for the KitOps CLI command,
-    if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the show-update-notifications
-        flag to be processed, if provided.
-
-    Returns:
-        List[str]: The processed show-update-notifications flag, if provided;
-        otherwise,
-            an empty list.
-    """
-    return _process_flag(full_key_name="show-update-notifications", **kwargs)
-
-
-def _get_tag_flag(**kwargs) -> List[str]:
-    """
-    Processes the tag flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the tag flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed tag flag, if provided; otherwise, an empty list.
-    """
-    return _process_flag(
-        full_key_name="tag", abbr_key_name="t", has_value_part=True, **kwargs
-    )
-
-
-def _get_tls_verify_flag(**kwargs) -> List[str]:
-    """
-    Processes the tls-verify flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the tls-verify
-        flag to be processed, if provided.
-
-    Returns:
-        List[str]: The processed tls-verify flag, if provided; otherwise,
-            an empty list.
-    """
-    return _process_flag(full_key_name="tls-verify", **kwargs)
-
-
-def _get_token_flag(**kwargs) -> List[str]:
-    """
-    Processes the token flag for the KitOps CLI command, if provided.
-
-    Args:
-        **kwargs: The arguments from which to extract the token flag to be
-        processed, if provided.
-
-    Returns:
-        List[str]: The processed token flag, if provided; otherwise, an empty list.
-    """
-    return _process_flag(full_key_name="token", has_value_part=True, **kwargs)
-
-
-def _process_global_flags(**kwargs) -> List[str]:
-    """
-    Processes the global flags for the KitOps CLI.
-
-    Args:
-        **kwargs: The global flags to be processed.
-
-    Returns:
-        List[str]: The processed global flags.
-    """
-    flags = []
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Flag:
+    """
+    A flag of the KitOps CLI.
+
+    Attributes:
+        name (str): The long name, passed as `--name`, and the keyword the
+            wrappers accept for it (with "_" in place of "-" also accepted).
+        short (Optional[str]): The one-letter alias, passed as `-s`, and
+            also accepted as a keyword.
+        takes_value (bool): Whether the flag is followed by a value. Flags
+            without one are switches, given for a true keyword argument.
+        types (Tuple[type, ...]): The types a value may have. Values are
+            passed to `kit` as strings.
+        long (bool): Whether the flag is spelled with two dashes; False for
+            short-only flags such as `-v`.
+    """
+
+    name: str
+    short: Optional[str] = None
+    takes_value: bool = False
+    types: Tuple[type, ...] = (bool,)
+    long: bool = True
+
+
+def _value(name: str, short: Optional[str] = None, types: Tuple[type, ...] = (str,)) -> Flag:
+    return Flag(name, short, takes_value=True, types=types)
+
+
+_PATH = (str, os.PathLike)
+
+GLOBAL_FLAGS: Tuple[Flag, ...] = (
+    Flag("h", long=False),
+    Flag("v", long=False),
+    Flag("vv", long=False),
+    Flag("vvv", long=False),
+    Flag("help"),
+    Flag("verbose"),
+    _value("config", types=_PATH),
+    _value("log-level"),
+    _value("progress"),
+)
+
+_NETWORK_FLAGS: Tuple[Flag, ...] = (
+    Flag("plain-http"),
+    Flag("tls-verify"),
+    _value("cert", types=_PATH),
+    _value("key", types=_PATH),
+    _value("concurrency", types=(int, str)),
+    _value("proxy"),
+)
+
+# the flags each command accepts besides GLOBAL_FLAGS and its own arguments.
+COMMAND_FLAGS: Dict[str, Tuple[Flag, ...]] = {
+    "import": (_value("tag", "t"), _value("token")),
+    "info": (*_NETWORK_FLAGS, Flag("remote", "r")),
+    "init": (Flag("force", "f"),),
+    "inspect": (*_NETWORK_FLAGS, Flag("remote", "r")),
+    "list": _NETWORK_FLAGS,
+    "login": _NETWORK_FLAGS,
+    "logout": (),
+    "pack": (_value("file", "f", types=_PATH), _value("compression")),
+    "pull": _NETWORK_FLAGS,
+    "push": _NETWORK_FLAGS,
+    "remove": (*_NETWORK_FLAGS, Flag("all", "a"), Flag("force", "f"), Flag("remote", "r")),
+    "tag": (),
+    "unpack": (*_NETWORK_FLAGS, Flag("overwrite", "o")),
+    "version": (Flag("show-update-notifications"),),
+}
+
+
+@dataclass(frozen=True)
+class _Option:
+    """One accepted keyword of a command, resolved to its flag and spelling."""
+
+    flag: Flag
+    spelling: str
+
+
+def _compile(flags: Tuple[Flag, ...]) -> Dict[str, _Option]:
+    """Maps every keyword accepted for a set of flags to how it is passed to `kit`."""
+    options: Dict[str, _Option] = {}
+    for flag in flags:
+        spelling = f"--{flag.name}" if flag.long else f"-{flag.name}"
+        options[flag.name] = options[flag.name.replace("-", "_")] = _Option(flag, spelling)
+        if flag.short:
+            options[flag.short] = _Option(flag, f"-{flag.short}")
+    return options
+
+
+_SCHEMAS: Dict[str, Dict[str, _Option]] = {
+    command: _compile((*flags, *GLOBAL_FLAGS)) for command, flags in COMMAND_FLAGS.items()
+}
+
+
+def _schema(kit_cmd_name: str) -> Dict[str, _Option]:
+    """Returns the compiled flags of a command."""
+    try:
+        return _SCHEMAS[kit_cmd_name]
+    except KeyError:
+        raise ValueError(f"Unknown kit command '{kit_cmd_name}'.") from None
+
+
+def _check(kit_cmd_name: str, schema: Dict[str, _Option], key: str, value: Any, seen: Dict[str, str]) -> _Option:
+    """Returns the option for a keyword argument, raising TypeError if it is not valid for the command."""
+    option = schema.get(key)
+    if option is None:
+        raise TypeError(
+            f"Unknown flag '{key}' for 'kit {kit_cmd_name}'. "
+            f"Valid flags: {', '.join(sorted({option.flag.name for option in schema.values()}))}."
+        )
+    flag = option.flag
+    if value is not None and not isinstance(value, flag.types):
+        expected = " or ".join(t.__name__ for t in flag.types)
+        raise TypeError(f"Flag '{key}' for 'kit {kit_cmd_name}' must be {expected}, not {type(value).__name__}.")
+    if flag.name in seen:
+        raise TypeError(f"Flag '{flag.name}' for 'kit {kit_cmd_name}' given twice, as '{seen[flag.name]}' and '{key}'.")
+    seen[flag.name] = key
+    return option
+
+
+def validate_flags(kit_cmd_name: str, **kwargs) -> None:
+    """
+    Checks keyword arguments against a command's flags without building
+    them.
+
+    Args:
+        kit_cmd_name (str): The `kit` subcommand, e.g. "pull".
+        **kwargs: The flags, as they would be passed to the command.
+
+    Raises:
+        ValueError: If the command is unknown.
+        TypeError: If a flag is unknown for the command, is given twice,
+            or has a value of the wrong type.
+    """
+    schema = _schema(kit_cmd_name)
+    seen: Dict[str, str] = {}
     for key, value in kwargs.items():
-        if key in ["h", "v", "vv", "vvv"]:
-            flags.append(f"-{key}")
-        elif key in [
-            "help",
-            "verbose",
-        ]:
-            flags.append(f"--{key}")
-        elif key in ["config", "log-level", "progress"]:
-            if value is not None:
-                flags.append(f"--{key}")
-                flags.append(value)
-    return flags
+        _check(kit_cmd_name, schema, key, value, seen)
 
 
 def _process_command_flags(kit_cmd_name: str, **kwargs) -> List[str]:
     """
     Processes the command-specific and global flags for the KitOps CLI.
 
+    Switches are passed when their value is true; flags with a value are
+    passed unless it is None, False or an empty string.
+
     Args:
-        **kwargs: The command-specific flags to be processed.
+        kit_cmd_name (str): The `kit` subcommand, e.g. "pull".
+        **kwargs: The command-specific and global flags to be processed.
 
     Returns:
-        List[str]: The processed command-specific flags.
-    """
-    flags = []
-    if kit_cmd_name in [
-        "info",
-        "inspect",
-        "list",
-        "login",
-        "pull",
-        "push",
-        "remove",
-        "unpack",
-    ]:
-        flags.extend(_get_plain_http_flag(**kwargs))
-        flags.extend(_get_tls_verify_flag(**kwargs))
-        flags.extend(_get_cert_flag(**kwargs))
-        flags.extend(_get_key_flag(**kwargs))
-        flags.extend(_get_concurrency_flag(**kwargs))
-        flags.extend(_get_proxy_flag(**kwargs))
-
-    if kit_cmd_name in ["import"]:
-        flags.extend(_get_tag_flag(**kwargs))
-        flags.extend(_get_token_flag(**kwargs))
-
-    if kit_cmd_name in ["init"]:
-        flags.extend(_get_force_flag(**kwargs))
-
-    if kit_cmd_name in ["pack"]:
-        flags.extend(_get_file_flag(**kwargs))
-        flags.extend(_get_compression_flag(**kwargs))
-
-    if kit_cmd_name in ["remove"]:
-        flags.extend(_get_all_flag(**kwargs))
-        flags.extend(_get_force_flag(**kwargs))
-
-    if kit_cmd_name in ["info", "inspect", "remove"]:
-        flags.extend(_get_remote_flag(**kwargs))
-
-    if kit_cmd_name in ["unpack"]:
-        flags.extend(_get_overwrite_flag(**kwargs))
-
-    if kit_cmd_name in ["version"]:
-        flags.extend(_get_show_update_notifications_flag(**kwargs))
-
-    flags.extend(_process_global_flags(**kwargs))
+        List[str]: The processed flags, in the order they were given.
 
+    Raises:
+        ValueError: If the command is unknown.
+        TypeError: If a flag is unknown for the command, is given twice,
+            or has a value of the wrong type.
+    """
+    schema = _schema(kit_cmd_name)
+    if not kwargs:
+        return []
+    seen: Dict[str, str] = {}
+    flags: List[str] = []
+    for key, value in kwargs.items():
+        option = _check(kit_cmd_name, schema, key, value, seen)
+        if value is None or value is False:
+            continue
+        if option.flag.takes_value:
+            if value == "":
+                continue
+            flags.append(option.spelling)
+            flags.append(os.fspath(value) if isinstance(value, os.PathLike) else str(value))
+        else:
+            flags.append(option.spelling)
     return flags
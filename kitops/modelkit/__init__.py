@@ -16,6 +16,25 @@ limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
-from ._pydantic_kit import CodeEntry, DatasetEntry, DocsEntry, ModelSection, Package
+from typing import TYPE_CHECKING, Any, List
 
-__all__ = "Package", "CodeEntry", "DatasetEntry", "DocsEntry", "ModelSection"
+if TYPE_CHECKING:
+    from ._pydantic_kit import CodeEntry, CompactEntries, DatasetEntry, DocsEntry, IndexedEntry, ModelSection, Package
+
+__all__ = "Package", "CodeEntry", "CompactEntries", "DatasetEntry", "DocsEntry", "IndexedEntry", "ModelSection"
+
+
+def __getattr__(name: str) -> Any:
+    # the Kitfile models are only imported, along with pydantic, when first
+    # used, so that `kitops.cli.kit` and friends load quickly (PEP 562).
+    if name in __all__:
+        from . import _pydantic_kit  # noqa: PLC0415
+
+        value = getattr(_pydantic_kit, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *__all__})
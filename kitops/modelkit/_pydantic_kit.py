@@ -18,10 +18,65 @@
 Define the PydanticKitfile class as parent to Kitfile.
 """
 
-from pathlib import Path
-from typing import Any, Optional
+import os
+import posixpath
+import sys
+from bisect import bisect_left
+from collections.abc import Iterable, MutableSequence
+from functools import cache, wraps
+from itertools import islice, repeat
+from pathlib import Path, PurePath, PurePosixPath
+from typing import Annotated, Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
 
-from pydantic import BaseModel, Field, computed_field
+from pydantic import AfterValidator, BaseModel, Field, PrivateAttr, TypeAdapter, WrapSerializer, computed_field
+
+EntryT = TypeVar("EntryT", bound=BaseModel)
+
+
+def _serialize_entries(value: Any, handler: Any) -> Any:
+    """Serializes a compact entry list like the list it stands for."""
+    return handler(value if isinstance(value, list) else list(value))
+
+
+# lets an entry list field hold either a list or CompactEntries.
+_EntryListSerializer = WrapSerializer(_serialize_entries)
+
+# bumped whenever an entry's path or name is set or an entry list is changed
+# in place; an entry index records it and is rebuilt once it has moved on.
+_entry_version = [0]
+
+
+def _entries_changed() -> None:
+    """Marks every entry index as stale."""
+    _entry_version[0] += 1
+
+
+def _tracked(method: Callable[..., Any]) -> Callable[..., Any]:
+    """Wraps a list method so that calling it marks entry indexes as stale."""
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        _entries_changed()
+        return result
+
+    return wrapper
+
+
+class _EntryList(list):
+    """A list of entries that marks entry indexes as stale when it is changed in place."""
+
+    __slots__ = ()
+
+
+for _name in (
+    "__setitem__", "__delitem__", "__iadd__", "__imul__",
+    "append", "extend", "insert", "pop", "remove", "clear", "sort", "reverse",
+):  # fmt: skip
+    setattr(_EntryList, _name, _tracked(getattr(list, _name)))
+
+# stores a validated entry list as an _EntryList.
+_TrackEntries = AfterValidator(_EntryList)
 
 
 class BasePathModel(BaseModel):
@@ -29,6 +84,11 @@ class BasePathModel(BaseModel):
 
     path: str | Path
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in ("path", "name"):
+            _entries_changed()
+
 
 class Package(BaseModel):
     """
@@ -136,7 +196,7 @@ class ModelSection(BasePathModel):
     version: Optional[str] = Field(default="", examples=["0.0a13", "1.8.0"], coerce_numbers_to_str=True)
     description: Optional[str] = ""
     license: Optional[str] = ""
-    parts: list[ModelPart] = []
+    parts: Annotated[list[ModelPart], _TrackEntries, _EntryListSerializer] = Field(default_factory=_EntryList)
     parameters: Any = Field(
         default=None,
         description=(
@@ -147,6 +207,211 @@ class ModelSection(BasePathModel):
         ),
     )
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "parts" and type(value) is list:
+            value = _EntryList(value)
+        super().__setattr__(name, value)
+
+
+@cache
+def _entries_adapter(entry_type: type[EntryT]) -> TypeAdapter[list[EntryT]]:
+    """Returns a reusable validator for a list of entries."""
+    return TypeAdapter(list[entry_type])  # type: ignore[valid-type]
+
+
+def _validate_entries(entry_type: type[EntryT], value: list) -> list[EntryT]:
+    """
+    Validates the dict items of an entry list, keeping other items as they
+    are. A list of dicts is validated in a single pass, which is about
+    twice as fast as validating item by item.
+    """
+    if all(isinstance(item, dict) for item in value):
+        return _entries_adapter(entry_type).validate_python(value)
+    return [entry_type.model_validate(item) if isinstance(item, dict) else item for item in value]
+
+
+# an entry field holding this was not set, so it is left out of unset-excluding dumps.
+_UNSET: Any = object()
+_PACK_CHUNK_SIZE = 1024
+_UNIQUE_FIELDS = frozenset({"path", "name"})
+
+
+class CompactEntries(MutableSequence[EntryT]):
+    """
+    A list of Kitfile entries stored column by column, for Kitfiles too
+    large to keep one Pydantic model per entry in memory.
+
+    Each field is held in a plain list, with repeated strings shared, and an
+    entry model is only built when the entry is read. Entries read from a
+    CompactEntries are copies: change an entry by assigning it back (for
+    example `kitfile.datasets[3] = entry`), not by setting its attributes.
+
+    Examples:
+        >>> datasets = CompactEntries(DatasetEntry, [{"path": "data/train.csv"}])
+        >>> datasets[0].path
+        'data/train.csv'
+    """
+
+    __slots__ = ("_columns", "_entry_type")
+
+    def __init__(self, entry_type: type[EntryT], entries: Iterable[EntryT | dict] = ()):
+        """
+        Initializes the CompactEntries, validating the entries in chunks so
+        that only a chunk of entry models exists at any time.
+
+        Args:
+            entry_type (type[EntryT]): The entry model, such as DatasetEntry.
+            entries (Iterable[EntryT | dict]): The entries. Defaults to none.
+
+        Raises:
+            ValidationError: If an entry is not valid.
+        """
+        self._entry_type = entry_type
+        self._columns: Dict[str, List[Any]] = {name: [] for name in entry_type.model_fields}
+        iterator = iter(entries)
+        while chunk := list(islice(iterator, _PACK_CHUNK_SIZE)):
+            for entry in _validate_entries(entry_type, chunk):
+                for column, value in zip(self._columns.values(), self._pack(entry)):
+                    column.append(value)
+
+    def _pack(self, entry: EntryT | dict) -> Tuple[Any, ...]:
+        """Returns the column values of one entry."""
+        if not isinstance(entry, self._entry_type):
+            entry = self._entry_type.model_validate(entry)
+        fields_set = entry.model_fields_set
+        values = []
+        for name in self._columns:
+            value = getattr(entry, name) if name in fields_set else _UNSET
+            # descriptions, licenses and types repeat across entries; paths
+            # and names rarely do, and interning them would only grow the
+            # interpreter's table of interned strings.
+            if type(value) is str and name not in _UNIQUE_FIELDS:
+                value = sys.intern(value)
+            values.append(value)
+        return tuple(values)
+
+    def _entry(self, index: int) -> EntryT:
+        """Builds the model of one entry."""
+        data = {name: column[index] for name, column in self._columns.items() if column[index] is not _UNSET}
+        return self._entry_type.model_validate(data)
+
+    def values(self, field: str) -> Iterator[Any]:
+        """
+        Iterates over one field of every entry without building the entries.
+
+        Args:
+            field (str): The field name. Fields the entry type does not have
+                read as None.
+
+        Returns:
+            Iterator[Any]: The field values, in entry order.
+        """
+        column = self._columns.get(field)
+        if column is None:
+            return repeat(None, len(self))
+        default = self._entry_type.model_fields[field].default
+        return (default if value is _UNSET else value for value in column)
+
+    def __len__(self) -> int:
+        return len(self._columns["path"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._entry(i) for i in range(*index.indices(len(self)))]
+        return self._entry(range(len(self))[index])
+
+    def __iter__(self) -> Iterator[EntryT]:
+        for index in range(len(self)):
+            yield self._entry(index)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            rows = [self._pack(entry) for entry in value]
+            for position, column in enumerate(self._columns.values()):
+                column[index] = [row[position] for row in rows]
+            _entries_changed()
+            return
+        row = self._pack(value)
+        for column, field_value in zip(self._columns.values(), row):
+            column[index] = field_value
+        _entries_changed()
+
+    def __delitem__(self, index) -> None:
+        for column in self._columns.values():
+            del column[index]
+        _entries_changed()
+
+    def insert(self, index: int, value: EntryT | dict) -> None:
+        for column, field_value in zip(self._columns.values(), self._pack(value)):
+            column.insert(index, field_value)
+        _entries_changed()
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, (list, CompactEntries)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    # mutable, like the list it stands for.
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"CompactEntries({self._entry_type.__name__}, {len(self)} entries)"
+
+
+class IndexedEntry(NamedTuple):
+    """
+    A Kitfile entry found through the Kitfile's index.
+
+    Args:
+        section (str): The section holding the entry: "model", "parts",
+            "code", "datasets", "docs" or "prompts".
+        entry (BasePathModel): The entry itself.
+    """
+
+    section: str
+    entry: BasePathModel
+
+
+def normalize_entry_path(path: str | Path) -> str:
+    """
+    Normalize an entry path for lookups: forward slashes, no leading "./"
+    and no trailing "/".
+
+    Examples:
+        >>> normalize_entry_path("./data/train/")
+        'data/train'
+    """
+    text = path.as_posix() if isinstance(path, PurePath) else path.replace(os.sep, "/")
+    normalized = posixpath.normpath(text)
+    return "" if normalized == "." else normalized
+
+
+def _entry_values(entries: Iterable[BaseModel], field: str) -> Iterable[Any]:
+    """Iterates over one field of an entry list, without building compact entries."""
+    if isinstance(entries, CompactEntries):
+        return entries.values(field)
+    return (getattr(entry, field, None) for entry in entries)
+
+
+class _EntryIndex:
+    """
+    Path and name lookups over the entries of a Kitfile, built in one pass.
+    Entries are recorded by section and position, so that indexing a
+    compact Kitfile does not build its entries.
+    """
+
+    __slots__ = ("by_name", "by_path", "signature", "sorted_paths")
+
+    def __init__(self, entries: Iterator[Tuple[str, int, str | Path, Optional[str]]], signature: Tuple[Any, ...]):
+        self.signature = signature
+        self.by_path: Dict[str, List[Tuple[str, int]]] = {}
+        self.by_name: Dict[str, List[Tuple[str, int]]] = {}
+        for section, position, path, name in entries:
+            self.by_path.setdefault(normalize_entry_path(path), []).append((section, position))
+            if name:
+                self.by_name.setdefault(name, []).append((section, position))
+        self.sorted_paths = sorted(self.by_path)
+
 
 class PydanticKitfile(BaseModel):
     """
@@ -169,14 +434,210 @@ class PydanticKitfile(BaseModel):
         alias="manifestVersion",
         exclude=True,
     )
-    prop_code: list[CodeEntry] = Field(default_factory=list, alias="code", repr=False, exclude=True)
-    prop_datasets: list[DatasetEntry] = Field(default_factory=list, alias="datasets", repr=False, exclude=True)
-    prop_docs: list[DocsEntry] = Field(default_factory=list, alias="docs", repr=False, exclude=True)
-    prop_prompts: list[PromptEntry] = Field(default_factory=list, alias="prompts", repr=False, exclude=True)
+    prop_code: Annotated[list[CodeEntry], _TrackEntries] = Field(
+        default_factory=_EntryList, alias="code", repr=False, exclude=True
+    )
+    prop_datasets: Annotated[list[DatasetEntry], _TrackEntries] = Field(
+        default_factory=_EntryList, alias="datasets", repr=False, exclude=True
+    )
+    prop_docs: Annotated[list[DocsEntry], _TrackEntries] = Field(
+        default_factory=_EntryList, alias="docs", repr=False, exclude=True
+    )
+    prop_prompts: Annotated[list[PromptEntry], _TrackEntries] = Field(
+        default_factory=_EntryList, alias="prompts", repr=False, exclude=True
+    )
     prop_package: Package = Field(default_factory=Package, alias="package", repr=False, exclude=True)
     prop_model: ModelSection = Field(
         default_factory=lambda: ModelSection(path=""), alias="model", repr=False, exclude=True
     )
+    # built on the first lookup; dropped whenever a section is replaced.
+    _index: Optional[_EntryIndex] = PrivateAttr(default=None)
+    # whether entry lists are stored as CompactEntries.
+    _compact: bool = PrivateAttr(default=False)
+
+    def _invalidate_index(self) -> None:
+        """Drops the entry index, so that the next lookup rebuilds it."""
+        self._index = None
+
+    def _entry_list(self, entry_type: type[EntryT], value: Iterable[EntryT | dict]) -> list[EntryT]:
+        """Validates an assigned entry list into the Kitfile's storage mode."""
+        if self._compact:
+            return CompactEntries(entry_type, value)  # type: ignore[return-value]
+        return _EntryList(_validate_entries(entry_type, list(value)))
+
+    @property
+    def is_compact(self) -> bool:
+        """Whether entry lists are stored compactly; see `compact`."""
+        return self._compact
+
+    def compact(self) -> "PydanticKitfile":
+        """
+        Switch the Kitfile to compact storage: model parts, code, datasets,
+        docs and prompts are kept as CompactEntries, which store each field
+        in a column and build entry models only when entries are read. This
+        takes a fraction of the memory of one Pydantic model per entry, at
+        the cost of building an entry on each read. Lists assigned later are
+        stored compactly too.
+
+        Entries read from a compact Kitfile are copies: to change one,
+        assign it back into its list rather than setting its attributes.
+
+        Returns:
+            PydanticKitfile: The Kitfile itself.
+
+        Examples:
+            >>> kitfile = Kitfile.from_data("path/to/Kitfile").compact()
+            >>> kitfile.datasets[0].path
+            'data/train.csv'
+        """
+        self._compact = True
+        self.prop_model.parts = self._entry_list(ModelPart, self.prop_model.parts)
+        self.prop_code = self._entry_list(CodeEntry, self.prop_code)
+        self.prop_datasets = self._entry_list(DatasetEntry, self.prop_datasets)
+        self.prop_docs = self._entry_list(DocsEntry, self.prop_docs)
+        self.prop_prompts = self._entry_list(PromptEntry, self.prop_prompts)
+        return self
+
+    def _entry_lists(self) -> Tuple[Tuple[str, list], ...]:
+        """Returns the entry lists with their section names, in Kitfile order."""
+        return (
+            ("parts", self.prop_model.parts),
+            ("code", self.prop_code),
+            ("datasets", self.prop_datasets),
+            ("docs", self.prop_docs),
+            ("prompts", self.prop_prompts),
+        )
+
+    def _iter_indexed(self) -> Iterator[Tuple[str, int, str | Path, Optional[str]]]:
+        """Yields the section, position, path and name of every entry that has a path."""
+        if self.prop_model.path:
+            yield "model", -1, self.prop_model.path, self.prop_model.name
+        for section, entries in self._entry_lists():
+            paths = _entry_values(entries, "path")
+            names = _entry_values(entries, "name")
+            for position, (path, name) in enumerate(zip(paths, names)):
+                yield section, position, path, name
+
+    def _indexed_entry(self, location: Tuple[str, int]) -> IndexedEntry:
+        """Returns the entry at a section and position recorded by the index."""
+        section, position = location
+        if section == "model":
+            return IndexedEntry(section, self.prop_model)
+        return IndexedEntry(section, dict(self._entry_lists())[section][position])
+
+    def _entry_index(self) -> _EntryIndex:
+        """
+        Returns the entry index, rebuilding it if a section was replaced, an
+        entry list was changed or an entry's path or name was set since it
+        was built.
+        """
+        model, code, datasets, docs, prompts = (
+            self.prop_model, self.prop_code, self.prop_datasets, self.prop_docs, self.prop_prompts
+        )
+        signature = (
+            _entry_version[0], id(model), id(model.parts), len(model.parts), id(code), len(code),
+            id(datasets), len(datasets), id(docs), len(docs), id(prompts), len(prompts),
+        )
+        # read through __pydantic_private__: attribute access to private
+        # attributes goes through BaseModel.__getattr__, which costs more
+        # than the lookup itself.
+        private = self.__pydantic_private__
+        index = private["_index"]
+        if index is None or index.signature != signature:
+            index = private["_index"] = _EntryIndex(self._iter_indexed(), signature)
+        return index
+
+    def find_by_path(self, path: str | Path) -> Optional[IndexedEntry]:
+        """
+        Find the entry with exactly this path, in constant time.
+
+        Args:
+            path (str | Path): The entry path, relative to the ModelKit's root.
+
+        Returns:
+            Optional[IndexedEntry]: The section and entry, or None. If several
+                sections list the path, the first one in Kitfile order.
+
+        Examples:
+            >>> kitfile.find_by_path("data/train.csv")
+            IndexedEntry(section='datasets', entry=DatasetEntry(path='data/train.csv', ...))
+        """
+        matches = self._entry_index().by_path.get(normalize_entry_path(path))
+        return self._indexed_entry(matches[0]) if matches else None
+
+    def find_containing(self, path: str | Path) -> Optional[IndexedEntry]:
+        """
+        Find the entry a file belongs to: the entry with this exact path or,
+        failing that, the one for its closest parent directory. The cost
+        depends on the depth of the path, not on the number of entries.
+
+        Args:
+            path (str | Path): The file path, relative to the ModelKit's root.
+
+        Returns:
+            Optional[IndexedEntry]: The section and entry, or None if no
+                entry covers the path.
+
+        Examples:
+            >>> kitfile.find_containing("model/weights/shard-1.bin")
+            IndexedEntry(section='model', entry=ModelSection(path='model', ...))
+        """
+        by_path = self._entry_index().by_path
+        current = PurePosixPath(normalize_entry_path(path))
+        for candidate in (current, *current.parents):
+            matches = by_path.get(candidate.as_posix())
+            if matches and candidate.as_posix() != ".":
+                return self._indexed_entry(matches[0])
+        return None
+
+    def find_by_name(self, name: str) -> List[IndexedEntry]:
+        """
+        Find the named entries (the model, model parts and datasets) with
+        this name, in constant time.
+
+        Args:
+            name (str): The entry name.
+
+        Returns:
+            List[IndexedEntry]: The matching entries, in Kitfile order.
+        """
+        return [self._indexed_entry(location) for location in self._entry_index().by_name.get(name, [])]
+
+    def entries_under(self, directory: str | Path) -> List[IndexedEntry]:
+        """
+        List the entries whose paths are inside a directory, in path order,
+        using a binary search over the sorted entry paths.
+
+        Args:
+            directory (str | Path): The directory, relative to the ModelKit's root.
+
+        Returns:
+            List[IndexedEntry]: The entries under the directory, excluding an
+                entry for the directory itself.
+        """
+        index = self._entry_index()
+        prefix = normalize_entry_path(directory)
+        prefix = f"{prefix}/" if prefix else ""
+        entries: List[IndexedEntry] = []
+        for path in index.sorted_paths[bisect_left(index.sorted_paths, prefix) :]:
+            if not path.startswith(prefix):
+                break
+            if path != prefix:
+                entries.extend(self._indexed_entry(location) for location in index.by_path[path])
+        return entries
+
+    def section_of(self, path: str | Path) -> Optional[str]:
+        """
+        Return the section of the entry with this exact path.
+
+        Args:
+            path (str | Path): The entry path.
+
+        Returns:
+            Optional[str]: The section name, or None if no entry has the path.
+        """
+        found = self.find_by_path(path)
+        return found.section if found else None
 
     @computed_field(repr=True)
     @property
@@ -206,55 +667,57 @@ class PydanticKitfile(BaseModel):
 
     @computed_field(repr=True)
     @property
-    def code(self) -> list[CodeEntry]:
+    def code(self) -> Annotated[list[CodeEntry], _EntryListSerializer]:
         """Information about the source code."""
         return self.prop_code
 
     @code.setter
     def code(self, value: list[CodeEntry] | list[dict]) -> None:
-        if isinstance(value, list):
-            self.prop_code = [CodeEntry.model_validate(item) if isinstance(item, dict) else item for item in value]
+        if isinstance(value, (list, CompactEntries)):
+            self.prop_code = self._entry_list(CodeEntry, value)
+            self._invalidate_index()
         else:
             raise TypeError(f"Expected list of CodeEntry or dict, got {type(value)}")
 
     @computed_field(repr=True)
     @property
-    def datasets(self) -> list[DatasetEntry]:
+    def datasets(self) -> Annotated[list[DatasetEntry], _EntryListSerializer]:
         """Information about the datasets used."""
         return self.prop_datasets
 
     @datasets.setter
     def datasets(self, value: list[DatasetEntry] | list[dict]) -> None:
-        if isinstance(value, list):
-            self.prop_datasets = [
-                DatasetEntry.model_validate(item) if isinstance(item, dict) else item for item in value
-            ]
+        if isinstance(value, (list, CompactEntries)):
+            self.prop_datasets = self._entry_list(DatasetEntry, value)
+            self._invalidate_index()
         else:
             raise TypeError(f"Expected list of DatasetEntry or dict, got {type(value)}")
 
     @computed_field(repr=True)
     @property
-    def docs(self) -> list[DocsEntry]:
+    def docs(self) -> Annotated[list[DocsEntry], _EntryListSerializer]:
         """Information about included documentation for the model."""
         return self.prop_docs
 
     @docs.setter
     def docs(self, value: list[DocsEntry] | list[dict]) -> None:
-        if isinstance(value, list):
-            self.prop_docs = [DocsEntry.model_validate(item) if isinstance(item, dict) else item for item in value]
+        if isinstance(value, (list, CompactEntries)):
+            self.prop_docs = self._entry_list(DocsEntry, value)
+            self._invalidate_index()
         else:
             raise TypeError(f"Expected list of DocsEntry or dict, got {type(value)}")
 
     @computed_field(repr=True)
     @property
-    def prompts(self) -> list[PromptEntry]:
+    def prompts(self) -> Annotated[list[PromptEntry], _EntryListSerializer]:
         """Information about the prompts used."""
         return self.prop_prompts
 
     @prompts.setter
     def prompts(self, value: list[PromptEntry] | list[dict]) -> None:
-        if isinstance(value, list):
-            self.prop_prompts = [PromptEntry.model_validate(item) if isinstance(item, dict) else item for item in value]
+        if isinstance(value, (list, CompactEntries)):
+            self.prop_prompts = self._entry_list(PromptEntry, value)
+            self._invalidate_index()
         else:
             raise TypeError(f"Expected list of PromptEntry or dict, got {type(value)}")
 
@@ -267,6 +730,10 @@ class PydanticKitfile(BaseModel):
     @model.setter
     def model(self, value: ModelSection | dict) -> None:
         if isinstance(value, (dict, ModelSection)):
-            self.prop_model = ModelSection.model_validate(value)
+            model = ModelSection.model_validate(value)
+            if self._compact:
+                model.parts = self._entry_list(ModelPart, model.parts)
+            self.prop_model = model
+            self._invalidate_index()
         else:
             raise TypeError(f"Expected dict or ModelSection, got {type(value)}")
@@ -0,0 +1,326 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Where `UserCredentials` finds a username and password when none are given.
+
+Credentials are resolved through a chain of providers, each returning
+whatever values it has. Each value is taken from the first provider that
+has it. By default a `.env` file, found from the current directory
+upwards, comes first, then the JOZU_USERNAME, JOZU_PASSWORD,
+JOZU_REGISTRY and JOZU_NAMESPACE environment variables. Other providers
+read a JSON file, the Docker CLI's config.json, or call a function. Use
+`set_credential_providers()` to change the chain.
+
+Files are parsed once and cached for the whole process. A cached file is
+parsed again only when its modification time or size changes.
+"""
+
+import base64
+import binascii
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+FIELDS = ("username", "password", "registry", "namespace")
+ENVIRONMENT_VARIABLES = {
+    "username": "JOZU_USERNAME",
+    "password": "JOZU_PASSWORD",
+    "registry": "JOZU_REGISTRY",
+    "namespace": "JOZU_NAMESPACE",
+}
+
+Credentials = Dict[str, Optional[str]]
+
+_file_cache: Dict[Tuple[str, Callable[[str], Any]], Tuple[Tuple[int, int], Any]] = {}
+_file_cache_lock = threading.Lock()
+
+
+def _read_cached(path: str, parse: Callable[[str], Any]) -> Any:
+    """
+    Returns parse(path), reusing the previous result while the file's
+    modification time and size are unchanged, or None if it cannot be read.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _file_cache.get((path, parse))
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    try:
+        value = parse(path)
+    except (OSError, ValueError):
+        return None
+    with _file_cache_lock:
+        _file_cache[(path, parse)] = (version, value)
+    return value
+
+
+def clear_credentials_cache() -> None:
+    """Forgets every cached credentials file, so that each is read again on next use."""
+    with _file_cache_lock:
+        _file_cache.clear()
+
+
+def _parse_dotenv(path: str) -> Dict[str, Optional[str]]:
+    # imported here so that dotenv is only loaded when a .env file is read.
+    from dotenv import dotenv_values  # noqa: PLC0415
+
+    return dict(dotenv_values(path))
+
+
+def _parse_json(path: str) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _from_variables(variables: Any) -> Credentials:
+    """Picks the JOZU_* variables out of a mapping."""
+    return {field: variables.get(name) or None for field, name in ENVIRONMENT_VARIABLES.items()}
+
+
+class CredentialProvider(ABC):
+    """Base class for the sources credentials are resolved from."""
+
+    @abstractmethod
+    def credentials(self) -> Optional[Credentials]:
+        """
+        Returns the credentials this provider has.
+
+        Returns:
+            Optional[Credentials]: A dictionary with any of the keys
+                "username", "password", "registry" and "namespace", or None
+                if the provider has nothing.
+        """
+
+
+class EnvironmentProvider(CredentialProvider):
+    """Reads the JOZU_USERNAME, JOZU_PASSWORD, JOZU_REGISTRY and JOZU_NAMESPACE environment variables."""
+
+    def credentials(self) -> Optional[Credentials]:
+        return _from_variables(os.environ)
+
+
+class DotEnvProvider(CredentialProvider):
+    """
+    Reads the JOZU_* variables from a `.env` file, without changing the
+    process environment.
+
+    Attributes:
+        path (Optional[Path]): The file, or None to use the first `.env`
+            found in the current directory or any of its parents.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        """
+        Initializes the DotEnvProvider.
+
+        Args:
+            path (str | Path | None): The file. Defaults to None, which
+                searches from the current directory upwards.
+        """
+        self.path = Path(path) if path is not None else None
+
+    def _find(self) -> Optional[str]:
+        if self.path is not None:
+            return str(self.path)
+        directory = os.getcwd()
+        while True:
+            candidate = os.path.join(directory, ".env")
+            if os.path.isfile(candidate):
+                return candidate
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    def credentials(self) -> Optional[Credentials]:
+        path = self._find()
+        variables = _read_cached(path, _parse_dotenv) if path is not None else None
+        return _from_variables(variables) if variables else None
+
+
+class FileProvider(CredentialProvider):
+    """
+    Reads credentials from a JSON file with "username", "password" and,
+    optionally, "registry" and "namespace" keys.
+
+    Attributes:
+        path (Path): The file.
+    """
+
+    def __init__(self, path: str | Path):
+        """
+        Initializes the FileProvider.
+
+        Args:
+            path (str | Path): The file.
+        """
+        self.path = Path(path)
+
+    def credentials(self) -> Optional[Credentials]:
+        data = _read_cached(str(self.path), _parse_json)
+        if not isinstance(data, dict):
+            return None
+        return {field: data.get(field) or None for field in FIELDS}
+
+
+def _registry_host(key: str) -> str:
+    """Reduces a Docker config "auths" key such as "https://index.docker.io/v1/" to its host."""
+    host = key.split("://", 1)[-1]
+    return host.split("/", 1)[0]
+
+
+class DockerConfigProvider(CredentialProvider):
+    """
+    Reads the credentials stored in the Docker CLI's config.json by
+    `docker login`. Only credentials stored in the file itself are used;
+    credential helpers ("credsStore", "credHelpers") are not run.
+
+    Attributes:
+        registry (Optional[str]): The registry to read the credentials of,
+            or None for the first one in the file.
+        path (Optional[Path]): The config file, or None for config.json in
+            $DOCKER_CONFIG or ~/.docker.
+    """
+
+    def __init__(self, registry: Optional[str] = None, path: str | Path | None = None):
+        """
+        Initializes the DockerConfigProvider.
+
+        Args:
+            registry (Optional[str]): The registry. Defaults to None, which
+                uses the first registry in the file.
+            path (str | Path | None): The config file. Defaults to None.
+        """
+        self.registry = registry
+        self.path = Path(path) if path is not None else None
+
+    def credentials(self) -> Optional[Credentials]:
+        path = self.path
+        if path is None:
+            path = Path(os.environ.get("DOCKER_CONFIG") or Path.home() / ".docker") / "config.json"
+        config = _read_cached(str(path), _parse_json)
+        auths = config.get("auths") if isinstance(config, dict) else None
+        if not isinstance(auths, dict):
+            return None
+        for key, entry in auths.items():
+            registry = _registry_host(key)
+            if (self.registry is not None and registry != self.registry) or not isinstance(entry, dict):
+                continue
+            username, password = entry.get("username"), entry.get("password")
+            if entry.get("auth"):
+                try:
+                    username, _, password = base64.b64decode(entry["auth"]).decode().partition(":")
+                except (binascii.Error, UnicodeDecodeError):
+                    continue
+            if username and password:
+                return {"username": username, "password": password, "registry": registry, "namespace": None}
+        return None
+
+
+class CallableProvider(CredentialProvider):
+    """
+    Calls a function for credentials, e.g. to read them from a secrets
+    manager. The function is called on every resolution; cache its result
+    if that is expensive.
+
+    Examples:
+        >>> set_credential_providers([CallableProvider(lambda: {"username": "me", "password": vault.read()})])
+    """
+
+    def __init__(self, function: Callable[[], Optional[Credentials]]):
+        """
+        Initializes the CallableProvider.
+
+        Args:
+            function (Callable[[], Optional[Credentials]]): Returns the
+                credentials, or None.
+        """
+        self.function = function
+
+    def credentials(self) -> Optional[Credentials]:
+        return self.function()
+
+
+_settings: Dict[str, Optional[Tuple[CredentialProvider, ...]]] = {"providers": None}
+
+
+def get_credential_providers() -> Tuple[CredentialProvider, ...]:
+    """
+    Gets the providers credentials are resolved through.
+
+    Returns:
+        Tuple[CredentialProvider, ...]: The providers set with
+            `set_credential_providers`, or a DotEnvProvider followed by an
+            EnvironmentProvider.
+    """
+    return _settings["providers"] or (DotEnvProvider(), EnvironmentProvider())
+
+
+def set_credential_providers(providers: Optional[Sequence[CredentialProvider]]) -> None:
+    """
+    Sets the providers credentials are resolved through, in order.
+
+    Args:
+        providers (Optional[Sequence[CredentialProvider]]): The providers,
+            or None to use the default chain again.
+
+    Examples:
+        >>> set_credential_providers([EnvironmentProvider(), DockerConfigProvider("jozu.ml")])
+    """
+    _settings["providers"] = tuple(providers) if providers is not None else None
+
+
+def resolve_credentials(providers: Optional[Sequence[CredentialProvider]] = None) -> Credentials:
+    """
+    Resolves credentials through a chain of providers. Each value is taken
+    from the first provider that has it; the chain stops once all are found.
+
+    Args:
+        providers (Optional[Sequence[CredentialProvider]]): The providers.
+            Defaults to None, which uses `get_credential_providers()`.
+
+    Returns:
+        Credentials: The "username", "password", "registry" and
+            "namespace"; the last two may be None.
+
+    Raises:
+        ValueError: If no provider has a username or a password.
+    """
+    resolved: Credentials = dict.fromkeys(FIELDS)
+    for provider in providers if providers is not None else get_credential_providers():
+        found = provider.credentials()
+        if not found:
+            continue
+        for field in FIELDS:
+            if resolved[field] is None and found.get(field):
+                resolved[field] = found[field]
+        if all(resolved.values()):
+            break
+    if not resolved["username"] or not resolved["password"]:
+        raise ValueError(
+            "Missing JOZU_USERNAME or JOZU_PASSWORD in "
+            + "environment variables. Both are required. "
+            + "Please set these variables in your .env "
+            + "file and try again."
+        )
+    return resolved
@@ -18,14 +18,38 @@
 Define the Kitfile class to manage KitOps ModelKits and Kitfiles.
 """
 
+import os
+import stat
+import uuid
 from pathlib import Path
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
 from warnings import warn
 
 import yaml
 
-from ._pydantic_kit import PydanticKitfile
+from ._pydantic_kit import (
+    BasePathModel,
+    CodeEntry,
+    CompactEntries,
+    DatasetEntry,
+    DocsEntry,
+    ModelPart,
+    PromptEntry,
+    PydanticKitfile,
+)
+from .scanner import DEFAULT_COLLAPSE_THRESHOLD, kitfile_data, scan_directory
+from .serialization import dump_yaml, iter_sequence_items, load_yaml
 from .utils import IS_A_TTY, Color
 
+# the key path and entry type of each entry list section.
+_ENTRY_SECTIONS: Dict[str, Tuple[Tuple[str, ...], type[BasePathModel]]] = {
+    "parts": (("model", "parts"), ModelPart),
+    "code": (("code",), CodeEntry),
+    "datasets": (("datasets",), DatasetEntry),
+    "docs": (("docs",), DocsEntry),
+    "prompts": (("prompts",), PromptEntry),
+}
+
 
 class Kitfile(PydanticKitfile):
     """
@@ -118,6 +142,143 @@ class Kitfile(PydanticKitfile):
             case (True, True):
                 raise ValueError("Only provide 'path' or keyword arguments, not both.")
 
+    @classmethod
+    def from_data(cls, source: Dict[str, Any] | str | Path, compact: bool = False) -> "Kitfile":
+        """
+        Build a Kitfile from a dictionary or a Kitfile path.
+
+        The data is fully validated, exactly as `Kitfile()` validates it,
+        so invalid data is rejected and nothing is skipped. It is only
+        faster because the whole dictionary is validated in a single
+        `model_validate` pass, without the keyword-argument handling of
+        `Kitfile()`.
+
+        Args:
+            source (Dict[str, Any] | str | Path): The Kitfile data, or the
+                path of a Kitfile to load.
+            compact (bool): Whether to store the entry lists compactly; see
+                `compact()`. The entries are then packed as they are
+                validated, so a model is never built for every entry at
+                once. Defaults to False.
+
+        Returns:
+            Kitfile: The Kitfile.
+
+        Examples:
+            >>> kitfile = Kitfile.from_data("path/to/Kitfile")
+            >>> kitfile = Kitfile.from_data({"manifestVersion": "1.0", "package": {"name": "demo"}})
+        """
+        data = source if isinstance(source, dict) else load_yaml(Path(source).read_text(encoding="utf-8"))
+        if not compact:
+            return cls.model_validate(data)
+
+        data = dict(data)
+        sections = {name: data.pop(name) for name in ("code", "datasets", "docs", "prompts") if name in data}
+        parts = None
+        if isinstance(data.get("model"), dict):
+            data["model"] = dict(data["model"])
+            parts = data["model"].pop("parts", None)
+        kitfile = cls.model_validate(data).compact()
+        for name, entries in sections.items():
+            setattr(kitfile, name, entries)
+        if parts is not None:
+            kitfile.model.parts = CompactEntries(ModelPart, parts)
+        return kitfile
+
+    @classmethod
+    def from_directory(  # noqa: PLR0913
+        cls,
+        directory: str | Path,
+        *,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        author: Optional[str] = None,
+        extension_rules: Optional[Mapping[str, str]] = None,
+        name_rules: Optional[Mapping[str, str]] = None,
+        collapse_threshold: int = DEFAULT_COLLAPSE_THRESHOLD,
+        max_workers: Optional[int] = None,
+    ) -> "Kitfile":
+        """
+        Generate a Kitfile for the contents of a directory, without the
+        `kit` CLI.
+
+        The tree is listed with `os.scandir` in a thread pool and each file
+        is classified into a section by its name or extension (see
+        `kitops.modelkit.scanner`). A subdirectory whose files all belong to
+        one section becomes a single entry, and the largest model entry
+        becomes the model, with any others as its parts. Unlike
+        `kit.init`, the Kitfile is returned but not written; call `save`
+        to write it.
+
+        Args:
+            directory (str | Path): The directory to examine.
+            name (Optional[str]): The package and model name. Defaults to
+                None, which uses the directory's name.
+            description (Optional[str]): The package description. Defaults to None.
+            author (Optional[str]): The package author. Defaults to None.
+            extension_rules (Optional[Mapping[str, str]]): Extra extension to
+                section rules, e.g. {"vec": "datasets"}. Defaults to None.
+            name_rules (Optional[Mapping[str, str]]): Extra file name to
+                section rules, e.g. {"system_prompt": "prompts"}. Defaults to None.
+            collapse_threshold (int): The fewest files a homogeneous
+                directory must hold to become one entry. Defaults to 2.
+            max_workers (Optional[int]): The number of directories listed
+                at once. Defaults to None.
+
+        Returns:
+            Kitfile: The generated Kitfile.
+
+        Raises:
+            NotADirectoryError: If directory is not a directory.
+
+        Examples:
+            >>> kitfile = Kitfile.from_directory("llama", author="Jozu")
+            >>> kitfile.save("llama/Kitfile", print=False)
+            True
+        """
+        entries = scan_directory(
+            directory,
+            extension_rules=extension_rules,
+            name_rules=name_rules,
+            collapse_threshold=collapse_threshold,
+            max_workers=max_workers,
+        )
+        name = name or Path(directory).resolve().name
+        return cls.from_data(kitfile_data(entries, name, description=description, author=author))
+
+    @staticmethod
+    def iter_entries(path: str | Path, section: str = "datasets") -> Iterator[BasePathModel]:
+        """
+        Stream the entries of one section of a Kitfile, validating them one
+        at a time.
+
+        The Kitfile is parsed as a stream of YAML events rather than loaded
+        whole: other sections are skipped without being built, and only one
+        entry is held at a time. Manifests with very large entry lists can
+        therefore be scanned and filtered in constant memory.
+
+        Args:
+            path (str | Path): Path to the Kitfile.
+            section (str): "parts" (the model parts), "code", "datasets",
+                "docs" or "prompts". Defaults to "datasets".
+
+        Returns:
+            Iterator[BasePathModel]: The entries, e.g. DatasetEntry for
+                "datasets".
+
+        Raises:
+            ValueError: If the section is not an entry list section.
+            ValidationError: If an entry is not valid.
+
+        Examples:
+            >>> large = [entry.path for entry in Kitfile.iter_entries("Kitfile", "datasets")
+            ...          if entry.name.startswith("train")]
+        """
+        if section not in _ENTRY_SECTIONS:
+            raise ValueError(f"Invalid section '{section}'. Must be one of {', '.join(_ENTRY_SECTIONS)}.")
+        keys, entry_type = _ENTRY_SECTIONS[section]
+        return _stream_entries(Path(path), keys, entry_type)
+
     def load(self, path: str | Path) -> dict:
         """
         Load Kitfile data from a yaml-formatted file and set the
@@ -132,7 +293,7 @@ class Kitfile(PydanticKitfile):
 
         # try to load the kitfile
         try:
-            data = yaml.safe_load(kitfile_path.read_text(encoding="utf-8"))
+            data = load_yaml(kitfile_path.read_text(encoding="utf-8"))
 
         except yaml.YAMLError as e:
             if mark := getattr(e, "problem_mark", None):
@@ -153,11 +314,7 @@ class Kitfile(PydanticKitfile):
         Returns:
             str: YAML representation of the Kitfile.
         """
-        return yaml.safe_dump(
-            data=self.model_dump(exclude_unset=suppress_empty_values, exclude_none=suppress_empty_values),
-            sort_keys=False,
-            default_flow_style=False,
-        )
+        return dump_yaml(self.model_dump(exclude_unset=suppress_empty_values, exclude_none=suppress_empty_values))
 
     def print(self) -> None:
         """
@@ -179,23 +336,39 @@ class Kitfile(PydanticKitfile):
             output = f"{Color.GREEN.value}{output}{Color.RESET.value}"
         print(output)
 
-    def save(self, path: str = "Kitfile", print: bool = True) -> None:
+    def save(self, path: str = "Kitfile", print: bool = True) -> bool:
         """
         Save the Kitfile to a file.
 
+        The file is only written if its content would change, so saving an
+        unmodified Kitfile does not touch the disk or wake file watchers.
+        Writes are atomic: the YAML goes to a temporary file in the same
+        directory, which then replaces the Kitfile. If the Kitfile is a
+        symlink, the file it points to is written.
+
         Args:
             path (str): Path to save the Kitfile. Defaults to "Kitfile".
             print (bool): If True, print the Kitfile to the console.
                 Defaults to True.
 
         Returns:
-            None
+            bool: True if the file was written, False if it already held
+                this Kitfile.
 
         Examples:
             >>> kitfile = Kitfile()
             >>> kitfile.save("path/to/Kitfile")
+            True
         """
-        Path(path).write_text(self.to_yaml(), encoding="utf-8")
+        content = self.to_yaml().encode("utf-8")
+        # a symlinked Kitfile is written through, not replaced by a regular file.
+        target = Path(os.path.realpath(path))
+        try:
+            written = target.read_bytes() != content
+        except FileNotFoundError:
+            written = True
+        if written:
+            _write_atomically(target, content)
 
         if print:
             warn(
@@ -205,3 +378,29 @@ class Kitfile(PydanticKitfile):
                 stacklevel=2,
             )
             self.print()
+        return written
+
+
+def _stream_entries(path: Path, keys: Tuple[str, ...], entry_type: type[BasePathModel]) -> Iterator[BasePathModel]:
+    """Validates the items of one sequence of a Kitfile as they are parsed."""
+    with open(path, encoding="utf-8") as stream:
+        for item in iter_sequence_items(stream, keys):
+            yield entry_type.model_validate(item)
+
+
+def _write_atomically(path: Path, content: bytes) -> None:
+    """Writes a file through a temporary file and a rename, keeping the mode of the file it replaces."""
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    # 0o666 lets the umask decide the mode of new files, as for open().
+    fd = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if path.exists():
+            os.chmod(temporary, stat.S_IMODE(path.stat().st_mode))
+        os.replace(temporary, path)
+    except BaseException:
+        temporary.unlink(missing_ok=True)
+        raise
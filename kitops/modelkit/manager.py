@@ -16,16 +16,75 @@ limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
+import contextvars
 import os
-from typing import Any, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from logging import getLogger
+from typing import Any, Dict, Iterable, Iterator, Optional
 
 from kitops.cli import kit
+from kitops.cli.cache import ResultCache
+from kitops.cli.instrumentation import traced
+from kitops.oci import BlobStore, LazyModelKit, RegistryClient, pull_modelkit, push_modelkit
 
 from .kitfile import Kitfile
-from .reference import ModelKitReference
+from .reference import ModelKitReference, Reference
+from .session import RegistrySession
 from .user import UserCredentials
 from .utils import get_or_create_directory
 
+LOG = getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PullResult:
+    """
+    The outcome of pulling and unpacking one ModelKit with
+    `ModelKitManager.pull_many`.
+
+    Attributes:
+        modelkit_tag (str): The ModelKit that was requested.
+        directory (str): The directory the ModelKit was unpacked into.
+        error (Optional[Exception]): The error raised while logging in,
+            pulling or unpacking, or None if the ModelKit was unpacked.
+    """
+
+    modelkit_tag: str
+    directory: str
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        """True if the ModelKit was pulled and unpacked without error."""
+        return self.error is None
+
+
+def _span_reference(manager: "ModelKitManager", *args, **kwargs) -> Optional[str]:
+    """Returns the manager's modelkit tag for an operation's span, if the reference is complete."""
+    try:
+        return manager.modelkit_reference.modelkit_tag
+    except ValueError:
+        return None
+
+
+def _as_reference(reference: str | ModelKitReference | Reference) -> Reference:
+    """Returns any form of ModelKit reference as a Reference."""
+    if isinstance(reference, Reference):
+        return reference
+    if isinstance(reference, ModelKitReference):
+        return reference.freeze()
+    return Reference.parse(reference)
+
+
+def _version_directory(reference: ModelKitReference) -> str:
+    """Returns the directory name `pull_many` unpacks a ModelKit version into: its tag, digest, or both."""
+    if reference.digest is None:
+        return reference.tag
+    digest = reference.digest.replace(":", "-")
+    return f"{reference.tag}@{digest}" if reference.tag else digest
+
 
 class ModelKitManager:
     """
@@ -95,6 +154,9 @@ class ModelKitManager:
             self.modelkit_reference = ModelKitReference(modelkit_tag)
 
         self.kitfile = None
+        self._session: Optional[RegistrySession] = None
+        self._registry_client: Optional[RegistryClient] = None
+        self._blob_store: Optional[BlobStore] = None
 
     @property
     def working_directory(self) -> str:
@@ -176,6 +238,162 @@ class ModelKitManager:
         """
         self._kitfile = value
 
+    @property
+    def registry_client(self) -> RegistryClient:
+        """
+        Gets the client used for native (kit-free) registry operations.
+
+        Unless one has been set, a client for the ModelKit's registry is
+        created from the user credentials on first use and reused so its
+        pooled connections stay warm.
+
+        Returns:
+            RegistryClient: The registry client.
+        """
+        registry = self.modelkit_reference.registry
+        if self._registry_client is None or self._registry_client.registry != registry:
+            if not registry:
+                raise ValueError("Registry must be set to a non-empty string.")
+            self._registry_client = RegistryClient(
+                registry,
+                username=self.user_credentials.username,
+                password=self.user_credentials.password,
+            )
+        return self._registry_client
+
+    @registry_client.setter
+    def registry_client(self, value: Optional[RegistryClient]) -> None:
+        """
+        Sets the client used for native registry operations.
+
+        Args:
+            value (Optional[RegistryClient]): The client, or None to create
+                one from the user credentials on next use.
+        """
+        self._registry_client = value
+
+    @property
+    def blob_store(self) -> Optional[BlobStore]:
+        """
+        Gets the shared layer store used by native pulls.
+
+        Returns:
+            Optional[BlobStore]: The store, or None if native pulls unpack
+                straight into the working directory.
+        """
+        return self._blob_store
+
+    @blob_store.setter
+    def blob_store(self, value: Optional[BlobStore]) -> None:
+        """
+        Sets the shared layer store used by native pulls. Managers sharing
+        a store unpack each layer once and link its files into their
+        working directories.
+
+        Args:
+            value (Optional[BlobStore]): The store, or None to disable it.
+        """
+        self._blob_store = value
+
+    @property
+    def _repository(self) -> str:
+        """The ModelKit's repository path within its registry."""
+        return f"{self.modelkit_reference.namespace}/{self.modelkit_reference.repository}"
+
+    @property
+    def _manifest_reference(self) -> str:
+        """The digest the ModelKit is pinned to, or else its tag, as the registry API takes it."""
+        reference = self.modelkit_reference.digest or self.modelkit_reference.tag
+        if not reference:
+            raise ValueError("tag must be set to a non-empty string.")
+        return reference
+
+    @property
+    def _push_tag(self) -> str:
+        """The ModelKit's tag, which pushing requires even when the reference is pinned to a digest."""
+        if not self.modelkit_reference.tag:
+            raise ValueError("A tag is required to pack and push a ModelKit.")
+        return self.modelkit_reference.tag
+
+    @property
+    def active_session(self) -> Optional[RegistrySession]:
+        """
+        Gets the RegistrySession the manager is currently using, if any.
+
+        Returns:
+            Optional[RegistrySession]: The active session, or None.
+        """
+        return self._session
+
+    @contextmanager
+    def session(self, session: Optional[RegistrySession] = None) -> Iterator[RegistrySession]:
+        """
+        Reuses registry logins across every operation performed inside
+        the `with` block.
+
+        While the session is active, operations that would log in and out
+        of a registry instead log in through the session the first time
+        the registry is needed and stay logged in. If no session is given,
+        a new one is created and closed (logging out of every registry
+        once) when the block exits. A given session is left open so it can
+        be shared with other managers and closed by its owner.
+
+        Args:
+            session (Optional[RegistrySession]): The session to use.
+                Defaults to None, which creates a new session.
+
+        Returns:
+            Iterator[RegistrySession]: The active session.
+
+        Examples:
+            >>> manager = ModelKitManager(modelkit_tag="jozu.ml/brett/titanic-survivability:latest")
+            >>> with manager.session():
+            ...     manager.pull_and_unpack_modelkit()
+            ...     manager.modelkit_reference.tag = "v2"
+            ...     manager.pack_and_push_modelkit()
+        """
+        if session is None and self._session is not None:
+            # nested use of the same manager keeps the outer session.
+            yield self._session
+            return
+
+        owned = session is None
+        active = session if session is not None else RegistrySession()
+        previous = self._session
+        self._session = active
+        try:
+            yield active
+        finally:
+            self._session = previous
+            if owned:
+                active.close()
+
+    def _login_for_operation(self, with_login_and_logout: Optional[bool]) -> bool:
+        """
+        Logs in to the ModelKit's registry ahead of an operation.
+
+        Args:
+            with_login_and_logout (Optional[bool]): Whether the operation
+                should be authenticated at all.
+
+        Returns:
+            bool: True if the caller is responsible for logging out
+                afterwards; False if no login happened or the login is
+                owned by the active session.
+        """
+        if not with_login_and_logout:
+            return False
+        if self._session is not None:
+            self._session.login(self.modelkit_reference.registry, self.user_credentials)
+            return False
+        kit.login(
+            user=self.user_credentials.username,
+            passwd=self.user_credentials.password,
+            registry=self.modelkit_reference.registry,
+        )
+        return True
+
+    @traced(reference=_span_reference)
     def login(self) -> None:
         """
         Logs in to the registry using the user credentials.
@@ -189,23 +407,32 @@ class ModelKitManager:
             registry=self.modelkit_reference.registry,
         )
 
-    def inspect_modelkit(self, remote: Optional[bool] = False) -> Dict[str, Any]:
+    @traced(reference=_span_reference)
+    def inspect_modelkit(
+        self, remote: Optional[bool] = False, cache: Optional[ResultCache] = None
+    ) -> Dict[str, Any]:
         """
         Inspects the ModelKit and returns the inspection results as a dictionary.
 
         Parameters:
         remote (Optional[bool]): Flag to indicate if the inspection should be done remotely. Defaults to False.
+        cache (Optional[ResultCache]): A cache to answer from and store the
+            result in. Defaults to None, which always runs `kit inspect`.
 
         Returns:
             Dict[str, Any]: The inspection results.
         """
-        return kit.inspect(self.modelkit_reference.modelkit_tag, remote)
+        return kit.inspect(self.modelkit_reference.modelkit_tag, remote, cache=cache)
 
-    def pull_and_unpack_modelkit(
+    @traced(reference=_span_reference)
+    def pull_and_unpack_modelkit(  # noqa: PLR0913
         self,
         load_kitfile: bool = False,
         filters: Optional[list[str]] = None,
         with_login_and_logout: Optional[bool] = True,
+        native: bool = False,
+        *,
+        stream: bool = False,
     ) -> None:
         """
         Unpacks the ModelKit into the working directory.
@@ -219,35 +446,337 @@ class ModelKitManager:
             load_kitfile (bool): If True, the Kitfile will be loaded
                 from the working directory afer the ModelKit has been
                 unpacked. Defaults to False.
+            native (bool): If True, download and unpack the ModelKit with
+                `registry_client` instead of spawning `kit`. The ModelKit is
+                not added to kit's local storage; layers go through
+                `blob_store` if one is set. Defaults to False.
+            stream (bool): If True, with `native`, extract each layer while
+                it downloads instead of staging it on disk first. Streamed
+                pulls cannot be resumed. Defaults to False.
 
         Returns:
             None
         """
-        if with_login_and_logout:
-            kit.login(
-                user=self.user_credentials.username,
-                passwd=self.user_credentials.password,
-                registry=self.modelkit_reference.registry,
+        if native:
+            pull_modelkit(
+                self.registry_client,
+                self._repository,
+                self._manifest_reference,
+                self.working_directory,
+                filters=filters,
+                store=self.blob_store,
+                stream=stream,
             )
-
-        if not filters:
-            # If no filters are provided, go ahead and issue a pull request
-            # before unpacking; otherwise, issue the unpack request only.
-            kit.pull(self.modelkit_reference.modelkit_tag)
-        kit.unpack(
-            self.modelkit_reference.modelkit_tag,
-            dir=self.working_directory,
-            filters=filters,
-        )
-        if with_login_and_logout:
-            kit.logout(registry=self.modelkit_reference.registry)
+        else:
+            logged_in = self._login_for_operation(with_login_and_logout)
+            self._pull_and_unpack(self.modelkit_reference.modelkit_tag, self.working_directory, filters)
+            if logged_in:
+                kit.logout(registry=self.modelkit_reference.registry)
 
         if load_kitfile:
             kitfile_path = self.working_directory + "/Kitfile"
             self.kitfile = Kitfile(kitfile_path)
 
+    @traced(reference=_span_reference)
+    def lazy_unpack_modelkit(self, load_kitfile: bool = False, filters: Optional[list[str]] = None) -> LazyModelKit:
+        """
+        Unpacks the ModelKit into the working directory lazily: the Kitfile
+        and a layer index are written immediately, and each Kitfile entry's
+        files are fetched with `registry_client` the first time they are
+        resolved or opened through the returned LazyModelKit.
+
+        Args:
+            load_kitfile (bool): If True, the Kitfile will be loaded
+                from the working directory. Defaults to False.
+            filters (Optional[list[str]]): The Kitfile parts that may be
+                fetched (e.g. ["model", "datasets"]). Defaults to None,
+                which allows every part.
+
+        Returns:
+            LazyModelKit: The handle used to resolve, open and prefetch files.
+
+        Examples:
+            >>> lazy = manager.lazy_unpack_modelkit(load_kitfile=True)
+            >>> lazy.prefetch()
+            >>> weights = lazy.resolve(manager.kitfile.model.path)
+        """
+        lazy = LazyModelKit.from_registry(
+            self.registry_client,
+            self._repository,
+            self._manifest_reference,
+            self.working_directory,
+            filters=filters,
+            store=self.blob_store,
+        )
+        if load_kitfile:
+            self.kitfile = Kitfile(self.working_directory + "/Kitfile")
+        return lazy
+
+    @traced(reference=_span_reference)
+    def resolve_digest(self) -> str:
+        """
+        Pins the ModelKit reference to the digest its tag currently points
+        to, so that later operations no longer look the tag up.
+
+        Returns:
+            str: The manifest digest.
+
+        Raises:
+            ValueError: If the reference is incomplete or the ModelKit
+                does not exist in the registry.
+            RegistryError: If the registry returns an unexpected status.
+        """
+        reference = self.modelkit_reference.freeze()
+        pinned = self.resolve_digests([reference])[str(reference)]
+        self.modelkit_reference.digest = pinned.digest
+        return pinned.digest  # type: ignore[return-value]
+
+    @traced()
+    def resolve_digests(
+        self,
+        references: Iterable[str | ModelKitReference | Reference],
+        max_workers: int = 8,
+    ) -> Dict[str, Reference]:
+        """
+        Resolves the tags of many ModelKits to the manifest digests they
+        currently point to, with one HEAD request per distinct tag.
+
+        Operations on the pinned references returned no longer look their
+        tags up: they fetch the manifest by digest, and `kit info` or `kit
+        inspect` results for them never expire from a ResultCache. Resolve
+        once, then reuse the returned references. References that are
+        already pinned are returned as they are.
+
+        Registries are queried with `registry_client` when it is for the
+        same registry, and otherwise with a client created from the user
+        credentials for the duration of the call.
+
+        Args:
+            references (Iterable[str | ModelKitReference | Reference]): The
+                ModelKits to resolve.
+            max_workers (int): The maximum number of tags resolved at once.
+                Defaults to 8.
+
+        Returns:
+            Dict[str, Reference]: The pinned reference for each distinct
+                reference given, as a string, in the order first given. The
+                pinned references keep their tags.
+
+        Raises:
+            ValueError: If a reference cannot be parsed, a ModelKit does not
+                exist, or max_workers is not a positive integer.
+            RegistryError: If a registry returns an unexpected status.
+
+        Examples:
+            >>> pinned = manager.resolve_digests([
+            ...     "jozu.ml/jozu-demos/titanic-survivability:latest",
+            ...     "jozu.ml/jozu-demos/titanic-survivability:v2",
+            ... ])
+            >>> results = manager.pull_many(pinned.values())
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+
+        unique: Dict[str, Reference] = {}
+        for reference in map(_as_reference, references):
+            unique.setdefault(str(reference), reference)
+
+        resolved = {key: reference for key, reference in unique.items() if reference.digest}
+        pending = {key: reference for key, reference in unique.items() if not reference.digest}
+        if not pending:
+            return {key: resolved[key] for key in unique}
+
+        clients: Dict[str, RegistryClient] = {}
+        owned = []
+        for registry in dict.fromkeys(reference.registry for reference in pending.values()):
+            if self._registry_client is not None and self._registry_client.registry == registry:
+                clients[registry] = self._registry_client
+            else:
+                clients[registry] = RegistryClient(
+                    registry,
+                    username=self.user_credentials.username,
+                    password=self.user_credentials.password,
+                )
+                owned.append(clients[registry])
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                digests = {
+                    key: executor.submit(
+                        clients[reference.registry].head_manifest,
+                        f"{reference.namespace}/{reference.repository}",
+                        reference.tag,
+                    )
+                    for key, reference in pending.items()
+                }
+                for key, digest in digests.items():
+                    found = digest.result()
+                    if found is None:
+                        raise ValueError(f"ModelKit not found: {key}")
+                    resolved[key] = pending[key].with_digest(found)
+        finally:
+            for client in owned:
+                client.close()
+        return {key: resolved[key] for key in unique}
+
+    @traced()
+    def pull_many(
+        self,
+        references: Iterable[str | ModelKitReference | Reference],
+        max_workers: int = 4,
+        filters: Optional[list[str]] = None,
+        with_login_and_logout: Optional[bool] = True,
+    ) -> Dict[str, PullResult]:
+        """
+        Pulls and unpacks many ModelKits in parallel.
+
+        Identical references are only pulled once. When logging in and out,
+        each registry is logged into once before any pulls start and logged
+        out of once after all of them finish. A failure for one ModelKit is
+        recorded in its result and does not stop the others.
+
+        Each ModelKit is unpacked into its own directory below the working
+        directory: {working_directory}/{registry}/{namespace}/{repository}/{tag}.
+        References pinned to a digest use the digest, with its ":" replaced
+        by "-", in place of the tag, or after the tag and an "@" if they
+        have both, so that `repo:v1` and `repo:v1@sha256:...` are unpacked
+        apart. Pull the references returned by `resolve_digests` to pull
+        exactly what was resolved.
+
+        Args:
+            references (Iterable[str | ModelKitReference | Reference]): The
+                ModelKits to pull, as modelkit tags, ModelKitReference or
+                Reference instances.
+            max_workers (int): The maximum number of ModelKits to pull and
+                unpack at once. Defaults to 4.
+            filters (Optional[list[str]]): The filters to apply when
+                unpacking each ModelKit. Defaults to None.
+            with_login_and_logout (Optional[bool]): If True, log in to and
+                out of every registry referenced. Inside `session()` the
+                registries are logged into through the session and stay
+                logged in. Defaults to True.
+
+        Returns:
+            Dict[str, PullResult]: The result for each distinct modelkit tag,
+                in the order the tags were first given.
+
+        Raises:
+            ValueError: If a reference cannot be parsed or max_workers is
+                not a positive integer.
+
+        Examples:
+            >>> manager = ModelKitManager(working_directory="temp/models")
+            >>> results = manager.pull_many([
+            ...     "jozu.ml/jozu-demos/titanic-survivability:latest",
+            ...     "jozu.ml/jozu-demos/titanic-survivability:v2",
+            ... ], max_workers=2)
+            >>> [tag for tag, result in results.items() if not result.ok]
+            []
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be a positive integer.")
+
+        unique: Dict[str, ModelKitReference] = {}
+        for reference in references:
+            parsed = reference if isinstance(reference, ModelKitReference) else ModelKitReference(reference)
+            unique.setdefault(parsed.modelkit_tag, parsed)
+
+        directories = {
+            modelkit_tag: os.path.join(
+                self.working_directory,
+                reference.registry,
+                reference.namespace,
+                reference.repository,
+                _version_directory(reference),
+            )
+            for modelkit_tag, reference in unique.items()
+        }
+
+        results: Dict[str, PullResult] = {}
+        login_errors: Dict[str, Exception] = {}
+        try:
+            if with_login_and_logout:
+                login_errors = self._login_to_registries(ref.registry for ref in unique.values())
+            for modelkit_tag, reference in unique.items():
+                if reference.registry in login_errors:
+                    error = login_errors[reference.registry]
+                    results[modelkit_tag] = PullResult(modelkit_tag, directories[modelkit_tag], error)
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    # each pull runs in a copy of this context, so its spans nest under this one.
+                    modelkit_tag: executor.submit(
+                        contextvars.copy_context().run, self._pull_and_unpack, modelkit_tag, directory, filters
+                    )
+                    for modelkit_tag, directory in directories.items()
+                    if modelkit_tag not in results
+                }
+                for modelkit_tag, future in futures.items():
+                    error = future.exception()
+                    if error is not None:
+                        LOG.error(f"Pulling {modelkit_tag} failed: {error}")
+                    results[modelkit_tag] = PullResult(modelkit_tag, directories[modelkit_tag], error)
+        finally:
+            if with_login_and_logout and self._session is None:
+                for registry in dict.fromkeys(ref.registry for ref in unique.values()):
+                    if registry in login_errors:
+                        continue
+                    try:
+                        kit.logout(registry=registry)
+                    except Exception as e:
+                        LOG.warning(f"Logout from {registry} failed: {e}")
+
+        return {modelkit_tag: results[modelkit_tag] for modelkit_tag in unique}
+
+    def _login_to_registries(self, registries: Iterable[str]) -> Dict[str, Exception]:
+        """
+        Logs in to each distinct registry once using the user credentials,
+        through the active session if there is one.
+
+        Args:
+            registries (Iterable[str]): The registries to log in to.
+
+        Returns:
+            Dict[str, Exception]: The error raised for each registry whose
+                login failed.
+        """
+        errors: Dict[str, Exception] = {}
+        for registry in dict.fromkeys(registries):
+            try:
+                if self._session is not None:
+                    self._session.login(registry, self.user_credentials)
+                else:
+                    kit.login(
+                        user=self.user_credentials.username,
+                        passwd=self.user_credentials.password,
+                        registry=registry,
+                    )
+            except Exception as e:
+                LOG.error(f"Login to {registry} failed: {e}")
+                errors[registry] = e
+        return errors
+
+    def _pull_and_unpack(self, modelkit_tag: str, directory: str, filters: Optional[list[str]] = None) -> None:
+        """
+        Pulls a ModelKit and unpacks it into the given directory.
+
+        Args:
+            modelkit_tag (str): The ModelKit to pull and unpack.
+            directory (str): The directory to unpack into.
+            filters (Optional[list[str]]): The Kitfile parts to unpack.
+        """
+        directory = get_or_create_directory(directory)
+        if not filters:
+            # If no filters are provided, go ahead and issue a pull request
+            # before unpacking; otherwise, issue the unpack request only.
+            kit.pull(modelkit_tag)
+        kit.unpack(modelkit_tag, dir=directory, filters=filters)
+
+    @traced(reference=_span_reference)
     def pack_and_push_modelkit(
-        self, save_kitfile: bool = False, with_login_and_logout: Optional[bool] = True
+        self,
+        save_kitfile: bool = False,
+        with_login_and_logout: Optional[bool] = True,
+        native: bool = False,
     ) -> None:
         """
         Packs the ModelKit from the working directory and pushes it
@@ -256,25 +785,37 @@ class ModelKitManager:
         Args:
             save_kitfile (bool): If True, the Kitfile will be saved to
                 the working directory before the Kitfile is packed and
-                pushed. Defaults to False.
+                pushed, unless the file already matches it. Defaults to False.
+            native (bool): If True, pack the Kitfile's entries and push them
+                with `registry_client` instead of spawning `kit`. Defaults
+                to False.
 
         Returns:
             None
         """
         if save_kitfile and self.kitfile:
-            self.kitfile.save(print=False)
-
-        if with_login_and_logout:
-            kit.login(
-                user=self.user_credentials.username,
-                passwd=self.user_credentials.password,
-                registry=self.modelkit_reference.registry,
+            # only rewritten if the Kitfile changed since it was loaded or saved.
+            self.kitfile.save(os.path.join(self.working_directory, "Kitfile"), print=False)
+
+        if native:
+            push_modelkit(
+                self.registry_client,
+                self._repository,
+                self._push_tag,
+                self.working_directory,
+                kitfile_data=self.kitfile.model_dump(exclude_unset=True, exclude_none=True) if self.kitfile else None,
             )
-        kit.pack(self.modelkit_reference.modelkit_tag, working_directory=self.working_directory)
-        kit.push(self.modelkit_reference.modelkit_tag)
-        if with_login_and_logout:
+            return
+
+        # a pushed ModelKit gets a new digest, so it is packed and pushed by tag only.
+        modelkit_tag = str(self.modelkit_reference.freeze().with_tag(self._push_tag).with_digest(None))
+        logged_in = self._login_for_operation(with_login_and_logout)
+        kit.pack(modelkit_tag, working_directory=self.working_directory)
+        kit.push(modelkit_tag)
+        if logged_in:
             kit.logout(registry=self.modelkit_reference.registry)
 
+    @traced(reference=_span_reference)
     def remove_modelkit(
         self,
         local: Optional[bool] = False,
@@ -299,17 +840,12 @@ class ModelKitManager:
             ...                           modelkit_tag = modelkit_tag)
             >>> manager.remove_modelkit(local = True, remote = True)
         """
-        if with_login_and_logout:
-            kit.login(
-                user=self.user_credentials.username,
-                passwd=self.user_credentials.password,
-                registry=self.modelkit_reference.registry,
-            )
+        logged_in = self._login_for_operation(with_login_and_logout)
         if local:
             kit.remove(self.modelkit_reference.modelkit_tag, remote=False)
 
         if remote:
             kit.remove(self.modelkit_reference.modelkit_tag, remote=True)
 
-        if with_login_and_logout:
+        if logged_in:
             kit.logout(registry=self.modelkit_reference.registry)
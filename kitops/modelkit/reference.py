@@ -16,22 +16,167 @@ limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import Optional
+import functools
+import re
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+
+# the reference grammar of the OCI distribution spec: a registry host with
+# an optional port, one or more namespace components, the repository, then
+# a tag, a digest, or both.
+_ALPHANUMERIC = r"[a-z0-9]+"
+_PATH_COMPONENT = rf"{_ALPHANUMERIC}(?:(?:[._]|__|-+){_ALPHANUMERIC})*"
+_DOMAIN_COMPONENT = r"(?:[a-zA-Z0-9]|[a-zA-Z0-9][a-zA-Z0-9-]*[a-zA-Z0-9])"
+_HOST = rf"(?:{_DOMAIN_COMPONENT}(?:\.{_DOMAIN_COMPONENT})*|\[[a-fA-F0-9:]+\])"
+_REFERENCE_RE = re.compile(
+    rf"(?P<registry>{_HOST}(?::[0-9]+)?)"
+    rf"/(?P<namespace>{_PATH_COMPONENT}(?:/{_PATH_COMPONENT})*)"
+    rf"/(?P<repository>{_PATH_COMPONENT})"
+    r"(?::(?P<tag>\w[\w.-]{0,127}))?"
+    r"(?:@(?P<digest>[a-z0-9]+(?:[+._-][a-z0-9]+)*:[a-zA-Z0-9=_-]+))?",
+    re.ASCII,
+)
+# registry, namespace and repository together.
+MAX_NAME_LENGTH = 255
+DIGEST_LENGTHS = {"sha256": 64, "sha512": 128}
+_HEX_RE = re.compile(r"[0-9a-f]+")
+
+
+def _check_digest(digest: str) -> None:
+    """Raises ValueError if a digest of a known algorithm is not as long as the algorithm's hex digests."""
+    algorithm, _, encoded = digest.partition(":")
+    length = DIGEST_LENGTHS.get(algorithm)
+    if length is not None and (len(encoded) != length or not _HEX_RE.fullmatch(encoded)):
+        raise ValueError(f"Invalid {algorithm} digest: {digest}")
+
+
+@functools.total_ordering
+@dataclass(frozen=True, slots=True)
+class Reference:
+    """
+    An immutable reference to a ModelKit in a registry.
+
+    References are hashable, so they can be used as dictionary keys and in
+    sets, and are ordered by their components. Parse one with
+    `Reference.parse` (or `parse_reference`), whose results are cached, so
+    that parsing the same string again returns the same instance.
+
+    Attributes:
+        registry (str): The registry, with its port if it has one.
+        namespace (str): The namespace, which may have several components
+            separated by "/".
+        repository (str): The repository (model) name.
+        tag (Optional[str]): The tag, or None if the reference only has a digest.
+        digest (Optional[str]): The manifest digest (e.g. "sha256:..."), or
+            None if the reference only has a tag.
+    """
+
+    registry: str
+    namespace: str
+    repository: str
+    tag: Optional[str] = None
+    digest: Optional[str] = None
+
+    @classmethod
+    def parse(cls, reference: str) -> "Reference":
+        """
+        Parses a reference; see `parse_reference`.
+
+        Examples:
+            >>> Reference.parse("localhost:5000/team/vision/resnet:v1")
+            Reference(registry='localhost:5000', namespace='team/vision', repository='resnet', tag='v1', digest=None)
+        """
+        return parse_reference(reference)
+
+    @property
+    def name(self) -> str:
+        """The reference without its tag and digest, e.g. "jozu.ml/jozu-demos/titanic-survivability"."""
+        return f"{self.registry}/{self.namespace}/{self.repository}"
+
+    @property
+    def modelkit_tag(self) -> str:
+        """The reference as a string, as `kit` accepts it."""
+        return str(self)
+
+    def with_tag(self, tag: Optional[str]) -> "Reference":
+        """Returns a copy of the reference with another tag."""
+        return replace(self, tag=tag)
+
+    def with_digest(self, digest: Optional[str]) -> "Reference":
+        """Returns a copy of the reference with another digest."""
+        return replace(self, digest=digest)
+
+    def _sort_key(self) -> Tuple[str, str, str, str, str]:
+        return (self.registry, self.namespace, self.repository, self.tag or "", self.digest or "")
+
+    def __lt__(self, other: object) -> bool:
+        if not isinstance(other, Reference):
+            return NotImplemented
+        return self._sort_key() < other._sort_key()
+
+    def __str__(self) -> str:
+        reference = self.name
+        if self.tag:
+            reference += f":{self.tag}"
+        if self.digest:
+            reference += f"@{self.digest}"
+        return reference
+
 
-from .utils import parse_modelkit_tag
+@functools.lru_cache(maxsize=4096)
+def parse_reference(reference: str) -> Reference:
+    """
+    Parses a ModelKit reference, following the reference grammar of the
+    OCI distribution spec: {registry}/{namespace}/{model}:{tag},
+    {registry}/{namespace}/{model}@{digest} or both. The registry may have
+    a port and the namespace several components; a tag or a digest is
+    required.
+
+    The last 4096 distinct references parsed are cached.
+
+    Args:
+        reference (str): The reference to parse.
+
+    Returns:
+        Reference: The parsed reference.
+
+    Raises:
+        ValueError: If the reference is not valid.
+
+    Examples:
+        >>> ref = parse_reference("registry.example.com:5000/org/team/model:v1@sha256:" + "0" * 64)
+        >>> ref.registry, ref.namespace, ref.repository, ref.tag
+        ('registry.example.com:5000', 'org/team', 'model', 'v1')
+        >>> parse_reference("jozu.ml/jozu-demos/titanic-survivability:latest") is parse_reference(
+        ...     "jozu.ml/jozu-demos/titanic-survivability:latest"
+        ... )
+        True
+    """
+    match = _REFERENCE_RE.fullmatch(reference)
+    if match is None or not (match["tag"] or match["digest"]):
+        raise ValueError(f"Invalid tag format: {reference}")
+    if match.end("repository") > MAX_NAME_LENGTH:
+        raise ValueError(f"Invalid tag format: {reference} is longer than {MAX_NAME_LENGTH} characters")
+    if match["digest"]:
+        _check_digest(match["digest"])
+    return Reference(match["registry"], match["namespace"], match["repository"], match["tag"], match["digest"])
 
 
 class ModelKitReference:
     """
     A class to represent a modelkit reference broken down into its parts.
     This class parses a modelkit tag and provides access to its components.
-    These include the registry, namespace, model, and tag.
+    These include the registry, namespace, model, tag and digest.
+
+    Unlike `Reference`, a ModelKitReference can be changed after it is
+    created; use `freeze()` to get an immutable, hashable copy.
 
     Attributes:
         registry (str): The registry for the model.
         namespace (str): The namespace for the model.
         model (str): The model name.
         tag (str): The tag for the model.
+        digest (str): The manifest digest for the model.
 
     Methods:
         __init__():
@@ -44,15 +189,21 @@ class ModelKitReference:
             Gets or sets the repository name.
         tag:
             Gets or sets the tag.
+        digest:
+            Gets or sets the digest.
+        freeze():
+            Returns the reference as an immutable Reference.
     """
 
-    def __init__(self, modelkit_tag: Optional[str] = None):
+    def __init__(self, modelkit_tag: Optional[str | Reference] = None):
         """
         Initializes the ModelKitReference instance by parsing a tag.
 
         Args:
-            modelkit_tag (Optional[str]): The tag to parse. It should be in the form of:
-                {registry}/{namespace}/{model}:{tag}
+            modelkit_tag (Optional[str | Reference]): The tag to parse, or
+                a Reference to copy. It should be in the form of:
+                {registry}/{namespace}/{model}:{tag}, optionally followed
+                by @{digest}; see `parse_reference`.
 
         Examples:
             >>> ref = ModelKitReference("jozu.ml/jozu-demos/titanic-survivability:latest")
@@ -70,16 +221,18 @@ class ModelKitReference:
             self.namespace = None
             self.repository = None
             self.tag = None
+            self.digest = None
         else:
             # try to parse the modelkit tag into its components.
             try:
-                parts = parse_modelkit_tag(modelkit_tag)
-                self.registry = parts.get("registry")
-                self.namespace = parts.get("namespace")
-                self.repository = parts.get("model")
-                self.tag = parts.get("tag")
+                parts = modelkit_tag if isinstance(modelkit_tag, Reference) else parse_reference(modelkit_tag)
             except ValueError as e:
                 raise ValueError(f"Error parsing modelkit tag: {modelkit_tag}") from e
+            self.registry = parts.registry
+            self.namespace = parts.namespace
+            self.repository = parts.repository
+            self.tag = parts.tag
+            self.digest = parts.digest
 
     @property
     def registry(self) -> Optional[str]:
@@ -211,14 +364,49 @@ class ModelKitReference:
             raise ValueError("Tag must be a string or None.")
         self._tag = value
 
+    @property
+    def digest(self) -> Optional[str]:
+        """
+        Gets the manifest digest, e.g. "sha256:...".
+        """
+        return self._digest
+
+    @digest.setter
+    def digest(self, value: Optional[str]):
+        """
+        Sets the manifest digest.
+
+        Args:
+            value (str): The digest to set.
+
+        Raises:
+            ValueError: If the digest is not a string or None.
+        """
+        if value is not None and not isinstance(value, str):
+            raise ValueError("Digest must be a string or None.")
+        self._digest = value
+
     @property
     def modelkit_tag(self):
+        return str(self.freeze())
+
+    def freeze(self) -> Reference:
+        """
+        Returns the reference as an immutable, hashable Reference.
+
+        Returns:
+            Reference: The reference.
+
+        Raises:
+            ValueError: If the registry, namespace or repository is not
+                set, or neither the tag nor the digest is.
+        """
         if not self.registry:
             raise ValueError("Registry must be set to a non-empty string.")
         if not self.namespace:
             raise ValueError("Namespace must be set to a non-empty string.")
         if not self.repository:
             raise ValueError("Repository must be set to a non-empty string.")
-        if not self.tag:
+        if not self.tag and not self.digest:
             raise ValueError("tag must be set to a non-empty string.")
-        return f"{self.registry}/{self.namespace}/{self.repository}:{self.tag}"
+        return Reference(self.registry, self.namespace, self.repository, self.tag or None, self.digest or None)
@@ -0,0 +1,272 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Generate Kitfile data for a directory without the `kit` CLI.
+
+The tree is listed with `os.scandir`, one directory per task in a thread
+pool, so that slow or networked filesystems are listed concurrently. Each
+file is classified into a Kitfile section by its name or extension, and
+every directory whose files all fall into the same section is collapsed
+into a single entry. Configuration files (JSON, YAML, plain text...) join
+the section of the directory they are in, so a model directory holding its
+`config.json` and tokenizer files is still one model entry. Files whose
+section cannot be determined are treated as code, as `kit init` does.
+"""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, List, Mapping, Optional, Set, Tuple
+
+MODEL = "model"
+DATASETS = "datasets"
+CODE = "code"
+DOCS = "docs"
+PROMPTS = "prompts"
+# not a Kitfile section: such files follow their directory, or are code.
+CONFIG = "config"
+SECTIONS = (MODEL, DATASETS, CODE, DOCS, PROMPTS)
+
+DEFAULT_EXTENSION_RULES: Dict[str, str] = {
+    **dict.fromkeys(
+        (
+            "safetensors", "gguf", "ggml", "bin", "pt", "pth", "ckpt", "onnx", "h5", "hdf5", "keras", "pb",
+            "tflite", "mlmodel", "joblib", "pkl", "pickle", "model", "engine", "plan", "mar", "nemo",
+        ),
+        MODEL,
+    ),
+    **dict.fromkeys(
+        (
+            "csv", "tsv", "parquet", "arrow", "feather", "avro", "orc", "jsonl", "ndjson", "npy", "npz",
+            "tfrecord", "tfrecords", "db", "sqlite", "xlsx", "xls", "zarr", "wav", "flac", "mp3", "jpg",
+            "jpeg", "png", "bmp", "tif", "tiff", "webp", "mp4", "avi", "mkv",
+        ),
+        DATASETS,
+    ),
+    **dict.fromkeys(("md", "markdown", "rst", "adoc", "pdf", "html", "htm"), DOCS),
+    **dict.fromkeys(("prompt", "prompty"), PROMPTS),
+    **dict.fromkeys(("json", "yaml", "yml", "toml", "ini", "cfg", "conf", "txt", "tiktoken"), CONFIG),
+}  # fmt: skip
+
+DEFAULT_NAME_RULES: Dict[str, str] = {
+    "readme": DOCS,
+    "license": DOCS,
+    "licence": DOCS,
+    "notice": DOCS,
+    "changelog": DOCS,
+    "authors": DOCS,
+    "model_card": DOCS,
+}
+
+DEFAULT_IGNORE = frozenset({"Kitfile", ".git", ".hg", ".svn", ".kitops", "__pycache__", ".DS_Store"})
+DEFAULT_COLLAPSE_THRESHOLD = 2
+
+
+@dataclass
+class _Tree:
+    """What was found under one directory, subdirectories included."""
+
+    files: List[Tuple[str, str, int]] = field(default_factory=list)
+    subdirectories: List[str] = field(default_factory=list)
+    sections: Set[str] = field(default_factory=set)
+    count: int = 0
+    size: int = 0
+
+
+def classify(
+    name: str,
+    extension_rules: Mapping[str, str] = DEFAULT_EXTENSION_RULES,
+    name_rules: Mapping[str, str] = DEFAULT_NAME_RULES,
+) -> str:
+    """
+    Returns the Kitfile section a file belongs to.
+
+    The file's name without extension is matched against `name_rules`
+    first, then its extension against `extension_rules`, both ignoring
+    case. Anything else is code.
+
+    Args:
+        name (str): The file name.
+        extension_rules (Mapping[str, str]): Extension (without the dot) to
+            section. Defaults to DEFAULT_EXTENSION_RULES.
+        name_rules (Mapping[str, str]): File name (without extension) to
+            section. Defaults to DEFAULT_NAME_RULES.
+
+    Returns:
+        str: "model", "datasets", "code", "docs", "prompts" or "config".
+
+    Examples:
+        >>> classify("model-00001-of-00004.safetensors")
+        'model'
+        >>> classify("README.md")
+        'docs'
+    """
+    stem, _, extension = name.lower().rpartition(".")
+    if not stem:
+        stem, extension = extension, ""
+    return name_rules.get(stem) or extension_rules.get(extension) or CODE
+
+
+def scan_directory(  # noqa: PLR0913
+    directory: str | Path,
+    *,
+    extension_rules: Optional[Mapping[str, str]] = None,
+    name_rules: Optional[Mapping[str, str]] = None,
+    ignore: frozenset[str] | Set[str] = DEFAULT_IGNORE,
+    include_hidden: bool = False,
+    collapse_threshold: int = DEFAULT_COLLAPSE_THRESHOLD,
+    max_workers: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Lists a directory tree and groups its contents into Kitfile entries.
+
+    A subdirectory holding at least `collapse_threshold` files, all of the
+    same section apart from configuration files, becomes a single entry;
+    any other file is an entry of its own, with configuration files listed
+    as code. Symlinked directories are not followed.
+
+    Args:
+        directory (str | Path): The directory to scan.
+        extension_rules (Optional[Mapping[str, str]]): Extension to section
+            rules, merged over DEFAULT_EXTENSION_RULES. Defaults to None.
+        name_rules (Optional[Mapping[str, str]]): File name to section
+            rules, merged over DEFAULT_NAME_RULES. Defaults to None.
+        ignore (frozenset[str] | Set[str]): File and directory names to
+            skip. Defaults to DEFAULT_IGNORE.
+        include_hidden (bool): Whether to include names starting with ".".
+            Defaults to False.
+        collapse_threshold (int): The fewest files a homogeneous directory
+            must hold to be collapsed. Defaults to 2.
+        max_workers (Optional[int]): The number of directories listed at
+            once. Defaults to None, which lets ThreadPoolExecutor decide.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: For each section, its entries as
+            dictionaries with the entry's relative "path" and total "size"
+            in bytes, sorted by path.
+
+    Raises:
+        NotADirectoryError: If directory is not a directory.
+    """
+    root = Path(directory)
+    if not root.is_dir():
+        raise NotADirectoryError(f"'{root}' is not a directory.")
+    extensions = {**DEFAULT_EXTENSION_RULES, **(extension_rules or {})}
+    names = {**DEFAULT_NAME_RULES, **(name_rules or {})}
+
+    def list_directory(relative: str) -> Tuple[str, _Tree]:
+        tree = _Tree()
+        with os.scandir(root / relative) as entries:
+            for entry in entries:
+                if entry.name in ignore or (not include_hidden and entry.name.startswith(".")):
+                    continue
+                path = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    tree.subdirectories.append(path)
+                elif entry.is_file():
+                    tree.files.append((path, classify(entry.name, extensions, names), entry.stat().st_size))
+        return relative, tree
+
+    trees: Dict[str, _Tree] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kitops-scan") as executor:
+        pending: Set[Future] = {executor.submit(list_directory, "")}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                relative, tree = future.result()
+                trees[relative] = tree
+                pending.update(executor.submit(list_directory, path) for path in tree.subdirectories)
+
+    # fold every directory's totals into its parents, deepest first.
+    for relative in sorted(trees, key=lambda path: path.count("/") if path else -1, reverse=True):
+        tree = trees[relative]
+        for _, section, size in tree.files:
+            tree.sections.add(section)
+            tree.count += 1
+            tree.size += size
+        for path in tree.subdirectories:
+            child = trees[path]
+            tree.sections |= child.sections
+            tree.count += child.count
+            tree.size += child.size
+
+    entries: Dict[str, List[Dict[str, Any]]] = {section: [] for section in SECTIONS}
+    stack = [""]
+    while stack:
+        tree = trees[stack.pop()]
+        for path, section, size in tree.files:
+            entries[CODE if section == CONFIG else section].append({"path": path, "size": size})
+        for path in tree.subdirectories:
+            child = trees[path]
+            sections = (child.sections - {CONFIG}) or {CODE}
+            if len(sections) == 1 and child.count >= collapse_threshold:
+                entries[sections.pop()].append({"path": path, "size": child.size})
+            elif child.count:
+                stack.append(path)
+    for section_entries in entries.values():
+        section_entries.sort(key=lambda entry: entry["path"])
+    return entries
+
+
+def kitfile_data(
+    entries: Dict[str, List[Dict[str, Any]]],
+    name: str,
+    description: Optional[str] = None,
+    author: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Builds Kitfile data from scanned entries. The largest model entry
+    becomes the model's path and any other model entries its parts.
+
+    Args:
+        entries (Dict[str, List[Dict[str, Any]]]): As returned by
+            `scan_directory`.
+        name (str): The package name.
+        description (Optional[str]): The package description. Defaults to None.
+        author (Optional[str]): The package author. Defaults to None.
+
+    Returns:
+        Dict[str, Any]: The Kitfile data.
+    """
+    package: Dict[str, Any] = {"name": name}
+    if description:
+        package["description"] = description
+    if author:
+        package["authors"] = [author]
+    data: Dict[str, Any] = {"manifestVersion": "1.0.0", "package": package}
+
+    models = entries.get(MODEL) or []
+    if models:
+        main = max(models, key=lambda entry: entry["size"])
+        data["model"] = {"name": name, "path": main["path"]}
+        parts = [entry for entry in models if entry is not main]
+        if parts:
+            data["model"]["parts"] = [
+                {"name": PurePosixPath(entry["path"]).name, "path": entry["path"]} for entry in parts
+            ]
+    if entries.get(CODE):
+        data["code"] = [{"path": entry["path"]} for entry in entries[CODE]]
+    if entries.get(DATASETS):
+        data["datasets"] = [
+            {"name": PurePosixPath(entry["path"]).name, "path": entry["path"]} for entry in entries[DATASETS]
+        ]
+    if entries.get(DOCS):
+        data["docs"] = [{"path": entry["path"]} for entry in entries[DOCS]]
+    if entries.get(PROMPTS):
+        data["prompts"] = [{"path": entry["path"]} for entry in entries[PROMPTS]]
+    return data
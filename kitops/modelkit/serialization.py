@@ -0,0 +1,226 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+YAML loading and dumping for Kitfiles, backed by libyaml when available.
+
+PyYAML ships two implementations of its safe loader and dumper: the
+pure-Python `SafeLoader`/`SafeDumper` and the libyaml-based
+`CSafeLoader`/`CSafeDumper`, which are much faster on large documents and
+produce the same output. The "libyaml" backend is used whenever PyYAML was
+built with libyaml, falling back to "python" otherwise. Set the
+KITOPS_YAML_BACKEND environment variable, or call `set_yaml_backend`, to
+choose one explicitly.
+"""
+
+import os
+from typing import IO, Any, Dict, Iterator, Optional, Sequence
+
+import yaml
+from yaml.composer import ComposerError
+from yaml.constructor import SafeConstructor
+from yaml.nodes import MappingNode, Node, ScalarNode, SequenceNode
+from yaml.resolver import Resolver
+
+LIBYAML = "libyaml"
+PYTHON = "python"
+
+_LOADERS: Dict[str, Any] = {PYTHON: yaml.SafeLoader}
+_DUMPERS: Dict[str, Any] = {PYTHON: yaml.SafeDumper}
+if getattr(yaml, "__with_libyaml__", False):
+    _LOADERS[LIBYAML] = yaml.CSafeLoader
+    _DUMPERS[LIBYAML] = yaml.CSafeDumper
+
+AVAILABLE_BACKENDS = tuple(sorted(_LOADERS))
+
+_settings: Dict[str, Optional[str]] = {"backend": None}
+
+
+def _resolve(backend: Optional[str]) -> str:
+    """Returns the backend to use, validating an explicit choice."""
+    if backend is None:
+        backend = _settings["backend"] or os.environ.get("KITOPS_YAML_BACKEND") or None
+    if backend is None:
+        return LIBYAML if LIBYAML in _LOADERS else PYTHON
+    if backend not in (LIBYAML, PYTHON):
+        raise ValueError(f"Invalid YAML backend '{backend}'. Must be one of {LIBYAML}, {PYTHON}.")
+    if backend not in _LOADERS:
+        raise ValueError(f"The '{backend}' YAML backend is not available: PyYAML was built without libyaml.")
+    return backend
+
+
+def get_yaml_backend() -> str:
+    """
+    Returns the YAML backend in use.
+
+    Returns:
+        str: "libyaml" or "python".
+    """
+    return _resolve(None)
+
+
+def set_yaml_backend(backend: Optional[str]) -> None:
+    """
+    Selects the YAML backend used to load and dump Kitfiles.
+
+    Examples:
+        >>> set_yaml_backend("python")
+        >>> get_yaml_backend()
+        'python'
+
+    Args:
+        backend (Optional[str]): "libyaml", "python", or None to pick
+            automatically again.
+
+    Raises:
+        ValueError: If the backend is unknown or not available.
+    """
+    if backend is not None:
+        _resolve(backend)
+    _settings["backend"] = backend
+
+
+def load_yaml(text: str, backend: Optional[str] = None) -> Any:
+    """
+    Parses a YAML document with the safe loader.
+
+    Args:
+        text (str): The YAML document.
+        backend (Optional[str]): The backend to use. Defaults to None,
+            which uses the selected backend.
+
+    Returns:
+        Any: The parsed document.
+
+    Raises:
+        yaml.YAMLError: If the document is not valid YAML.
+    """
+    return yaml.load(text, Loader=_LOADERS[_resolve(backend)])
+
+
+def dump_yaml(data: Any, backend: Optional[str] = None) -> str:
+    """
+    Serializes data to YAML with the safe dumper, in block style and with
+    keys kept in insertion order.
+
+    Args:
+        data (Any): The data to serialize.
+        backend (Optional[str]): The backend to use. Defaults to None,
+            which uses the selected backend.
+
+    Returns:
+        str: The YAML document.
+    """
+    return yaml.dump(data, Dumper=_DUMPERS[_resolve(backend)], sort_keys=False, default_flow_style=False)
+
+
+def iter_sequence_items(stream: IO[str], keys: Sequence[str], backend: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yields the items of one sequence in a YAML document, one at a time,
+    without loading the rest of the document.
+
+    The document is read as a stream of parser events: everything outside
+    the sequence is skipped without being built, and each item is built on
+    its own, so memory use does not grow with the size of the document.
+    Aliases must refer to anchors defined within the same item.
+
+    Args:
+        stream (IO[str]): The YAML document.
+        keys (Sequence[str]): The mapping keys leading to the sequence from
+            the document root, e.g. ("model", "parts").
+        backend (Optional[str]): The backend to use. Defaults to None,
+            which uses the selected backend.
+
+    Yields:
+        Any: The items, as `load_yaml` would build them.
+
+    Raises:
+        yaml.YAMLError: If the document is not valid YAML, or an item uses
+            an alias defined outside it.
+    """
+    events = yaml.parse(stream, Loader=_LOADERS[_resolve(backend)])
+    if not _seek(events, keys):
+        return
+    event = next(events)
+    if not isinstance(event, yaml.SequenceStartEvent):
+        return
+    resolver = Resolver()
+    constructor = SafeConstructor()
+    while not isinstance(event := next(events), yaml.SequenceEndEvent):
+        yield constructor.construct_document(_compose(events, event, resolver, {}))
+
+
+def _seek(events: Iterator[yaml.Event], keys: Sequence[str]) -> bool:
+    """Consumes events up to the value at a key path; returns whether it exists."""
+    for event in events:
+        if isinstance(event, yaml.DocumentStartEvent):
+            break
+    else:
+        return False
+    for key in keys:
+        if not isinstance(next(events), yaml.MappingStartEvent):
+            return False
+        while not isinstance(event := next(events), yaml.MappingEndEvent):
+            if isinstance(event, yaml.ScalarEvent) and event.value == key:
+                break
+            _skip(events, event)
+            _skip(events, next(events))
+        else:
+            return False
+    return True
+
+
+def _skip(events: Iterator[yaml.Event], event: yaml.Event) -> None:
+    """Consumes the rest of the node that starts with event."""
+    depth = int(isinstance(event, yaml.CollectionStartEvent))
+    while depth:
+        event = next(events)
+        if isinstance(event, yaml.CollectionStartEvent):
+            depth += 1
+        elif isinstance(event, yaml.CollectionEndEvent):
+            depth -= 1
+
+
+def _compose(events: Iterator[yaml.Event], event: yaml.Event, resolver: Resolver, anchors: Dict[str, Node]) -> Node:
+    """Builds the node that starts with event, resolving implicit tags as the safe loader does."""
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise ComposerError(None, None, f"found undefined alias {event.anchor!r}", event.start_mark)
+        return anchors[event.anchor]
+
+    node: Node
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag if event.tag not in (None, "!") else resolver.resolve(ScalarNode, event.value, event.implicit)
+        node = ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+    elif isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag if event.tag not in (None, "!") else resolver.resolve(SequenceNode, None, event.implicit)
+        node = SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    else:
+        tag = event.tag if event.tag not in (None, "!") else resolver.resolve(MappingNode, None, event.implicit)
+        node = MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    if isinstance(node, ScalarNode):
+        return node
+
+    while not isinstance(child := next(events), yaml.CollectionEndEvent):
+        item = _compose(events, child, resolver, anchors)
+        if isinstance(node, SequenceNode):
+            node.value.append(item)
+        else:
+            node.value.append((item, _compose(events, next(events), resolver, anchors)))
+    node.end_mark = child.end_mark
+    return node
@@ -0,0 +1,134 @@
+"""
+Copyright 2024 The KitOps Authors.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License.
+
+SPDX-License-Identifier: Apache-2.0
+"""
+
+import threading
+from typing import FrozenSet, Set
+
+from kitops.cli import kit
+
+from .user import UserCredentials
+
+
+class RegistrySession:
+    """
+    A class to represent a set of registry logins that are reused across
+    any number of ModelKit operations.
+
+    A registry is logged into the first time an operation needs it and
+    stays logged in until the session is closed, at which point every
+    registry is logged out of once. A session can be shared between
+    several ModelKitManager instances and is safe to use from multiple
+    threads.
+
+    Attributes:
+        authenticated_registries (FrozenSet[str]): The registries currently
+            logged into through this session.
+
+    Methods:
+        login(registry, user_credentials):
+            Logs in to a registry unless the session already has.
+        close():
+            Logs out of every registry logged into by the session.
+
+    Examples:
+        >>> with RegistrySession() as session:
+        ...     with manager_a.session(session), manager_b.session(session):
+        ...         manager_a.pull_and_unpack_modelkit()
+        ...         manager_b.pull_and_unpack_modelkit()
+    """
+
+    def __init__(self):
+        """
+        Initializes an empty RegistrySession.
+        """
+        self._authenticated: Set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def authenticated_registries(self) -> FrozenSet[str]:
+        """
+        Gets the registries currently logged into through this session.
+
+        Returns:
+            FrozenSet[str]: The authenticated registries.
+        """
+        with self._lock:
+            return frozenset(self._authenticated)
+
+    def is_authenticated(self, registry: str) -> bool:
+        """
+        Checks whether the session is logged into a registry.
+
+        Args:
+            registry (str): The registry to check.
+
+        Returns:
+            bool: True if the session has logged into the registry.
+        """
+        with self._lock:
+            return registry in self._authenticated
+
+    def login(self, registry: str, user_credentials: UserCredentials) -> None:
+        """
+        Logs in to the registry, unless the session is already logged in.
+
+        Args:
+            registry (str): The registry to log in to.
+            user_credentials (UserCredentials): The credentials to log in with.
+
+        Raises:
+            subprocess.CalledProcessError: If `kit login` fails.
+        """
+        with self._lock:
+            if registry in self._authenticated:
+                return
+            kit.login(
+                user=user_credentials.username,
+                passwd=user_credentials.password,
+                registry=registry,
+            )
+            self._authenticated.add(registry)
+
+    def close(self) -> None:
+        """
+        Logs out of every registry logged into through this session.
+
+        Every registry is attempted even if logging out of one fails; the
+        first error is raised after all of them have been tried.
+
+        Raises:
+            subprocess.CalledProcessError: If `kit logout` fails.
+        """
+        with self._lock:
+            registries = sorted(self._authenticated)
+            self._authenticated.clear()
+
+        first_error = None
+        for registry in registries:
+            try:
+                kit.logout(registry=registry)
+            except Exception as e:
+                first_error = first_error or e
+        if first_error is not None:
+            raise first_error
+
+    def __enter__(self) -> "RegistrySession":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
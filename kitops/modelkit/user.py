@@ -16,9 +16,9 @@ limitations under the License.
 SPDX-License-Identifier: Apache-2.0
 """
 
-from typing import Optional
+from typing import Optional, Sequence
 
-from .utils import load_environment_variables
+from .credentials import CredentialProvider, resolve_credentials
 
 
 class UserCredentials:
@@ -48,11 +48,20 @@ class UserCredentials:
         password: Optional[str] = None,
         registry: Optional[str] = None,
         namespace: Optional[str] = None,
+        *,
+        providers: Optional[Sequence[CredentialProvider]] = None,
     ):
         """
         Initializes the UserCredentials instance with the values provided.
-        If no values are provided, they are loaded from environment variables.
+        If the username or password is not provided, the missing values are
+        resolved through the credential providers (by default a .env file,
+        then environment variables); see `kitops.modelkit.credentials`.
+        When both are provided, no provider is consulted.
         Initializes the private attributes _username, _password, _registry, and _namespace.
+        Args:
+            providers (Optional[Sequence[CredentialProvider]]): The providers
+                to resolve missing values through. Defaults to None, which
+                uses `get_credential_providers()`.
         Raises:
             ValueError: If either username or password is missing from the provided arguments or environment variables.
 
@@ -67,21 +76,20 @@ class UserCredentials:
             >>> user.namespace
             'namespace'
         """
-        try:
-            vars = load_environment_variables()
-            self.username = username or vars.get("username")
-            self.password = password or vars.get("password")
-            self.registry = registry or vars.get("registry")
-            self.namespace = namespace or vars.get("namespace")
-        except ValueError as e:
-            if not username or not password:
+        if username and password:
+            # explicit credentials need no lookup, and no .env file is read.
+            vars = {}
+        else:
+            try:
+                vars = resolve_credentials(providers)
+            except ValueError as e:
                 raise ValueError(
                     "Username and password must be provided either as arguments or in environment variables."
                 ) from e
-            self.username = username
-            self.password = password
-            self.registry = registry
-            self.namespace = namespace
+        self.username = username or vars.get("username")
+        self.password = password or vars.get("password")
+        self.registry = registry or vars.get("registry")
+        self.namespace = namespace or vars.get("namespace")
 
     @property
     def username(self) -> Optional[str]:
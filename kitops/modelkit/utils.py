@@ -20,9 +20,9 @@ import enum
 import os
 import sys
 from pathlib import Path
-from typing import Any, Dict, Set
+from typing import Any, Dict, Optional, Set
 
-from dotenv import load_dotenv
+from .reference import parse_reference
 
 
 class Color(enum.Enum):
@@ -113,7 +113,7 @@ def get_or_create_directory(directory: str) -> str:
     return path.as_posix()
 
 
-def parse_modelkit_tag(tag: str) -> Dict[str, str]:
+def parse_modelkit_tag(tag: str) -> Dict[str, Optional[str]]:
     """
     Parse a ModelKit tag into its components.
 
@@ -123,27 +123,32 @@ def parse_modelkit_tag(tag: str) -> Dict[str, str]:
             "registry": "jozu.ml",
             "namespace": "jozu-demos",
             "model": "titanic-survivability",
-            "tag": "latest"
+            "tag": "latest",
+            "digest": None
         }
 
     Args:
-        tag (str): Tag to parse.
+        tag (str): Tag to parse, in the form accepted by
+            `kitops.modelkit.reference.parse_reference`.
 
     Returns:
-        Dict[str, str]: Parsed components of the tag.
+        Dict[str, Optional[str]]: Parsed components of the tag. Either
+            "tag" or "digest" may be None.
     """
-    parts = tag.split("/")
-    if len(parts) != 3 or ":" not in parts[2]:  # noqa: PLR2004
-        raise ValueError(f"Invalid tag format: {tag}")
+    reference = parse_reference(tag)
     return {
-        "registry": parts[0],
-        "namespace": parts[1],
-        "model": parts[2].split(":")[0],
-        "tag": parts[2].split(":")[1],
+        "registry": reference.registry,
+        "namespace": reference.namespace,
+        "model": reference.repository,
+        "tag": reference.tag,
+        "digest": reference.digest,
     }
 
 
 def load_environment_variables() -> Dict[str, str | None]:
+    # imported here so that dotenv is only loaded when credentials are needed.
+    from dotenv import load_dotenv  # noqa: PLC0415
+
     load_dotenv(override=True)
     username = os.getenv("JOZU_USERNAME")
     password = os.getenv("JOZU_PASSWORD")
@@ -0,0 +1,35 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Talk to OCI registries directly, without the kit CLI.
+"""
+
+from .client import RegistryClient, RegistryError
+from .download import BlobDownloader
+from .lazy import LazyModelKit
+from .modelkit import pull_modelkit, push_modelkit
+from .store import BlobStore
+
+__all__ = (
+    "BlobDownloader",
+    "BlobStore",
+    "LazyModelKit",
+    "RegistryClient",
+    "RegistryError",
+    "pull_modelkit",
+    "push_modelkit",
+)
@@ -0,0 +1,679 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Define the RegistryClient class, a minimal client for the OCI distribution API.
+"""
+
+import base64
+import hashlib
+import http.client
+import json
+import queue
+import re
+import threading
+from logging import getLogger
+from typing import IO, Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode, urljoin, urlsplit
+
+LOG = getLogger(__name__)
+
+OCI_MANIFEST_MEDIA_TYPE = "application/vnd.oci.image.manifest.v1+json"
+OCI_INDEX_MEDIA_TYPE = "application/vnd.oci.image.index.v1+json"
+DOCKER_MANIFEST_MEDIA_TYPE = "application/vnd.docker.distribution.manifest.v2+json"
+MANIFEST_MEDIA_TYPES = (OCI_MANIFEST_MEDIA_TYPE, OCI_INDEX_MEDIA_TYPE, DOCKER_MANIFEST_MEDIA_TYPE)
+
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+_CHALLENGE_PARAM = re.compile(r'(\w+)="([^"]*)"')
+_DIGEST = re.compile(r"sha256:[0-9a-f]{64}")
+
+
+class RegistryError(Exception):
+    """
+    Raised when the registry answers a request with an unexpected status.
+
+    Attributes:
+        status (int): The HTTP status code returned.
+        method (str): The HTTP method of the failed request.
+        url (str): The URL of the failed request.
+        body (str): The (possibly truncated) response body.
+    """
+
+    def __init__(self, status: int, method: str, url: str, body: str = ""):
+        self.status = status
+        self.method = method
+        self.url = url
+        self.body = body
+        super().__init__(f"{method} {url} failed with status {status}: {body[:512]}")
+
+
+def compute_digest(data: bytes) -> str:
+    """
+    Computes the OCI digest of a byte string.
+
+    Args:
+        data (bytes): The content to digest.
+
+    Returns:
+        str: The digest in the form "sha256:<hex>".
+    """
+    return "sha256:" + hashlib.sha256(data).hexdigest()
+
+
+def check_digest(digest: Any) -> str:
+    """
+    Checks that a digest is a sha256 digest, before it is used in a URL or
+    a file name. Digests read from a manifest come from the registry and
+    must not be trusted to be safe path components.
+
+    Args:
+        digest (Any): The digest to check.
+
+    Returns:
+        str: The digest.
+
+    Raises:
+        ValueError: If the digest is not "sha256:" followed by 64 lowercase
+            hexadecimal digits.
+    """
+    if not isinstance(digest, str) or _DIGEST.fullmatch(digest) is None:
+        raise ValueError(f"Unsupported digest '{digest}'.")
+    return digest
+
+
+class _ConnectionPool:
+    """
+    A thread-safe pool of keep-alive connections to a single host.
+    """
+
+    def __init__(self, scheme: str, netloc: str, timeout: float, maxsize: int):
+        self.scheme = scheme
+        self.netloc = netloc
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize)
+
+    def acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            if self.scheme == "https":
+                return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+            return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class RegistryResponse:
+    """
+    A response from the registry whose connection goes back to the pool
+    once the body has been read or the response is closed.
+
+    Attributes:
+        status (int): The HTTP status code.
+        headers (http.client.HTTPMessage): The response headers.
+        url (str): The URL that produced the response.
+    """
+
+    def __init__(
+        self,
+        response: http.client.HTTPResponse,
+        connection: http.client.HTTPConnection,
+        pool: _ConnectionPool,
+        url: str,
+    ):
+        self._response = response
+        self._connection: Optional[http.client.HTTPConnection] = connection
+        self._pool = pool
+        self.status = response.status
+        self.headers = response.headers
+        self.url = url
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        """
+        Reads up to `amt` bytes of the body, or all of it.
+
+        Args:
+            amt (Optional[int]): The maximum number of bytes to read.
+
+        Returns:
+            bytes: The bytes read; empty once the body is exhausted.
+        """
+        data = self._response.read(amt)
+        if self._response.isclosed():
+            self.close()
+        return data
+
+    def readinto(self, buffer) -> int:
+        """Reads body bytes into a pre-allocated buffer."""
+        count = self._response.readinto(buffer)
+        if self._response.isclosed():
+            self.close()
+        return count
+
+    def iter_content(self, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Iterates over the body in chunks.
+
+        Args:
+            chunk_size (int): The maximum size of each chunk.
+
+        Returns:
+            Iterator[bytes]: The body chunks.
+        """
+        while True:
+            chunk = self.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def close(self) -> None:
+        """
+        Releases the connection: back to the pool if the body was fully
+        read and the server allows reuse, otherwise it is closed.
+        """
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        if self._response.isclosed() and not self._response.will_close:
+            self._pool.release(connection)
+        else:
+            self._response.close()
+            connection.close()
+
+    def __enter__(self) -> "RegistryResponse":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+class RegistryClient:
+    """
+    A client for one OCI registry that talks the distribution API directly
+    over pooled keep-alive HTTP connections.
+
+    Supports anonymous access, HTTP basic authentication and the bearer
+    token flow used by most registries. Tokens are cached per scope.
+
+    Attributes:
+        registry (str): The registry host, optionally with a port.
+
+    Examples:
+        >>> client = RegistryClient("jozu.ml", username="user", password="secret")
+        >>> manifest, digest = client.get_manifest("jozu-demos/titanic-survivability", "latest")
+        >>> config = client.get_blob("jozu-demos/titanic-survivability", manifest["config"]["digest"])
+    """
+
+    # the number of idle keep-alive connections kept per host.
+    MAX_IDLE_CONNECTIONS = 8
+
+    def __init__(
+        self,
+        registry: str,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        plain_http: bool = False,
+        timeout: float = 60.0,
+    ):
+        """
+        Initializes the RegistryClient.
+
+        Args:
+            registry (str): The registry host, optionally with a port
+                (e.g. "jozu.ml" or "localhost:5000").
+            username (Optional[str]): The username to authenticate with.
+            password (Optional[str]): The password to authenticate with.
+            plain_http (bool): If True, use HTTP instead of HTTPS. Defaults to False.
+            timeout (float): The socket timeout in seconds. Defaults to 60.
+        """
+        self.registry = registry
+        self._username = username
+        self._password = password
+        self._scheme = "http" if plain_http else "https"
+        self._timeout = timeout
+        self._pools: Dict[Tuple[str, str], _ConnectionPool] = {}
+        self._tokens: Dict[str, str] = {}
+        self._basic = False
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        """The URL of the registry root."""
+        return f"{self._scheme}://{self.registry}"
+
+    def close(self) -> None:
+        """Closes every pooled connection."""
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.close()
+
+    def __enter__(self) -> "RegistryClient":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def head_manifest(self, repository: str, reference: str) -> Optional[str]:
+        """
+        Resolves a tag or digest to the manifest digest without
+        downloading the manifest.
+
+        Args:
+            repository (str): The repository, e.g. "jozu-demos/titanic-survivability".
+            reference (str): A tag or digest.
+
+        Returns:
+            Optional[str]: The manifest digest, or None if it does not exist.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+        """
+        with self.request(
+            "HEAD",
+            f"/v2/{repository}/manifests/{reference}",
+            repository=repository,
+            headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)},
+            expected=(200, 404),
+        ) as response:
+            if response.status == 404:
+                return None
+            digest = response.headers.get("Docker-Content-Digest")
+        if digest is None:
+            # some registries omit the header on HEAD; fall back to GET.
+            _, digest = self.get_manifest(repository, reference)
+        return digest
+
+    def get_manifest(self, repository: str, reference: str) -> Tuple[Dict[str, Any], str]:
+        """
+        Downloads a manifest.
+
+        Args:
+            repository (str): The repository.
+            reference (str): A tag or digest.
+
+        Returns:
+            Tuple[Dict[str, Any], str]: The parsed manifest and its digest.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+            ValueError: If the reference is a digest the content does not match.
+        """
+        with self.request(
+            "GET",
+            f"/v2/{repository}/manifests/{reference}",
+            repository=repository,
+            headers={"Accept": ", ".join(MANIFEST_MEDIA_TYPES)},
+        ) as response:
+            body = response.read()
+        digest = compute_digest(body)
+        if reference.startswith("sha256:") and reference != digest:
+            raise ValueError(f"Manifest digest mismatch: expected {reference}, got {digest}")
+        return json.loads(body), digest
+
+    def put_manifest(
+        self,
+        repository: str,
+        reference: str,
+        manifest: Dict[str, Any],
+        media_type: str = OCI_MANIFEST_MEDIA_TYPE,
+    ) -> str:
+        """
+        Uploads a manifest under a tag or digest.
+
+        Args:
+            repository (str): The repository.
+            reference (str): The tag (or digest) to store the manifest under.
+            manifest (Dict[str, Any]): The manifest document.
+            media_type (str): The manifest media type.
+
+        Returns:
+            str: The digest of the uploaded manifest.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+        """
+        body = json.dumps(manifest, separators=(",", ":")).encode()
+        with self.request(
+            "PUT",
+            f"/v2/{repository}/manifests/{reference}",
+            repository=repository,
+            push=True,
+            headers={"Content-Type": media_type},
+            body=body,
+            expected=(201,),
+        ) as response:
+            response.read()
+        return compute_digest(body)
+
+    def blob_exists(self, repository: str, digest: str) -> bool:
+        """
+        Checks whether a blob exists in the repository.
+
+        Args:
+            repository (str): The repository.
+            digest (str): The blob digest.
+
+        Returns:
+            bool: True if the blob exists.
+        """
+        with self.request(
+            "HEAD", f"/v2/{repository}/blobs/{digest}", repository=repository, expected=(200, 404)
+        ) as response:
+            return response.status == 200
+
+    def open_blob(
+        self, repository: str, digest: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> RegistryResponse:
+        """
+        Opens a blob, or a byte range of it, for streaming.
+
+        Args:
+            repository (str): The repository.
+            digest (str): The blob digest.
+            start (Optional[int]): The first byte to fetch. Defaults to None.
+            end (Optional[int]): The last byte to fetch, inclusive. Defaults
+                to None, meaning the end of the blob.
+
+        Returns:
+            RegistryResponse: The open response; close it when done.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status,
+                including 200 for a ranged request it does not support.
+        """
+        headers = {}
+        expected: Tuple[int, ...] = (200,)
+        if start is not None or end is not None:
+            headers["Range"] = f"bytes={start or 0}-{'' if end is None else end}"
+            expected = (206,)
+        return self.request(
+            "GET", f"/v2/{repository}/blobs/{digest}", repository=repository, headers=headers, expected=expected
+        )
+
+    def get_blob(
+        self, repository: str, digest: str, start: Optional[int] = None, end: Optional[int] = None
+    ) -> bytes:
+        """
+        Downloads a blob, or a byte range of it, into memory. Complete
+        blobs are verified against their digest.
+
+        Args:
+            repository (str): The repository.
+            digest (str): The blob digest.
+            start (Optional[int]): The first byte to fetch. Defaults to None.
+            end (Optional[int]): The last byte to fetch, inclusive. Defaults to None.
+
+        Returns:
+            bytes: The blob content.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+            ValueError: If a complete blob does not match its digest.
+        """
+        with self.open_blob(repository, digest, start, end) as response:
+            data = response.read()
+        if start is None and end is None and compute_digest(data) != digest:
+            raise ValueError(f"Blob digest mismatch for {digest}")
+        return data
+
+    def upload_blob(
+        self,
+        repository: str,
+        source: bytes | IO[bytes],
+        digest: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> str:
+        """
+        Uploads a blob in chunks, skipping the upload if the registry
+        already has it.
+
+        Args:
+            repository (str): The repository.
+            source (bytes | IO[bytes]): The content, or a binary file
+                object positioned at its start.
+            digest (Optional[str]): The digest of the content, if known.
+                When given, an existing blob is detected before uploading.
+            chunk_size (int): The size of each uploaded chunk.
+
+        Returns:
+            str: The digest of the uploaded blob.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+        """
+        if digest is not None and self.blob_exists(repository, digest):
+            return digest
+
+        with self.request(
+            "POST", f"/v2/{repository}/blobs/uploads/", repository=repository, push=True, expected=(202,)
+        ) as response:
+            response.read()
+            location = response.headers["Location"]
+
+        stream = _iter_chunks(source, chunk_size)
+        hasher = hashlib.sha256()
+        offset = 0
+        for chunk in stream:
+            hasher.update(chunk)
+            with self.request(
+                "PATCH",
+                location,
+                repository=repository,
+                push=True,
+                headers={
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": f"{offset}-{offset + len(chunk) - 1}",
+                },
+                body=chunk,
+                expected=(202,),
+            ) as response:
+                response.read()
+                location = response.headers.get("Location", location)
+            offset += len(chunk)
+
+        actual = "sha256:" + hasher.hexdigest()
+        if digest is not None and digest != actual:
+            raise ValueError(f"Blob digest mismatch: expected {digest}, got {actual}")
+        separator = "&" if "?" in location else "?"
+        with self.request(
+            "PUT",
+            f"{location}{separator}{urlencode({'digest': actual})}",
+            repository=repository,
+            push=True,
+            expected=(201,),
+        ) as response:
+            response.read()
+        return actual
+
+    def request(  # noqa: PLR0913
+        self,
+        method: str,
+        path: str,
+        *,
+        repository: Optional[str] = None,
+        push: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        body: Optional[bytes] = None,
+        expected: Tuple[int, ...] = (200,),
+    ) -> RegistryResponse:
+        """
+        Sends a request to the registry, authenticating and following
+        redirects as needed.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): A path on the registry, or an absolute URL.
+            repository (Optional[str]): The repository the request is for,
+                used to scope bearer tokens.
+            push (bool): Whether the request needs push access.
+            headers (Optional[Dict[str, str]]): Extra request headers.
+            body (Optional[bytes]): The request body.
+            expected (Tuple[int, ...]): The statuses treated as success.
+
+        Returns:
+            RegistryResponse: The response; close it when done.
+
+        Raises:
+            RegistryError: If the final status is not in `expected`.
+        """
+        scope = f"repository:{repository}:{'pull,push' if push else 'pull'}" if repository else ""
+        url = urljoin(self.base_url + "/", path)
+        response = self._send(method, url, headers, body, self._auth_header(scope))
+        if response.status == 401:
+            challenge = response.headers.get("WWW-Authenticate", "")
+            response.read()
+            response.close()
+            if self._authenticate(challenge, scope):
+                response = self._send(method, url, headers, body, self._auth_header(scope))
+
+        redirects = 0
+        while response.status in _REDIRECT_STATUSES and method in ("GET", "HEAD") and redirects < 5:
+            location = urljoin(response.url, response.headers["Location"])
+            response.read()
+            response.close()
+            same_host = urlsplit(location).netloc == urlsplit(self.base_url).netloc
+            response = self._send(method, location, headers, None, self._auth_header(scope) if same_host else {})
+            redirects += 1
+
+        if response.status not in expected:
+            # only read the start of the body: it may be a whole blob.
+            text = response.read(4096).decode(errors="replace") if method != "HEAD" else ""
+            response.close()
+            raise RegistryError(response.status, method, response.url, text)
+        return response
+
+    def _send(  # noqa: PLR0913
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Optional[bytes],
+        auth: Dict[str, str],
+    ) -> RegistryResponse:
+        """Sends one request over a pooled connection, retrying once on a stale connection."""
+        parts = urlsplit(url)
+        pool = self._pool(parts.scheme, parts.netloc)
+        target = parts.path + (f"?{parts.query}" if parts.query else "")
+        request_headers = {**(headers or {}), **auth}
+        if body is not None:
+            request_headers["Content-Length"] = str(len(body))
+        elif method in ("POST", "PUT", "PATCH"):
+            request_headers["Content-Length"] = "0"
+
+        for attempt in range(2):
+            connection = pool.acquire()
+            try:
+                connection.request(method, target, body=body, headers=request_headers)
+                response = connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if attempt:
+                    raise
+                continue
+            except BaseException:
+                connection.close()
+                raise
+            if method == "HEAD":
+                response.read()
+            return RegistryResponse(response, connection, pool, url)
+        raise AssertionError("unreachable")
+
+    def _pool(self, scheme: str, netloc: str) -> _ConnectionPool:
+        with self._lock:
+            pool = self._pools.get((scheme, netloc))
+            if pool is None:
+                pool = _ConnectionPool(scheme, netloc, self._timeout, self.MAX_IDLE_CONNECTIONS)
+                self._pools[(scheme, netloc)] = pool
+            return pool
+
+    def _auth_header(self, scope: str) -> Dict[str, str]:
+        with self._lock:
+            token = self._tokens.get(scope)
+            basic = self._basic
+        if token:
+            return {"Authorization": f"Bearer {token}"}
+        if basic and self._username:
+            return {"Authorization": f"Basic {self._basic_credentials()}"}
+        return {}
+
+    def _basic_credentials(self) -> str:
+        return base64.b64encode(f"{self._username}:{self._password or ''}".encode()).decode()
+
+    def _authenticate(self, challenge: str, scope: str) -> bool:
+        """
+        Answers a WWW-Authenticate challenge, returning True if the
+        request should be retried.
+        """
+        scheme = challenge.split(" ", 1)[0].lower()
+        if scheme == "basic":
+            if not self._username:
+                return False
+            with self._lock:
+                self._basic = True
+            return True
+        if scheme != "bearer":
+            return False
+
+        params = dict(_CHALLENGE_PARAM.findall(challenge))
+        realm = params.pop("realm", None)
+        if not realm:
+            return False
+        query = {"service": params.get("service", "")}
+        token_scope = params.get("scope") or scope
+        if token_scope:
+            query["scope"] = token_scope
+        headers = {}
+        if self._username:
+            headers["Authorization"] = f"Basic {self._basic_credentials()}"
+        separator = "&" if "?" in realm else "?"
+        with self._send("GET", f"{realm}{separator}{urlencode(query)}", headers, None, {}) as response:
+            body = response.read()
+            if response.status != 200:
+                raise RegistryError(response.status, "GET", realm, body.decode(errors="replace"))
+        document = json.loads(body)
+        token = document.get("token") or document.get("access_token")
+        if not token:
+            return False
+        with self._lock:
+            self._tokens[scope] = token
+        return True
+
+
+def _iter_chunks(source: bytes | IO[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Yields the content of `source` in chunks of at most `chunk_size` bytes."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for offset in range(0, len(view), chunk_size):
+            yield bytes(view[offset : offset + chunk_size])
+        return
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,274 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Parallel, resumable blob downloads using HTTP Range requests.
+
+A blob is fetched in fixed-size byte ranges by a pool of workers, each
+writing at its own offset into `<destination>.partial`. Completed ranges,
+and how far each range in progress got, are recorded in a sidecar
+journal, `<destination>.partial.json`, so an interrupted download resumes
+with only the missing bytes, whether the blob spans one range or many. The finished
+file is verified against the blob's sha256 digest before it is moved to
+its destination.
+"""
+
+import hashlib
+import http.client
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from .client import RegistryClient, RegistryError
+
+LOG = getLogger(__name__)
+
+DEFAULT_RANGE_SIZE = 32 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_RETRIES = 3
+_READ_SIZE = 1024 * 1024
+# bytes of a range written between journal updates, so that an interrupted
+# range resumes close to where it stopped rather than from its start.
+_CHECKPOINT_SIZE = 8 * 1024 * 1024
+_RETRYABLE = (OSError, http.client.HTTPException, RegistryError)
+
+
+class BlobDownloader:
+    """
+    A class to download blobs from one registry in parallel byte ranges,
+    resuming interrupted downloads.
+
+    Attributes:
+        client (RegistryClient): The client for the blobs' registry.
+        range_size (int): The size of each byte range.
+        max_workers (int): The number of ranges fetched at once.
+
+    Examples:
+        >>> downloader = BlobDownloader(client, range_size=64 * 1024 * 1024, max_workers=8)
+        >>> downloader.download("jozu-demos/llama", layer_descriptor, "blobs/weights")
+    """
+
+    def __init__(
+        self,
+        client: RegistryClient,
+        range_size: int = DEFAULT_RANGE_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+    ):
+        """
+        Initializes the BlobDownloader.
+
+        Args:
+            client (RegistryClient): The client for the blobs' registry.
+            range_size (int): The size of each byte range. Defaults to 32 MiB.
+            max_workers (int): The number of ranges fetched at once. Defaults to 4.
+
+        Raises:
+            ValueError: If range_size or max_workers is not positive.
+        """
+        if range_size < 1 or max_workers < 1:
+            raise ValueError("range_size and max_workers must be positive integers.")
+        self.client = client
+        self.range_size = range_size
+        self.max_workers = max_workers
+
+    def download(self, repository: str, descriptor: Dict[str, Any], destination: str | Path) -> Path:
+        """
+        Downloads a blob to a file, resuming any earlier interrupted
+        download of the same blob to the same destination.
+
+        Args:
+            repository (str): The repository holding the blob.
+            descriptor (Dict[str, Any]): The blob's OCI descriptor; "digest"
+                and "size" are used.
+            destination (str | Path): The file to write the blob to.
+
+        Returns:
+            Path: The destination path.
+
+        Raises:
+            RegistryError: If a range keeps failing after retries.
+            ValueError: If the downloaded content does not match the digest;
+                the partial file and journal are removed so the next
+                attempt starts over.
+        """
+        destination = Path(destination)
+        digest = descriptor["digest"]
+        size = int(descriptor.get("size") or 0)
+        partial = destination.with_name(destination.name + ".partial")
+        journal = destination.with_name(destination.name + ".partial.json")
+        destination.parent.mkdir(parents=True, exist_ok=True)
+
+        if not size:
+            # without a size there are no ranges to split the blob into.
+            self._fetch_whole(repository, digest, partial)
+        else:
+            try:
+                self._fetch_ranges(repository, digest, size, partial, journal)
+            except RegistryError as e:
+                if e.status != 200:
+                    raise
+                LOG.warning(f"Registry ignored the Range header for {digest}; downloading it in one request")
+                journal.unlink(missing_ok=True)
+                self._fetch_whole(repository, digest, partial)
+
+        actual = _file_digest(partial)
+        if actual != digest:
+            partial.unlink(missing_ok=True)
+            journal.unlink(missing_ok=True)
+            raise ValueError(f"Blob digest mismatch: expected {digest}, got {actual}")
+        os.replace(partial, destination)
+        journal.unlink(missing_ok=True)
+        return destination
+
+    def _fetch_whole(self, repository: str, digest: str, partial: Path) -> None:
+        """Downloads a blob in a single request."""
+        with open(partial, "wb") as f, self.client.open_blob(repository, digest) as response:
+            for chunk in response.iter_content(_READ_SIZE):
+                f.write(chunk)
+
+    def _fetch_ranges(self, repository: str, digest: str, size: int, partial: Path, journal: Path) -> None:
+        """Downloads every range, or the rest of every range, not yet recorded in the journal."""
+        journaled = _load_journal(journal, digest, size, self.range_size)
+        if journaled is None or not partial.exists() or partial.stat().st_size != size:
+            completed: Set[int] = set()
+            progress: Dict[int, int] = {}
+            with open(partial, "wb") as f:
+                f.truncate(size)
+            _save_journal(journal, digest, size, self.range_size, completed, progress=progress)
+        else:
+            completed, progress = journaled
+
+        count = (size + self.range_size - 1) // self.range_size
+        pending = [index for index in range(count) if index not in completed]
+        if completed or progress:
+            LOG.info(f"Resuming {digest}: {len(completed)} of {count} ranges already downloaded")
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def record(index: int, done: Optional[int]) -> None:
+            with lock:
+                if done is None:
+                    completed.add(index)
+                    progress.pop(index, None)
+                else:
+                    progress[index] = done
+                _save_journal(journal, digest, size, self.range_size, completed, progress=progress)
+
+        def fetch(index: int) -> None:
+            start = index * self.range_size
+            end = min(start + self.range_size, size) - 1
+            for attempt in range(DEFAULT_RETRIES):
+                if stop.is_set():
+                    return
+                # a retry picks up from the last checkpoint of the range.
+                offset = start + progress.get(index, 0)
+                try:
+                    self._fetch_range(
+                        repository, digest, partial, offset, end, checkpoint=lambda done: record(index, done - start)
+                    )
+                    break
+                except _RETRYABLE as e:
+                    if attempt == DEFAULT_RETRIES - 1 or getattr(e, "status", None) == 200:
+                        stop.set()
+                        raise
+                    LOG.warning(f"Retrying bytes {offset}-{end} of {digest}: {e}")
+            record(index, None)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(fetch, index) for index in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # e.g. a registry ignoring Range: the other ranges would
+                # each download the whole blob again, so stop them.
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _fetch_range(  # noqa: PLR0913
+        self, repository: str, digest: str, partial: Path, start: int, end: int, *, checkpoint: Callable[[int], None]
+    ) -> None:
+        """
+        Downloads one byte range into its place in the partial file,
+        calling checkpoint with the offset reached each time another
+        _CHECKPOINT_SIZE bytes are on disk.
+        """
+        with open(partial, "r+b") as f:
+            f.seek(start)
+            offset = checkpointed = start
+            with self.client.open_blob(repository, digest, start=start, end=end) as response:
+                for chunk in response.iter_content(_READ_SIZE):
+                    f.write(chunk)
+                    offset += len(chunk)
+                    if offset - checkpointed >= _CHECKPOINT_SIZE and offset <= end:
+                        # the bytes must be on disk before the journal claims them.
+                        f.flush()
+                        os.fsync(f.fileno())
+                        checkpoint(offset)
+                        checkpointed = offset
+            if offset != end + 1:
+                raise OSError(f"Short read for bytes {start}-{end}: got {offset - start} bytes")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def _load_journal(
+    journal: Path, digest: str, size: int, range_size: int
+) -> Optional[Tuple[Set[int], Dict[int, int]]]:
+    """
+    Returns the completed ranges, and the bytes done of ranges in progress,
+    recorded for this exact download, or None if there is no such journal.
+    """
+    try:
+        state = json.loads(journal.read_text(encoding="utf-8"))
+        if (state.get("digest"), state.get("size"), state.get("range_size")) != (digest, size, range_size):
+            return None
+        completed = {int(index) for index in state.get("completed", [])}
+        progress = {int(index): int(done) for index, done in (state.get("progress") or {}).items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        return None
+    return completed, progress
+
+
+def _save_journal(  # noqa: PLR0913
+    journal: Path, digest: str, size: int, range_size: int, completed: Set[int], *, progress: Dict[int, int]
+) -> None:
+    """Atomically records the completed ranges and the progress of the others."""
+    state = {
+        "digest": digest,
+        "size": size,
+        "range_size": range_size,
+        "completed": sorted(completed),
+        "progress": {str(index): done for index, done in sorted(progress.items())},
+    }
+    temporary = journal.with_name(journal.name + ".tmp")
+    temporary.write_text(json.dumps(state), encoding="utf-8")
+    os.replace(temporary, journal)
+
+
+def _file_digest(path: Path) -> str:
+    """Computes the sha256 digest of a file."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_READ_SIZE):
+            hasher.update(chunk)
+    return "sha256:" + hasher.hexdigest()
@@ -0,0 +1,292 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Unpack a ModelKit lazily, fetching each layer the first time one of its
+files is needed.
+
+Opening a LazyModelKit writes the Kitfile and an index of the ModelKit's
+layers (`.kitops-lazy.json`) into the directory straight away. Layers are
+then streamed in by `resolve` and `open` on demand, or in the background by
+`prefetch`. The index records which layers have landed, so a process that
+restarts against the same directory does not fetch them again.
+"""
+
+import functools
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Dict, List, Optional
+
+from .client import RegistryClient
+from .modelkit import (
+    TITLE_ANNOTATION,
+    check_descriptors,
+    iter_kitfile_layers,
+    layer_type,
+    select_layers,
+    stream_layer,
+    write_kitfile,
+)
+from .store import BlobStore
+
+LOG = getLogger(__name__)
+
+INDEX_FILE = ".kitops-lazy.json"
+
+
+class LazyModelKit:
+    """
+    A class to materialize a ModelKit's files on first use.
+
+    Attributes:
+        directory (Path): The directory the ModelKit is unpacked into.
+        digest (str): The manifest digest.
+        manifest (Dict[str, Any]): The ModelKit manifest.
+        layers (List[Dict[str, Any]]): One entry per layer with its Kitfile
+            "path", "digest", "mediaType", "size" and whether it has been
+            "materialized".
+
+    Examples:
+        >>> lazy = LazyModelKit.from_registry(client, "jozu-demos/llama", "latest", "llama")
+        >>> lazy.prefetch()
+        >>> with lazy.open("model/config.json") as f:
+        ...     config = json.load(f)
+    """
+
+    def __init__(
+        self,
+        client: RegistryClient,
+        repository: str,
+        directory: str | Path,
+        index: Dict[str, Any],
+        store: Optional[BlobStore] = None,
+    ):
+        """
+        Initializes the LazyModelKit from an index. Use
+        `LazyModelKit.from_registry` to create one from a registry.
+
+        Args:
+            client (RegistryClient): The client for the ModelKit's registry.
+            repository (str): The ModelKit's repository.
+            directory (str | Path): The directory to unpack into.
+            index (Dict[str, Any]): The index, as written by `from_registry`.
+            store (Optional[BlobStore]): A shared layer store to fetch
+                through. Defaults to None.
+        """
+        self._client = client
+        self._repository = repository
+        self._store = store
+        self.directory = Path(directory)
+        self.digest: str = index["digest"]
+        self.manifest: Dict[str, Any] = index["manifest"]
+        self.layers: List[Dict[str, Any]] = index["layers"]
+        self._lock = threading.Lock()
+        self._layer_locks = {layer["digest"]: threading.Lock() for layer in self.layers}
+
+    @classmethod
+    def from_registry(  # noqa: PLR0913
+        cls,
+        client: RegistryClient,
+        repository: str,
+        reference: str,
+        directory: str | Path,
+        *,
+        filters: Optional[List[str]] = None,
+        store: Optional[BlobStore] = None,
+    ) -> "LazyModelKit":
+        """
+        Writes the Kitfile and layer index of a ModelKit into a directory
+        without fetching any layer. An existing index for the same
+        manifest is reused, keeping the layers it records as materialized.
+
+        Args:
+            client (RegistryClient): The client for the ModelKit's registry.
+            repository (str): The ModelKit's repository.
+            reference (str): The tag or digest to unpack.
+            directory (str | Path): The directory to unpack into.
+            filters (Optional[List[str]]): The Kitfile sections that may be
+                fetched. Defaults to None, which allows every layer.
+            store (Optional[BlobStore]): A shared layer store to fetch
+                through. Defaults to None.
+
+        Returns:
+            LazyModelKit: The lazily unpacked ModelKit.
+
+        Raises:
+            RegistryError: If the registry returns an unexpected status.
+            ValueError: If a descriptor's digest is not a sha256 digest.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        manifest, digest = client.get_manifest(repository, reference)
+        check_descriptors(manifest)
+
+        index_path = directory / INDEX_FILE
+        try:
+            index = json.loads(index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            index = None
+        if index is None or index.get("digest") != digest:
+            config = json.loads(client.get_blob(repository, manifest["config"]["digest"]))
+            write_kitfile(config, directory)
+            index = {"digest": digest, "manifest": manifest, "layers": _index_layers(manifest, config, filters)}
+            _write_index(index_path, index)
+        return cls(client, repository, directory, index, store=store)
+
+    @property
+    def materialized(self) -> bool:
+        """Whether every layer has been fetched."""
+        return all(layer["materialized"] for layer in self.layers)
+
+    def _layer_for(self, path: str | Path) -> Optional[Dict[str, Any]]:
+        """Returns the layer holding a path, preferring the most specific entry."""
+        target = PurePosixPath(Path(path).as_posix())
+        if target.is_absolute():
+            target = target.relative_to(self.directory.resolve().as_posix())
+        matches = [
+            layer
+            for layer in self.layers
+            if target == PurePosixPath(layer["path"]) or PurePosixPath(layer["path"]) in target.parents
+        ]
+        return max(matches, key=lambda layer: len(PurePosixPath(layer["path"]).parts), default=None)
+
+    def resolve(self, path: str | Path) -> Path:
+        """
+        Returns the local path of a file or directory of the ModelKit,
+        fetching the layer holding it first if needed.
+
+        Args:
+            path (str | Path): The path, relative to the ModelKit's root.
+
+        Returns:
+            Path: The path inside `directory`.
+
+        Raises:
+            FileNotFoundError: If no layer holds the path and it does not
+                exist locally (like the Kitfile does).
+        """
+        layer = self._layer_for(path)
+        if layer is not None:
+            self._materialize(layer)
+        local = self.directory / path
+        if layer is None and not local.exists():
+            raise FileNotFoundError(f"'{path}' is not part of the ModelKit.")
+        return local
+
+    def open(self, path: str | Path, mode: str = "rb", **kwargs) -> IO[Any]:
+        """
+        Opens a file of the ModelKit, fetching the layer holding it first
+        if needed.
+
+        Args:
+            path (str | Path): The path, relative to the ModelKit's root.
+            mode (str): The mode, as for the builtin `open`. Defaults to "rb".
+            **kwargs: Passed to the builtin `open`.
+
+        Returns:
+            IO[Any]: The open file.
+        """
+        return open(self.resolve(path), mode, **kwargs)
+
+    def prefetch(self, max_workers: int = 2) -> List[Future]:
+        """
+        Starts fetching every layer not yet materialized in the background.
+        Files can still be resolved meanwhile; a layer being prefetched is
+        waited for rather than fetched twice.
+
+        Args:
+            max_workers (int): The number of layers fetched at once.
+                Defaults to 2.
+
+        Returns:
+            List[Future]: One future per pending layer.
+        """
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="kitops-prefetch")
+        futures = [executor.submit(self._materialize, layer) for layer in self.layers if not layer["materialized"]]
+        executor.shutdown(wait=False)
+        return futures
+
+    def _materialize(self, layer: Dict[str, Any]) -> None:
+        """Fetches a layer once, however many threads ask for it."""
+        if layer["materialized"]:
+            return
+        with self._layer_locks[layer["digest"]]:
+            if layer["materialized"]:
+                return
+            LOG.info(f"Fetching layer {layer['digest']} for '{layer['path']}'")
+            # stream_layer only moves a layer's files into place once the
+            # layer is verified, so a failed fetch leaves nothing to resolve.
+            if self._store is None:
+                stream_layer(self._client, self._repository, layer, self.directory)
+            else:
+                if not self._store.has(layer["digest"]):
+                    self._store.add(
+                        layer["digest"], functools.partial(stream_layer, self._client, self._repository, layer)
+                    )
+                self._store.materialize(layer["digest"], self.directory)
+            with self._lock:
+                layer["materialized"] = True
+                _write_index(
+                    self.directory / INDEX_FILE,
+                    {"digest": self.digest, "manifest": self.manifest, "layers": self.layers},
+                )
+
+
+def _index_layers(
+    manifest: Dict[str, Any], config: Dict[str, Any], filters: Optional[List[str]]
+) -> List[Dict[str, Any]]:
+    """
+    Pairs each selected layer with its Kitfile path, from its title
+    annotation or, failing that, from the order layers are packed in.
+    """
+    pending: Dict[str, List[str]] = {}
+    for kind, path in iter_kitfile_layers(config):
+        pending.setdefault(kind, []).append(path)
+
+    paths = {}
+    for layer in manifest.get("layers", []):
+        kind = layer_type(layer.get("mediaType", "")) or ""
+        queue = pending.get(kind) or []
+        title = (layer.get("annotations") or {}).get(TITLE_ANNOTATION)
+        if title in queue:
+            queue.remove(title)
+        elif queue:
+            title = queue.pop(0)
+        if title:
+            paths[layer["digest"]] = title
+
+    return [
+        {
+            "path": paths[layer["digest"]],
+            "digest": layer["digest"],
+            "mediaType": layer["mediaType"],
+            "size": layer.get("size"),
+            "materialized": False,
+        }
+        for layer in select_layers(manifest, filters)
+        if layer["digest"] in paths
+    ]
+
+
+def _write_index(path: Path, index: Dict[str, Any]) -> None:
+    """Atomically writes the lazy unpack index."""
+    temporary = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(index), encoding="utf-8")
+    os.replace(temporary, path)
@@ -0,0 +1,500 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+Pull and push ModelKits with a RegistryClient, without the kit CLI.
+
+A ModelKit is an OCI image manifest whose config blob is the Kitfile as
+JSON and whose layers are tarballs, one per Kitfile entry, holding the
+entry's files at their paths relative to the ModelKit's root.
+"""
+
+import functools
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from logging import getLogger
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from ..modelkit.kitfile import Kitfile
+from .client import DEFAULT_CHUNK_SIZE, OCI_MANIFEST_MEDIA_TYPE, RegistryClient, RegistryResponse, check_digest
+from .download import BlobDownloader
+from .store import BlobStore
+
+LOG = getLogger(__name__)
+
+MODELKIT_CONFIG_MEDIA_TYPE = "application/vnd.kitops.modelkit.config.v1+json"
+LAYER_MEDIA_TYPE_PREFIX = "application/vnd.kitops.modelkit."
+TITLE_ANNOTATION = "org.opencontainers.image.title"
+# where partially downloaded layers are kept, relative to the unpack directory.
+STAGING_DIRECTORY = ".kitops-download"
+
+# the Kitfile section each layer type belongs to, as used by unpack filters.
+LAYER_SECTIONS = {
+    "model": "model",
+    "modelpart": "model",
+    "code": "code",
+    "dataset": "datasets",
+    "docs": "docs",
+    "prompts": "prompts",
+}
+
+
+def layer_type(media_type: str) -> Optional[str]:
+    """
+    Extracts the ModelKit layer type from a layer media type.
+
+    Examples:
+        >>> layer_type("application/vnd.kitops.modelkit.dataset.v1.tar+gzip")
+        'dataset'
+
+    Args:
+        media_type (str): The layer media type.
+
+    Returns:
+        Optional[str]: The layer type, or None for non-ModelKit media types.
+    """
+    if not media_type.startswith(LAYER_MEDIA_TYPE_PREFIX):
+        return None
+    return media_type[len(LAYER_MEDIA_TYPE_PREFIX) :].split(".", 1)[0]
+
+
+def layer_section(layer: Dict[str, Any]) -> Optional[str]:
+    """
+    Returns the Kitfile section ("model", "code", "datasets", "docs" or
+    "prompts") a layer descriptor belongs to.
+    """
+    return LAYER_SECTIONS.get(layer_type(layer.get("mediaType", "")) or "")
+
+
+def check_descriptors(manifest: Dict[str, Any]) -> None:
+    """
+    Checks the digests of a manifest's config and layers, which are used
+    in blob URLs and staging file names.
+
+    Args:
+        manifest (Dict[str, Any]): The ModelKit manifest.
+
+    Raises:
+        ValueError: If a digest is not a sha256 digest.
+    """
+    for descriptor in (manifest["config"], *manifest.get("layers", [])):
+        check_digest(descriptor.get("digest"))
+
+
+def select_layers(manifest: Dict[str, Any], filters: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Selects the layer descriptors of a manifest matching the filters.
+
+    Args:
+        manifest (Dict[str, Any]): The ModelKit manifest.
+        filters (Optional[List[str]]): Kitfile sections to keep (e.g.
+            ["model", "datasets"]). Defaults to None, which keeps every layer.
+
+    Returns:
+        List[Dict[str, Any]]: The selected layer descriptors.
+    """
+    layers = manifest.get("layers", [])
+    if not filters:
+        return list(layers)
+    sections = {f.split(":", 1)[0] for f in filters}
+    return [layer for layer in layers if layer_section(layer) in sections]
+
+
+def open_layer_tar(fileobj: IO[bytes], media_type: str) -> tarfile.TarFile:
+    """
+    Opens a layer blob as a stream of tar members.
+
+    Args:
+        fileobj (IO[bytes]): The layer content.
+        media_type (str): The layer media type.
+
+    Returns:
+        tarfile.TarFile: A TarFile in streaming mode.
+
+    Raises:
+        ValueError: If the layer compression is not supported.
+    """
+    if media_type.endswith("+gzip"):
+        return tarfile.open(fileobj=fileobj, mode="r|gz")
+    if media_type.endswith(".tar") or media_type.endswith("tar"):
+        return tarfile.open(fileobj=fileobj, mode="r|")
+    raise ValueError(f"Unsupported layer media type: {media_type}")
+
+
+def extract_layer(fileobj: IO[bytes], media_type: str, directory: str | Path) -> List[str]:
+    """
+    Extracts a layer into a directory, refusing members that would land
+    outside of it.
+
+    Args:
+        fileobj (IO[bytes]): The layer content.
+        media_type (str): The layer media type.
+        directory (str | Path): The directory to extract into.
+
+    Returns:
+        List[str]: The names of the extracted members.
+    """
+    names = []
+    with open_layer_tar(fileobj, media_type) as tar:
+        for member in tar:
+            if hasattr(tarfile, "data_filter"):
+                tar.extract(member, directory, filter="data")
+            else:
+                target = Path(directory, member.name).resolve()
+                if not target.is_relative_to(Path(directory).resolve()) or member.issym() or member.islnk():
+                    raise ValueError(f"Refusing to extract unsafe member {member.name}")
+                tar.extract(member, directory)
+            names.append(member.name)
+    return names
+
+
+def write_kitfile(config: Dict[str, Any], directory: str | Path) -> Path:
+    """
+    Writes the Kitfile held in a ModelKit config blob into a directory.
+
+    Args:
+        config (Dict[str, Any]): The parsed config blob.
+        directory (str | Path): The directory to write the Kitfile to.
+
+    Returns:
+        Path: The path of the written Kitfile.
+    """
+    path = Path(directory, "Kitfile")
+    Kitfile(**config).save(str(path), print=False)
+    return path
+
+
+def pull_modelkit(  # noqa: PLR0913
+    client: RegistryClient,
+    repository: str,
+    reference: str,
+    directory: str | Path,
+    *,
+    filters: Optional[List[str]] = None,
+    downloader: Optional[BlobDownloader] = None,
+    store: Optional[BlobStore] = None,
+    stream: bool = False,
+) -> Dict[str, Any]:
+    """
+    Downloads a ModelKit and unpacks it into a directory.
+
+    By default, each selected layer is downloaded in parallel byte ranges
+    into a staging directory inside `directory`, verified against its
+    digest and extracted. If the pull is interrupted, pulling again into
+    the same directory resumes the partially downloaded layers.
+
+    With `stream`, layers are instead decompressed and extracted while
+    their bytes arrive, several layers at a time, so nothing is staged on
+    disk and extraction overlaps the download. The digest is checked once
+    each layer's stream ends; a streamed pull cannot be resumed.
+
+    With a `store`, layers are unpacked once into the shared store (and
+    only downloaded if missing from it), then linked into `directory`
+    according to the store's link mode. The store is trimmed to its size
+    limit afterwards.
+
+    The Kitfile is written from the config blob.
+
+    Args:
+        client (RegistryClient): The client for the ModelKit's registry.
+        repository (str): The repository, e.g. "jozu-demos/titanic-survivability".
+        reference (str): The tag or digest to pull.
+        directory (str | Path): The directory to unpack into.
+        filters (Optional[List[str]]): The Kitfile sections to unpack.
+            Defaults to None, which unpacks everything.
+        downloader (Optional[BlobDownloader]): The downloader used for
+            the layers. Defaults to None, which uses a BlobDownloader with
+            default settings. When streaming, its `max_workers` is the
+            number of layers streamed at once.
+        store (Optional[BlobStore]): The shared layer store to unpack
+            through. Defaults to None, which unpacks straight into
+            `directory`.
+        stream (bool): Whether to extract layers while they download.
+            Defaults to False.
+
+    Returns:
+        Dict[str, Any]: The ModelKit manifest.
+
+    Raises:
+        RegistryError: If the registry returns an unexpected status.
+        ValueError: If a descriptor's digest is not a sha256 digest, or a
+            blob does not match its digest. A streamed layer has already
+            been extracted by then and must not be trusted.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    manifest, _ = client.get_manifest(repository, reference)
+    check_descriptors(manifest)
+    config = json.loads(client.get_blob(repository, manifest["config"]["digest"]))
+
+    downloader = downloader or BlobDownloader(client)
+    staging = Path(directory, STAGING_DIRECTORY)
+
+    def unpack(layer: Dict[str, Any], target: Path) -> None:
+        if stream:
+            stream_layer(client, repository, layer, target)
+            return
+        if store is None:
+            destination = staging / layer["digest"].replace(":", "-")
+        else:
+            destination = store.staging_path(layer["digest"])
+        blob = downloader.download(repository, layer, destination)
+        _extract_blob(blob, layer["mediaType"], target)
+
+    def pull_layer(layer: Dict[str, Any]) -> None:
+        if store is None:
+            unpack(layer, Path(directory))
+            return
+        if not store.has(layer["digest"]):
+            store.add(layer["digest"], functools.partial(unpack, layer))
+        store.materialize(layer["digest"], directory)
+
+    # range downloads already keep the connection pool busy; streamed
+    # layers are single requests, so several are pulled at once.
+    with ThreadPoolExecutor(max_workers=downloader.max_workers if stream else 1) as executor:
+        for future in [executor.submit(pull_layer, layer) for layer in select_layers(manifest, filters)]:
+            future.result()
+
+    shutil.rmtree(staging, ignore_errors=True)
+    write_kitfile(config, directory)
+    if store is not None:
+        store.collect_garbage()
+    return manifest
+
+
+def stream_layer(client: RegistryClient, repository: str, layer: Dict[str, Any], directory: str | Path) -> List[str]:
+    """
+    Extracts a layer into a directory while it downloads, without staging
+    the blob on disk.
+
+    Members are extracted into a temporary directory inside `directory`
+    and only moved into place once the layer's digest and size have been
+    verified; on any failure nothing of the layer is left behind.
+
+    Args:
+        client (RegistryClient): The client for the layer's registry.
+        repository (str): The repository holding the layer.
+        layer (Dict[str, Any]): The layer descriptor.
+        directory (str | Path): The directory to extract into.
+
+    Returns:
+        List[str]: The names of the extracted members.
+
+    Raises:
+        RegistryError: If the registry returns an unexpected status.
+        ValueError: If the streamed content does not match the layer's
+            digest or size.
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".kitops-layer-", dir=directory))
+    try:
+        with client.open_blob(repository, layer["digest"]) as response:
+            reader = _HashingReader(response)
+            names = extract_layer(reader, layer["mediaType"], staging)
+            # tar readers stop at the end-of-archive marker; hash the padding too.
+            while reader.read(DEFAULT_CHUNK_SIZE):
+                pass
+        actual = "sha256:" + reader.hasher.hexdigest()
+        if actual != layer["digest"]:
+            raise ValueError(f"Blob digest mismatch: expected {layer['digest']}, got {actual}")
+        if layer.get("size") is not None and reader.size != layer["size"]:
+            raise ValueError(
+                f"Blob size mismatch for {layer['digest']}: expected {layer['size']}, got {reader.size}"
+            )
+        _publish(staging, Path(directory))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return names
+
+
+def _publish(staging: Path, directory: Path) -> None:
+    """Moves everything extracted into a staging directory to the same relative paths in directory."""
+    for root, directories, files in os.walk(staging):
+        target = directory / Path(root).relative_to(staging)
+        for name in directories:
+            if os.path.islink(os.path.join(root, name)):
+                files.append(name)
+            else:
+                (target / name).mkdir(exist_ok=True)
+        for name in files:
+            os.replace(os.path.join(root, name), target / name)
+
+
+def _extract_blob(blob: Path, media_type: str, directory: str | Path) -> None:
+    """Extracts a downloaded layer blob, then deletes it."""
+    with open(blob, "rb") as f:
+        extract_layer(f, media_type, directory)
+    blob.unlink()
+
+
+def iter_kitfile_layers(kitfile_data: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """
+    Yields (layer type, path) for every entry of a Kitfile, in the order
+    the layers are packed.
+
+    Args:
+        kitfile_data (Dict[str, Any]): The Kitfile as a dictionary.
+
+    Returns:
+        Iterator[Tuple[str, str]]: The layer types and entry paths.
+    """
+    model = kitfile_data.get("model") or {}
+    if model.get("path"):
+        yield "model", model["path"]
+    for part in model.get("parts") or []:
+        yield "modelpart", part["path"]
+    for section, kind in (("code", "code"), ("datasets", "dataset"), ("docs", "docs"), ("prompts", "prompts")):
+        for entry in kitfile_data.get(section) or []:
+            yield kind, entry["path"]
+
+
+def build_layer(directory: str | Path, path: str, target: IO[bytes]) -> Tuple[str, int]:
+    """
+    Writes a gzip-compressed tarball of one Kitfile entry.
+
+    File metadata is normalized so the same content always produces the
+    same digest.
+
+    Args:
+        directory (str | Path): The ModelKit's root directory.
+        path (str): The entry path relative to the root.
+        target (IO[bytes]): The file to write the tarball to.
+
+    Returns:
+        Tuple[str, int]: The digest and size of the tarball.
+
+    Raises:
+        ValueError: If the path does not exist.
+    """
+    root = Path(directory)
+    source = root / path
+    if not source.exists():
+        raise ValueError(f"Path '{source}' does not exist.")
+
+    def normalize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+        info.mtime = 0
+        info.uid = info.gid = 0
+        info.uname = info.gname = ""
+        return info
+
+    hashing = _HashingWriter(target)
+    # gzip's own mtime header is zeroed so the output is reproducible.
+    with gzip.GzipFile(filename="", mode="wb", fileobj=hashing, mtime=0) as compressed, tarfile.open(
+        fileobj=compressed, mode="w|", format=tarfile.PAX_FORMAT
+    ) as tar:
+        members = [source] if source.is_file() else [source, *sorted(source.rglob("*"))]
+        for member in members:
+            tar.add(member, arcname=member.relative_to(root).as_posix(), recursive=False, filter=normalize)
+    return "sha256:" + hashing.hasher.hexdigest(), hashing.size
+
+
+def push_modelkit(
+    client: RegistryClient,
+    repository: str,
+    tag: str,
+    directory: str | Path,
+    kitfile_data: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    Packs the Kitfile entries of a directory into layers and pushes them,
+    the config and the manifest to the registry.
+
+    Args:
+        client (RegistryClient): The client for the target registry.
+        repository (str): The repository to push to.
+        tag (str): The tag to push the manifest under.
+        directory (str | Path): The ModelKit's root directory.
+        kitfile_data (Optional[Dict[str, Any]]): The Kitfile as a dictionary.
+            Defaults to None, which reads the Kitfile in `directory`.
+
+    Returns:
+        str: The digest of the pushed manifest.
+
+    Raises:
+        RegistryError: If the registry returns an unexpected status.
+        ValueError: If an entry's path does not exist.
+    """
+    if kitfile_data is None:
+        kitfile = Kitfile(Path(directory, "Kitfile"))
+        kitfile_data = kitfile.model_dump(exclude_unset=True, exclude_none=True)
+
+    layers = []
+    for kind, path in iter_kitfile_layers(kitfile_data):
+        with tempfile.TemporaryFile() as staging:
+            digest, size = build_layer(directory, path, staging)
+            staging.seek(0)
+            client.upload_blob(repository, staging, digest=digest)
+        layers.append(
+            {
+                "mediaType": f"{LAYER_MEDIA_TYPE_PREFIX}{kind}.v1.tar+gzip",
+                "digest": digest,
+                "size": size,
+                "annotations": {TITLE_ANNOTATION: path},
+            }
+        )
+
+    config = json.dumps(kitfile_data, separators=(",", ":")).encode()
+    config_digest = client.upload_blob(repository, config, digest="sha256:" + hashlib.sha256(config).hexdigest())
+    manifest = {
+        "schemaVersion": 2,
+        "mediaType": OCI_MANIFEST_MEDIA_TYPE,
+        "config": {"mediaType": MODELKIT_CONFIG_MEDIA_TYPE, "digest": config_digest, "size": len(config)},
+        "layers": layers,
+    }
+    return client.put_manifest(repository, tag, manifest)
+
+
+class _HashingReader(io.RawIOBase):
+    """A read-only file object that hashes and counts what is read through it."""
+
+    def __init__(self, source: RegistryResponse):
+        self._source = source
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def read(self, size: int = -1) -> bytes:  # type: ignore[override]
+        data = self._source.read(None if size < 0 else size)
+        self.hasher.update(data)
+        self.size += len(data)
+        return data
+
+
+class _HashingWriter(io.RawIOBase):
+    """A write-only file object that hashes and counts what passes through it."""
+
+    def __init__(self, target: IO[bytes]):
+        self._target = target
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self.hasher.update(data)
+        self.size += len(data)
+        self._target.write(data)
+        return len(data)
@@ -0,0 +1,331 @@
+# Copyright 2024 The KitOps Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+# SPDX-License-Identifier: Apache-2.0
+
+"""
+A content-addressable store of unpacked ModelKit layers, shared by every
+working directory on a host.
+
+Each layer is unpacked once into `<root>/layers/sha256/<hex>/`, next to a
+`<hex>.json` record listing its files and total size. Working directories
+are then populated by hardlinking (or reflinking, or copying) those files
+instead of unpacking the layer again. The record's mtime is refreshed
+whenever the layer is used, which gives the garbage collector its
+least-recently-used order.
+
+Stored files are made read-only: a hardlinked file shares its inode with
+the store, so writing to it in place would corrupt every other working
+directory using the layer.
+"""
+
+import errno
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from logging import getLogger
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .client import check_digest
+
+LOG = getLogger(__name__)
+
+LINK_MODES = ("hardlink", "reflink", "copy")
+# Linux ioctl that clones a file's extents (copy-on-write) on btrfs, XFS, etc.
+_FICLONE = 0x40049409
+_WRITE_BITS = stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH
+
+
+def default_store_root() -> Path:
+    """
+    Returns the default store location: $KITOPS_BLOB_STORE if set, else
+    `kitops/blobs` under the user cache directory ($XDG_CACHE_HOME or
+    ~/.cache).
+    """
+    if os.environ.get("KITOPS_BLOB_STORE"):
+        return Path(os.environ["KITOPS_BLOB_STORE"])
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home, "kitops", "blobs")
+
+
+class BlobStore:
+    """
+    A class to share unpacked layers between working directories.
+
+    Attributes:
+        root (Path): The store directory.
+        max_size (Optional[int]): The size, in bytes, the garbage collector
+            trims the store down to. None keeps everything.
+        link_mode (str): How files are materialized into working
+            directories: "hardlink", "reflink" or "copy". Hardlinks and
+            reflinks fall back to copying when the filesystem refuses them.
+
+    Examples:
+        >>> store = BlobStore("/var/cache/kitops", max_size=50 * 1024**3)
+        >>> pull_modelkit(client, "jozu-demos/llama", "latest", "llama", store=store)
+    """
+
+    def __init__(
+        self,
+        root: Optional[str | Path] = None,
+        max_size: Optional[int] = None,
+        link_mode: str = "hardlink",
+    ):
+        """
+        Initializes the BlobStore, creating its directories if needed.
+
+        Args:
+            root (Optional[str | Path]): The store directory. Defaults to
+                None, which uses `default_store_root()`.
+            max_size (Optional[int]): The size limit enforced by
+                `collect_garbage`. Defaults to None (unbounded).
+            link_mode (str): "hardlink", "reflink" or "copy". Defaults to
+                "hardlink".
+
+        Raises:
+            ValueError: If link_mode is not supported.
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Invalid link mode '{link_mode}'. Must be one of {', '.join(LINK_MODES)}.")
+        self.root = Path(root) if root is not None else default_store_root()
+        self.max_size = max_size
+        self.link_mode = link_mode
+        self._layers = self.root / "layers" / "sha256"
+        self._staging = self.root / "staging"
+        self._layers.mkdir(parents=True, exist_ok=True)
+        self._staging.mkdir(parents=True, exist_ok=True)
+
+    def _paths(self, digest: str) -> Tuple[Path, Path]:
+        """Returns the content directory and record of a layer."""
+        hex_digest = check_digest(digest).partition(":")[2]
+        return self._layers / hex_digest, self._layers / f"{hex_digest}.json"
+
+    def has(self, digest: str) -> bool:
+        """
+        Checks whether a layer is fully unpacked in the store.
+
+        Args:
+            digest (str): The layer digest.
+
+        Returns:
+            bool: True if the layer is present.
+        """
+        return self._paths(digest)[1].exists()
+
+    def staging_path(self, digest: str) -> Path:
+        """
+        Returns where a layer blob should be downloaded before it is added.
+
+        The location is stable, so an interrupted download into it can be
+        resumed by a later pull.
+
+        Args:
+            digest (str): The layer digest.
+
+        Returns:
+            Path: The download destination.
+        """
+        return self._staging / digest.replace(":", "-")
+
+    def add(self, digest: str, populate: Callable[[Path], Any]) -> Path:
+        """
+        Adds a layer to the store unless it is already present.
+
+        Args:
+            digest (str): The layer digest.
+            populate (Callable[[Path], Any]): Called with an empty directory
+                to unpack the layer into.
+
+        Returns:
+            Path: The layer's content directory in the store.
+        """
+        content, record = self._paths(digest)
+        if record.exists():
+            return content
+
+        temporary = Path(tempfile.mkdtemp(prefix="layer-", dir=self._staging))
+        try:
+            populate(temporary)
+            files, size = _freeze(temporary)
+            try:
+                os.rename(temporary, content)
+            except OSError as e:
+                # another process added the same layer first.
+                if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                    raise
+        finally:
+            if temporary.exists():
+                shutil.rmtree(temporary)
+        _write_record(record, {"digest": digest, "size": size, "files": files})
+        return content
+
+    def materialize(self, digest: str, directory: str | Path) -> List[str]:
+        """
+        Populates a directory with a stored layer's files, replacing any
+        files already at those paths.
+
+        Args:
+            digest (str): The layer digest.
+            directory (str | Path): The directory to populate.
+
+        Returns:
+            List[str]: The relative paths of the materialized files.
+
+        Raises:
+            KeyError: If the layer is not in the store.
+        """
+        content, record = self._paths(digest)
+        try:
+            files = json.loads(record.read_text(encoding="utf-8"))["files"]
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        os.utime(record)
+
+        for name in files:
+            source = content / name
+            target = Path(directory, name)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.is_symlink() or target.exists():
+                target.unlink()
+            if source.is_symlink():
+                os.symlink(os.readlink(source), target)
+            else:
+                self._link(source, target)
+        return files
+
+    def _link(self, source: Path, target: Path) -> None:
+        """Materializes one file with the configured link mode."""
+        if self.link_mode == "hardlink":
+            try:
+                os.link(source, target)
+                return
+            except OSError as e:
+                LOG.debug(f"Hardlinking {source} failed ({e}); copying instead")
+        elif self.link_mode == "reflink" and _reflink(source, target):
+            os.chmod(target, source.stat().st_mode | stat.S_IWUSR)
+            return
+        shutil.copy2(source, target)
+        os.chmod(target, source.stat().st_mode | stat.S_IWUSR)
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """
+        Lists the stored layers, least recently used first.
+
+        Returns:
+            List[Dict[str, Any]]: One dictionary per layer with its
+                "digest", "size" and "last_used" (a POSIX timestamp).
+        """
+        entries = []
+        for record in self._layers.glob("*.json"):
+            try:
+                data = json.loads(record.read_text(encoding="utf-8"))
+                last_used = record.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append({"digest": data["digest"], "size": data["size"], "last_used": last_used})
+        return sorted(entries, key=lambda entry: entry["last_used"])
+
+    @property
+    def size(self) -> int:
+        """The total size, in bytes, of the stored layers."""
+        return sum(entry["size"] for entry in self.entries())
+
+    def remove(self, digest: str) -> None:
+        """
+        Removes a layer from the store. Working directories it was
+        hardlinked into keep their files.
+
+        Args:
+            digest (str): The layer digest.
+        """
+        content, record = self._paths(digest)
+        # dropping the record first makes the layer absent even if the
+        # content removal is interrupted.
+        record.unlink(missing_ok=True)
+        shutil.rmtree(content, ignore_errors=True)
+
+    def collect_garbage(self, max_size: Optional[int] = None) -> int:
+        """
+        Removes least recently used layers until the store fits the size
+        limit.
+
+        Space held by files still hardlinked from working directories is
+        only released once those copies are deleted too.
+
+        Args:
+            max_size (Optional[int]): The size limit. Defaults to None,
+                which uses the store's `max_size`; if both are None nothing
+                is removed.
+
+        Returns:
+            int: The number of bytes removed from the store.
+        """
+        limit = self.max_size if max_size is None else max_size
+        if limit is None:
+            return 0
+        entries = self.entries()
+        total = sum(entry["size"] for entry in entries)
+        removed = 0
+        for entry in entries:
+            if total <= limit:
+                break
+            LOG.info(f"Evicting layer {entry['digest']} ({entry['size']} bytes) from {self.root}")
+            self.remove(entry["digest"])
+            total -= entry["size"]
+            removed += entry["size"]
+        return removed
+
+
+def _freeze(directory: Path) -> Tuple[List[str], int]:
+    """Makes the files under a directory read-only; returns their relative paths and total size."""
+    files = []
+    size = 0
+    for current, _, names in os.walk(directory):
+        for name in names:
+            path = Path(current, name)
+            files.append(path.relative_to(directory).as_posix())
+            if path.is_symlink():
+                continue
+            info = path.stat()
+            size += info.st_size
+            os.chmod(path, info.st_mode & ~_WRITE_BITS)
+    return sorted(files), size
+
+
+def _write_record(record: Path, data: Dict[str, Any]) -> None:
+    """Atomically writes a layer record."""
+    temporary = record.with_name(f"{record.name}.{os.getpid()}.tmp")
+    temporary.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(temporary, record)
+
+
+def _reflink(source: Path, target: Path) -> bool:
+    """Clones a file copy-on-write where the platform and filesystem allow it."""
+    if not sys.platform.startswith("linux"):
+        return False
+    # fcntl only exists on POSIX platforms.
+    import fcntl  # noqa: PLC0415
+
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            return True
+        except OSError as e:
+            LOG.debug(f"Reflinking {source} failed ({e}); copying instead")
+    target.unlink()
+    return False
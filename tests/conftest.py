@@ -2,6 +2,9 @@ from pathlib import Path
 
 import pytest
 
+from tests.fake_kit import FakeKit
+from tests.fake_registry import FakeRegistry
+
 
 @pytest.fixture(scope="session")
 def fixtures():
@@ -15,3 +18,27 @@ def fixtures():
         map(lambda x: (x.name, x.resolve()), fixtures_folder.rglob("*"))
     )
     yield fixtures_dict
+
+
+@pytest.fixture
+def fake_kit(tmp_path, monkeypatch):
+    """
+    :return A fake `kit` executable placed first on PATH for the duration
+        of the test.
+    :rtype: FakeKit
+    """
+    kit = FakeKit(tmp_path / "fake-kit-bin")
+    for key, value in kit.env.items():
+        monkeypatch.setenv(key, value)
+    yield kit
+
+
+@pytest.fixture
+def fake_registry():
+    """
+    :return An in-process OCI registry stand-in, shut down after the test.
+    :rtype: FakeRegistry
+    """
+    registry = FakeRegistry()
+    yield registry
+    registry.close()
@@ -0,0 +1,93 @@
+"""
+A stand-in for the `kit` binary used to exercise the CLI wrappers without
+the real KitOps CLI.
+
+The fake records every invocation (one JSON-encoded argv per line) in the
+file named by FAKE_KIT_LOG and can be steered through environment variables:
+
+    FAKE_KIT_SLEEP: seconds to sleep before answering.
+    FAKE_KIT_EXIT: exit status to return (non-zero writes to stderr).
+    FAKE_KIT_FAIL_ON: only fail when this string appears in the argv.
+    FAKE_KIT_PROGRESS: number of progress updates to write to stderr, as a
+        progress bar redrawn with carriage returns.
+"""
+
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+from typing import List
+
+FAKE_KIT_SOURCE = """#!{python}
+import json
+import os
+import sys
+import time
+
+args = sys.argv[1:]
+if "--password-stdin" in args:
+    sys.stdin.read()
+log = os.environ.get("FAKE_KIT_LOG")
+if log:
+    with open(log, "a", encoding="utf-8") as f:
+        f.write(json.dumps(args) + "\\n")
+sleep = float(os.environ.get("FAKE_KIT_SLEEP", "0"))
+if sleep:
+    time.sleep(sleep)
+steps = int(os.environ.get("FAKE_KIT_PROGRESS", "0"))
+for step in range(1, steps + 1):
+    sys.stderr.write(f"Copying sha256:0123456789ab {{step}} MiB / {{steps}} MiB (1.5 MiB/s)\\r")
+    sys.stderr.flush()
+if steps:
+    sys.stderr.write("\\nDone\\n")
+code = int(os.environ.get("FAKE_KIT_EXIT", "0"))
+fail_on = os.environ.get("FAKE_KIT_FAIL_ON")
+if code and (not fail_on or fail_on in args):
+    sys.stderr.write("fake kit failure\\n")
+    sys.exit(code)
+cmd = args[0] if args else ""
+if cmd == "inspect":
+    print(json.dumps({{"schemaVersion": 2, "args": args}}))
+elif cmd == "info":
+    print("manifestVersion: '1.0'\\npackage:\\n  name: fake\\n")
+elif cmd == "version":
+    print("Version: 0.0.0-fake")
+else:
+    print("kit " + " ".join(args))
+"""
+
+
+class FakeKit:
+    """
+    Handle on an installed fake `kit` executable.
+
+    Attributes:
+        path (Path): Location of the fake executable.
+        log (Path): File in which invocations are recorded.
+    """
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / "kit"
+        self.log = directory / "kit-calls.log"
+        self.path.write_text(FAKE_KIT_SOURCE.format(python=sys.executable), encoding="utf-8")
+        self.path.chmod(self.path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+    @property
+    def env(self) -> dict:
+        """Environment variables that put the fake first on PATH."""
+        return {
+            "PATH": f"{self.path.parent}{os.pathsep}{os.environ.get('PATH', '')}",
+            "FAKE_KIT_LOG": str(self.log),
+        }
+
+    def calls(self) -> List[List[str]]:
+        """Return the recorded invocations, oldest first."""
+        if not self.log.exists():
+            return []
+        return [json.loads(line) for line in self.log.read_text(encoding="utf-8").splitlines()]
+
+    def commands(self) -> List[str]:
+        """Return the kit sub-command of every recorded invocation."""
+        return [call[0] for call in self.calls()]
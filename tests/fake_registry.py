@@ -0,0 +1,200 @@
+"""
+An in-process stand-in for an OCI registry, implementing just enough of
+the distribution API to exercise `kitops.oci`.
+
+Blobs and manifests are held in memory. When `token` is set, every /v2/
+request must carry that bearer token, which is handed out by /token to
+clients presenting the configured basic credentials.
+"""
+
+import base64
+import hashlib
+import json
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+_MANIFEST = re.compile(r"^/v2/(?P<repo>.+)/manifests/(?P<ref>[^/]+)$")
+_BLOB = re.compile(r"^/v2/(?P<repo>.+)/blobs/(?P<digest>sha256:[0-9a-f]{64})$")
+_UPLOADS = re.compile(r"^/v2/(?P<repo>.+)/blobs/uploads/$")
+_UPLOAD = re.compile(r"^/v2/(?P<repo>.+)/blobs/uploads/(?P<id>[0-9a-f-]+)$")
+
+
+class FakeRegistry:
+    """
+    Handle on a running fake registry.
+
+    Attributes:
+        address (str): "host:port" the registry listens on.
+        blobs (Dict[str, bytes]): Stored blobs by digest.
+        manifests (Dict[Tuple[str, str], Tuple[bytes, str]]): Stored manifest
+            bodies and media types by (repository, tag or digest).
+        requests (List[Tuple[str, str]]): (method, path) of every request.
+        ranges (List[str]): The Range header of every ranged blob request.
+        ignore_range (bool): Whether to answer Range requests with the whole
+            blob, like registries without range support.
+    """
+
+    def __init__(self, username: Optional[str] = None, password: Optional[str] = None, token: Optional[str] = None):
+        self.username = username
+        self.password = password
+        self.token = token
+        self.blobs: Dict[str, bytes] = {}
+        self.manifests: Dict[Tuple[str, str], Tuple[bytes, str]] = {}
+        self.uploads: Dict[str, bytearray] = {}
+        self.requests: List[Tuple[str, str]] = []
+        self.ranges: List[str] = []
+        self.connections = 0
+        # when set, Range headers are ignored and whole blobs are returned.
+        self.ignore_range = False
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self))
+        self._server.daemon_threads = True
+        self.address = f"127.0.0.1:{self._server.server_address[1]}"
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def add_blob(self, data: bytes) -> str:
+        digest = "sha256:" + hashlib.sha256(data).hexdigest()
+        self.blobs[digest] = data
+        return digest
+
+    def add_manifest(self, repository: str, tag: str, manifest: dict) -> str:
+        body = json.dumps(manifest).encode()
+        digest = "sha256:" + hashlib.sha256(body).hexdigest()
+        media_type = manifest.get("mediaType", "application/vnd.oci.image.manifest.v1+json")
+        self.manifests[(repository, tag)] = (body, media_type)
+        self.manifests[(repository, digest)] = (body, media_type)
+        return digest
+
+    def count(self, method: str, pattern: str = "") -> int:
+        return sum(1 for m, path in self.requests if m == method and pattern in path)
+
+
+def _handler_for(registry: FakeRegistry):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # buffer responses so headers and body leave in one segment.
+        wbufsize = 1 << 16
+
+        def setup(self):
+            super().setup()
+            with registry.lock:
+                registry.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes = b"", headers: Optional[Dict[str, str]] = None):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(body)
+
+        def _body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _authorized(self) -> bool:
+            if registry.token is None:
+                return True
+            if self.headers.get("Authorization") == f"Bearer {registry.token}":
+                return True
+            realm = f"http://{registry.address}/token"
+            self._send(401, b"{}", {"WWW-Authenticate": f'Bearer realm="{realm}",service="fake"'})
+            return False
+
+        def _token(self):
+            expected = base64.b64encode(f"{registry.username}:{registry.password}".encode()).decode()
+            if self.headers.get("Authorization") != f"Basic {expected}":
+                return self._send(401)
+            self._send(200, json.dumps({"token": registry.token}).encode())
+
+        def _handle(self):
+            parts = urlsplit(self.path)
+            with registry.lock:
+                registry.requests.append((self.command, parts.path))
+            body = self._body() if self.command in ("POST", "PUT", "PATCH") else b""
+            if parts.path == "/token":
+                return self._token()
+            if not self._authorized():
+                return None
+
+            routes = (
+                (_MANIFEST, self._manifest),
+                (_BLOB, self._blob),
+                (_UPLOADS, self._start_upload),
+                (_UPLOAD, self._upload),
+            )
+            for pattern, route in routes:
+                if match := pattern.match(parts.path):
+                    return route(body=body, query=parse_qs(parts.query), **match.groupdict())
+            return self._send(404)
+
+        def _start_upload(self, repo: str, **_):
+            upload_id = str(uuid.uuid4())
+            registry.uploads[upload_id] = bytearray()
+            return self._send(202, headers={"Location": f"/v2/{repo}/blobs/uploads/{upload_id}"})
+
+        def _manifest(self, repo: str, ref: str, body: bytes, **_):
+            repository, reference = repo, ref
+            if self.command == "PUT":
+                digest = "sha256:" + hashlib.sha256(body).hexdigest()
+                media_type = self.headers.get("Content-Type")
+                registry.manifests[(repository, reference)] = (body, media_type)
+                registry.manifests[(repository, digest)] = (body, media_type)
+                return self._send(201, headers={"Docker-Content-Digest": digest})
+            stored = registry.manifests.get((repository, reference))
+            if stored is None:
+                return self._send(404)
+            content, media_type = stored
+            digest = "sha256:" + hashlib.sha256(content).hexdigest()
+            return self._send(200, content, {"Content-Type": media_type, "Docker-Content-Digest": digest})
+
+        def _blob(self, digest: str, **_):
+            data = registry.blobs.get(digest)
+            if data is None:
+                return self._send(404)
+            requested = self.headers.get("Range")
+            if requested:
+                with registry.lock:
+                    registry.ranges.append(requested)
+            if not requested or registry.ignore_range:
+                return self._send(200, data)
+            start_text, end_text = requested.removeprefix("bytes=").split("-")
+            start = int(start_text)
+            end = int(end_text) if end_text else len(data) - 1
+            chunk = data[start : end + 1]
+            headers = {"Content-Range": f"bytes {start}-{end}/{len(data)}"}
+            return self._send(206, chunk, headers)
+
+        def _upload(self, repo: str, id: str, body: bytes, query: Dict[str, List[str]], **_):
+            repository, upload_id = repo, id
+            buffer = registry.uploads.get(upload_id)
+            if buffer is None:
+                return self._send(404)
+            location = f"/v2/{repository}/blobs/uploads/{upload_id}"
+            if self.command == "PATCH":
+                buffer.extend(body)
+                return self._send(202, headers={"Location": location, "Range": f"0-{len(buffer) - 1}"})
+            buffer.extend(body)
+            digest = query["digest"][0]
+            if "sha256:" + hashlib.sha256(bytes(buffer)).hexdigest() != digest:
+                return self._send(400, b"digest mismatch")
+            registry.blobs[digest] = bytes(buffer)
+            del registry.uploads[upload_id]
+            return self._send(201, headers={"Docker-Content-Digest": digest})
+
+        do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = _handle
+
+    return Handler
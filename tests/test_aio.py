@@ -0,0 +1,98 @@
+import asyncio
+import subprocess
+import time
+
+import pytest
+
+from kitops.cli import aio
+
+
+@pytest.fixture(autouse=True)
+def reset_concurrency_limit():
+    yield
+    aio.set_concurrency_limit(None)
+
+
+def test_pull_runs_kit(fake_kit):
+    asyncio.run(aio.pull("jozu.ml/jozu/model:latest"))
+    assert fake_kit.calls() == [["pull", "jozu.ml/jozu/model:latest"]]
+
+
+def test_info_and_inspect_parse_output(fake_kit):
+    kit_info = asyncio.run(aio.info("jozu.ml/jozu/model:latest", filters=["model"], remote=True))
+    assert kit_info["package"]["name"] == "fake"
+
+    kit_inspect = asyncio.run(aio.inspect("jozu.ml/jozu/model:latest"))
+    assert kit_inspect["schemaVersion"] == 2
+
+    assert fake_kit.calls()[0] == ["info", "jozu.ml/jozu/model:latest", "--filter", "model", "--remote"]
+
+
+def test_non_zero_exit_raises_called_process_error(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_EXIT", "3")
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        asyncio.run(aio.push("jozu.ml/jozu/model:latest"))
+    assert excinfo.value.returncode == 3
+    assert "fake kit failure" in excinfo.value.stderr
+
+
+def test_cancellation_kills_child(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_SLEEP", "30")
+
+    async def cancel_pull():
+        task = asyncio.create_task(aio.pull("jozu.ml/jozu/model:latest"))
+        await asyncio.sleep(0.5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    started = time.monotonic()
+    asyncio.run(cancel_pull())
+    assert time.monotonic() - started < 10
+
+
+def test_concurrency_limit_serializes_processes(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_SLEEP", "0.3")
+    aio.set_concurrency_limit(1)
+
+    async def run_three():
+        await asyncio.gather(*(aio.tag("a/b/c:1", f"a/b/c:{i}") for i in range(3)))
+
+    started = time.monotonic()
+    asyncio.run(run_three())
+    assert time.monotonic() - started >= 0.9
+    assert fake_kit.commands() == ["tag", "tag", "tag"]
+
+
+@pytest.mark.parametrize("limit", [0, -1, 1.5])
+def test_invalid_concurrency_limit(limit):
+    with pytest.raises(ValueError):
+        aio.set_concurrency_limit(limit)
+
+
+def test_pull_streams_progress_to_async_callback(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_PROGRESS", "3")
+    events = []
+
+    async def record(event):
+        events.append(event)
+
+    asyncio.run(aio.pull("jozu.ml/jozu/model:latest", on_progress=record))
+    assert [event.percent for event in events if event.is_progress] == [33.33, 66.67, 100.0]
+
+
+def test_iter_progress_yields_events_then_raises(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_PROGRESS", "2")
+
+    async def collect():
+        return [event async for event in aio.iter_progress(aio.push, "jozu.ml/jozu/model:latest")]
+
+    events = asyncio.run(collect())
+    assert [event.line for event in events if event.is_progress] == [
+        "Copying sha256:0123456789ab 1 MiB / 2 MiB (1.5 MiB/s)",
+        "Copying sha256:0123456789ab 2 MiB / 2 MiB (1.5 MiB/s)",
+    ]
+
+    monkeypatch.setenv("FAKE_KIT_EXIT", "5")
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(collect())
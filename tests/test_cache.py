@@ -0,0 +1,151 @@
+import asyncio
+import gc
+import weakref
+
+import pytest
+
+from kitops.cli import aio, kit
+from kitops.cli.cache import ResultCache, _pending
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_inspect_answers_from_cache(fake_kit):
+    cache = ResultCache()
+    first = kit.inspect("jozu.ml/jozu/model:latest", remote=True, cache=cache)
+    second = kit.inspect("jozu.ml/jozu/model:latest", remote=True, cache=cache)
+
+    assert first == second
+    assert fake_kit.commands() == ["inspect"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_includes_remote_and_filters(fake_kit):
+    cache = ResultCache()
+    kit.info("jozu.ml/jozu/model:latest", cache=cache)
+    kit.info("jozu.ml/jozu/model:latest", remote=True, cache=cache)
+    kit.info("jozu.ml/jozu/model:latest", filters=["model"], cache=cache)
+    kit.info("jozu.ml/jozu/model:latest", filters=["model"], cache=cache)
+
+    assert fake_kit.commands() == ["info", "info", "info"]
+
+
+def test_key_includes_other_flags(fake_kit):
+    cache = ResultCache()
+    kit.inspect("jozu.ml/jozu/model:latest", cache=cache)
+    kit.inspect("jozu.ml/jozu/model:latest", r=True, cache=cache)
+    kit.inspect("jozu.ml/jozu/model:latest", r=True, cache=cache)
+    kit.info("jozu.ml/jozu/model:latest", config="/tmp/a", cache=cache)
+    kit.info("jozu.ml/jozu/model:latest", config="/tmp/b", cache=cache)
+    asyncio.run(aio.inspect("jozu.ml/jozu/model:latest", plain_http=True, cache=cache))
+
+    assert fake_kit.commands() == ["inspect", "inspect", "info", "info", "inspect"]
+    assert ["inspect", "jozu.ml/jozu/model:latest", "-r"] in fake_kit.calls()
+
+
+def test_cached_values_are_copies(fake_kit):
+    cache = ResultCache()
+    kit.info("jozu.ml/jozu/model:latest", cache=cache)["package"]["name"] = "changed"
+    assert kit.info("jozu.ml/jozu/model:latest", cache=cache)["package"]["name"] == "fake"
+
+
+def test_tags_expire_but_digests_do_not():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    digest_tag = "jozu.ml/jozu/model@sha256:" + "a" * 64
+    cache.put(ResultCache.key("inspect", "jozu.ml/jozu/model:latest"), "jozu.ml/jozu/model:latest", {"v": 1})
+    cache.put(ResultCache.key("inspect", digest_tag), digest_tag, {"v": 2})
+
+    clock.now += 11
+    assert cache.get(ResultCache.key("inspect", "jozu.ml/jozu/model:latest")) == (False, None)
+    assert cache.get(ResultCache.key("inspect", digest_tag)) == (True, {"v": 2})
+
+
+def test_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    for name in ["a", "b"]:
+        cache.put(name, name, name)
+    cache.get("a")
+    cache.put("c", "c", "c")
+
+    assert len(cache) == 2
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, "a")
+
+
+def test_persistence(tmp_path):
+    path = tmp_path / "cache" / "kit-results.json"
+    cache = ResultCache(path=path)
+    cache.put(ResultCache.key("info", "jozu.ml/jozu/model:latest"), "jozu.ml/jozu/model:latest", {"v": 1})
+    cache.flush()
+
+    reloaded = ResultCache(path=path)
+    assert reloaded.get(ResultCache.key("info", "jozu.ml/jozu/model:latest")) == (True, {"v": 1})
+
+    with reloaded:
+        reloaded.invalidate("jozu.ml/jozu/model:latest")
+    assert len(ResultCache(path=path)) == 0
+
+
+def test_writes_are_batched(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "kit-results.json"
+    cache = ResultCache(path=path, clock=clock, flush_interval=5)
+    for name in ["a", "b", "c"]:
+        cache.put(name, name, name)
+    assert not path.exists()
+
+    clock.now += 5
+    cache.put("d", "d", "d")
+    assert len(ResultCache(path=path, clock=clock)) == 4
+
+
+def test_sha512_digests_do_not_expire():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    pinned = "jozu.ml/jozu/model@sha512:" + "a" * 128
+    cache.put(ResultCache.key("inspect", pinned), pinned, {"v": 1})
+
+    clock.now += 11
+    assert cache.get(ResultCache.key("inspect", pinned)) == (True, {"v": 1})
+
+
+def test_persisted_caches_are_not_kept_alive(tmp_path):
+    cache = ResultCache(path=tmp_path / "kit-results.json", flush_interval=60)
+    cache.put("key", "jozu.ml/jozu/model:latest", {"v": 1})
+    assert cache in _pending
+
+    cache.flush()
+    assert cache not in _pending
+
+    cache.put("other", "jozu.ml/jozu/model:latest", {"v": 2})
+    ref = weakref.ref(cache)
+    del cache
+    gc.collect()
+    assert ref() is None
+
+
+@pytest.mark.parametrize("content", ["{}", "[[1, 2]]", '[["key", "soon", 1], "row"]', "[null]"])
+def test_malformed_persistence_file_is_ignored(tmp_path, content):
+    path = tmp_path / "kit-results.json"
+    path.write_text(content)
+    assert len(ResultCache(path=path)) == 0
+
+
+def test_async_inspect_uses_cache(fake_kit):
+    cache = ResultCache()
+    asyncio.run(aio.inspect("jozu.ml/jozu/model:latest", cache=cache))
+    asyncio.run(aio.inspect("jozu.ml/jozu/model:latest", cache=cache))
+    assert fake_kit.commands() == ["inspect"]
+
+
+@pytest.mark.parametrize("kwargs", [{"max_entries": 0}, {"ttl": -1}, {"flush_interval": -1}])
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        ResultCache(**kwargs)
@@ -0,0 +1,126 @@
+import base64
+import json
+import os
+
+import pytest
+
+from kitops.modelkit import credentials
+from kitops.modelkit.credentials import (
+    CallableProvider,
+    CredentialProvider,
+    DockerConfigProvider,
+    DotEnvProvider,
+    EnvironmentProvider,
+    FileProvider,
+    clear_credentials_cache,
+    resolve_credentials,
+    set_credential_providers,
+)
+from kitops.modelkit.user import UserCredentials
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch, tmp_path):
+    for name in credentials.ENVIRONMENT_VARIABLES.values():
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.chdir(tmp_path)
+    clear_credentials_cache()
+    yield
+    set_credential_providers(None)
+    clear_credentials_cache()
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Counts how often .env files are parsed."""
+    calls = []
+    parse = credentials._parse_dotenv
+
+    def counting(path):
+        calls.append(path)
+        return parse(path)
+
+    monkeypatch.setattr(credentials, "_parse_dotenv", counting)
+    return calls
+
+
+def test_dotenv_is_parsed_once_until_it_changes(tmp_path, parses):
+    env = tmp_path / ".env"
+    env.write_text("JOZU_USERNAME=alice\nJOZU_PASSWORD=one\n")
+    (tmp_path / "sub").mkdir()
+    os.chdir(tmp_path / "sub")
+
+    assert UserCredentials().password == "one"
+    assert UserCredentials().password == "one"
+    assert len(parses) == 1
+
+    env.write_text("JOZU_USERNAME=alice\nJOZU_PASSWORD=second\n")
+    os.utime(env, ns=(env.stat().st_atime_ns, env.stat().st_mtime_ns + 1_000_000))
+    assert UserCredentials().password == "second"
+    assert len(parses) == 2
+    assert "JOZU_PASSWORD" not in os.environ
+
+
+def test_dotenv_overrides_environment(tmp_path, monkeypatch):
+    (tmp_path / ".env").write_text("JOZU_PASSWORD=from-file\n")
+    monkeypatch.setenv("JOZU_USERNAME", "bob")
+    monkeypatch.setenv("JOZU_PASSWORD", "from-env")
+    monkeypatch.setenv("JOZU_REGISTRY", "jozu.ml")
+    assert resolve_credentials() == {
+        "username": "bob",
+        "password": "from-file",
+        "registry": "jozu.ml",
+        "namespace": None,
+    }
+
+
+def test_explicit_credentials_consult_no_provider(parses, tmp_path):
+    (tmp_path / ".env").write_text("JOZU_USERNAME=alice\nJOZU_PASSWORD=one\n")
+    set_credential_providers([CallableProvider(lambda: pytest.fail("provider consulted"))])
+    user = UserCredentials(username="me", password="secret")
+    assert (user.username, user.registry) == ("me", None)
+    assert parses == []
+
+
+def test_missing_credentials_raise():
+    with pytest.raises(ValueError, match="Username and password must be provided"):
+        UserCredentials(username="me")
+
+
+def test_file_and_docker_config_providers(tmp_path):
+    (tmp_path / "creds.json").write_text(json.dumps({"username": "carol", "password": "pw", "namespace": "team"}))
+    assert resolve_credentials([FileProvider(tmp_path / "creds.json")])["namespace"] == "team"
+
+    auth = base64.b64encode(b"dave:token").decode()
+    config = {"auths": {"https://index.docker.io/v1/": {"auth": "bm9wZQ=="}, "jozu.ml": {"auth": auth}}}
+    (tmp_path / "config.json").write_text(json.dumps(config))
+    provider = DockerConfigProvider("jozu.ml", path=tmp_path / "config.json")
+    assert resolve_credentials([provider]) == {
+        "username": "dave",
+        "password": "token",
+        "registry": "jozu.ml",
+        "namespace": None,
+    }
+    assert DockerConfigProvider("ghcr.io", path=tmp_path / "config.json").credentials() is None
+
+
+def test_providers_are_chained_per_value(monkeypatch):
+    monkeypatch.setenv("JOZU_NAMESPACE", "env-namespace")
+    set_credential_providers([CallableProvider(lambda: {"username": "erin", "password": "pw"}), EnvironmentProvider()])
+    user = UserCredentials()
+    assert (user.username, user.namespace) == ("erin", "env-namespace")
+    assert DotEnvProvider().credentials() is None
+
+
+def test_provider_must_implement_credentials():
+    class Incomplete(CredentialProvider):
+        pass
+
+    class Static(CredentialProvider):
+        def credentials(self):
+            return {"username": "erin", "password": "pw"}
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    set_credential_providers([Static()])
+    assert UserCredentials().username == "erin"
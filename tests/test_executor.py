@@ -0,0 +1,58 @@
+import subprocess
+
+import pytest
+
+from kitops.cli import kit
+from kitops.cli.executor import CommandExecutor, SubprocessExecutor, get_executor, set_executor
+
+
+class RecordingExecutor(CommandExecutor):
+    def __init__(self):
+        self.commands = []
+
+    def run(self, command, input=None):
+        self.commands.append((command, input))
+        return subprocess.CompletedProcess(command, 0, stdout="Version: 0.0.0-recorded", stderr="")
+
+
+@pytest.fixture
+def recording():
+    executor = RecordingExecutor()
+    set_executor(executor)
+    yield executor
+    set_executor(None)
+
+
+def test_default_executor_spawns_a_process_per_command():
+    assert isinstance(get_executor(), SubprocessExecutor)
+
+
+def test_commands_run_through_the_executor_set(fake_kit, recording):
+    assert kit.version() == "Version: 0.0.0-recorded"
+    kit.login("user", "secret", "jozu.ml")
+    assert recording.commands == [
+        (["kit", "version"], None),
+        (["kit", "login", "jozu.ml", "--username", "user", "--password-stdin"], "secret"),
+    ]
+    assert fake_kit.calls() == []
+
+
+def test_subprocess_executor_raises_on_failure(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_EXIT", "4")
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        kit.version()
+    assert excinfo.value.returncode == 4
+    assert "fake kit failure" in excinfo.value.stderr
+
+
+def test_missing_executable_raises_os_error():
+    with pytest.raises(FileNotFoundError):
+        SubprocessExecutor().run(["kit-does-not-exist"])
+
+
+def test_executor_must_implement_run():
+    class Incomplete(CommandExecutor):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from kitops.cli import kit
+from kitops.cli.utils import COMMAND_FLAGS, _process_command_flags, validate_flags
+
+
+def test_flags_follow_the_order_given():
+    flags = _process_command_flags("pull", concurrency=8, plain_http=True, proxy="http://proxy:3128", v=True)
+    assert flags == ["--concurrency", "8", "--plain-http", "--proxy", "http://proxy:3128", "-v"]
+
+
+@pytest.mark.parametrize(
+    ("command", "kwargs", "expected"),
+    [
+        ("remove", {"a": True, "force": True, "r": True}, ["-a", "--force", "-r"]),
+        ("pack", {"f": Path("dir/Kitfile"), "compression": "zstd"}, ["-f", "dir/Kitfile", "--compression", "zstd"]),
+        ("import", {"t": "jozu.ml/org/repo:v1", "token": "secret"}, ["-t", "jozu.ml/org/repo:v1", "--token", "secret"]),
+        ("version", {"show_update_notifications": True}, ["--show-update-notifications"]),
+        ("unpack", {"o": True, "log-level": "debug"}, ["-o", "--log-level", "debug"]),
+    ],
+)
+def test_aliases_and_spellings(command, kwargs, expected):
+    assert _process_command_flags(command, **kwargs) == expected
+
+
+def test_false_none_and_empty_values_are_omitted():
+    assert _process_command_flags("pull", plain_http=False, proxy=None, verbose=False, cert="") == []
+
+
+def test_unknown_flag_is_rejected():
+    with pytest.raises(TypeError, match="Unknown flag 'overwrite' for 'kit pull'"):
+        _process_command_flags("pull", overwrite=True)
+    with pytest.raises(TypeError, match="Unknown flag 'tag'"):
+        kit.pull("jozu.ml/org/repo:v1", tag="v2")
+
+
+def test_flag_given_twice_is_rejected():
+    with pytest.raises(TypeError, match="given twice"):
+        _process_command_flags("remove", force=True, f=True)
+    with pytest.raises(TypeError, match="given twice"):
+        validate_flags("pull", **{"plain-http": True, "plain_http": True})
+
+
+def test_wrong_type_is_rejected():
+    with pytest.raises(TypeError, match="'plain_http' for 'kit pull' must be bool, not str"):
+        validate_flags("pull", plain_http="yes")
+    with pytest.raises(TypeError, match="must be int or str"):
+        validate_flags("pull", concurrency=1.5)
+    validate_flags("pack", file=Path("Kitfile"), v=True)
+
+
+def test_unknown_command_is_rejected():
+    with pytest.raises(ValueError, match="Unknown kit command 'frobnicate'"):
+        _process_command_flags("frobnicate", v=True)
+    with pytest.raises(ValueError, match="Unknown kit command 'frobnicate'"):
+        _process_command_flags("frobnicate")
+
+
+def test_every_command_accepts_the_global_flags():
+    for command in COMMAND_FLAGS:
+        assert _process_command_flags(command, help=True, config="/tmp/kit") == ["--help", "--config", "/tmp/kit"]
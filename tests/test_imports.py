@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+import kitops.modelkit
+
+# dependencies that must only be imported when the APIs needing them are used.
+HEAVY_MODULES = ("pydantic", "dotenv", "yaml")
+
+
+def imported_modules(statement: str) -> set:
+    """Runs statement in a fresh interpreter and returns the modules `-X importtime` reports it imported."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], capture_output=True, text=True, check=True
+    )
+    # lines look like "import time:  self [us] | cumulative | module", after a header line.
+    return {
+        line.rsplit("|", 1)[1].strip()
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and line.split("|")[1].strip().isdigit()
+    }
+
+
+@pytest.mark.parametrize("module", ["kitops.cli.kit", "kitops.cli.aio", "kitops.modelkit"])
+def test_cli_import_skips_heavy_dependencies(module):
+    modules = imported_modules(f"import {module}")
+    assert module in modules
+    assert not [name for name in modules if name.split(".")[0] in HEAVY_MODULES]
+
+
+def test_kitfile_api_loads_pydantic_on_first_use():
+    modules = imported_modules("from kitops.modelkit import Package")
+    assert "pydantic" in modules and "kitops.modelkit._pydantic_kit" in modules
+
+
+def test_lazy_attributes():
+    assert kitops.modelkit.Package.__name__ == "Package"
+    assert "CompactEntries" in dir(kitops.modelkit)
+    with pytest.raises(AttributeError):
+        kitops.modelkit.Missing
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import subprocess
+
+import pytest
+
+from kitops.cli import aio, kit
+from kitops.cli.instrumentation import (
+    InMemorySink,
+    LoggingSink,
+    OpenTelemetrySink,
+    add_sink,
+    get_sinks,
+    is_enabled,
+    remove_sink,
+    span,
+)
+from kitops.modelkit.manager import ModelKitManager
+from kitops.modelkit.user import UserCredentials
+
+
+@pytest.fixture
+def sink():
+    sink = InMemorySink()
+    add_sink(sink)
+    yield sink
+    remove_sink(sink)
+
+
+def test_disabled_without_sinks():
+    assert get_sinks() == ()
+    assert not is_enabled()
+
+
+def test_kit_commands_are_timed(fake_kit, sink):
+    kit.version()
+    kit.pack("jozu.ml/jozu/model:v1", working_directory=".")
+    kit.unpack("jozu.ml/jozu/model:v1", dir="out")
+
+    assert [(s.name, s.kind, s.reference, s.exit_code) for s in sink.spans] == [
+        ("kit version", "command", None, 0),
+        ("kit pack", "command", "jozu.ml/jozu/model:v1", 0),
+        ("kit unpack", "command", "jozu.ml/jozu/model:v1", 0),
+    ]
+    assert all(s.duration > 0 and s.parent_id is None for s in sink.spans)
+
+
+def test_failed_command_records_exit_code(fake_kit, sink, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_EXIT", "3")
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(aio.pull("jozu.ml/jozu/model:v1"))
+    (failed,) = sink.spans
+    assert (failed.name, failed.exit_code) == ("kit pull", 3)
+    assert failed.error.startswith("CalledProcessError")
+
+
+def test_streamed_command_records_bytes(fake_kit, sink, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_PROGRESS", "2")
+    kit.push("jozu.ml/jozu/model:v1", on_progress=lambda event: None)
+    assert sink.spans[0].bytes == 2 * 1024 * 1024
+
+
+def test_manager_operations_enclose_their_commands(fake_kit, sink, tmp_path):
+    manager = ModelKitManager(
+        working_directory=str(tmp_path),
+        user_credentials=UserCredentials(username="user", password="secret", registry="jozu.ml"),
+        modelkit_tag="jozu.ml/jozu/model:v1",
+    )
+    manager.pull_and_unpack_modelkit()
+    manager.pull_many(["jozu.ml/jozu/a:v1", "jozu.ml/jozu/b:v1"], with_login_and_logout=False)
+
+    operations = [s for s in sink.spans if s.kind == "operation"]
+    assert [(s.name, s.reference) for s in operations] == [
+        ("ModelKitManager.pull_and_unpack_modelkit", "jozu.ml/jozu/model:v1"),
+        ("ModelKitManager.pull_many", None),
+    ]
+    children = {op.name: [s.name for s in sink.spans if s.parent_id == op.span_id] for op in operations}
+    assert children["ModelKitManager.pull_and_unpack_modelkit"] == ["kit login", "kit pull", "kit unpack", "kit logout"]
+    assert sorted(children["ModelKitManager.pull_many"]) == ["kit pull", "kit pull", "kit unpack", "kit unpack"]
+
+
+def test_logging_sink(caplog):
+    sink = LoggingSink()
+    add_sink(sink)
+    try:
+        with caplog.at_level(logging.INFO, logger="kitops.cli.instrumentation"):
+            with span("train", reference="jozu.ml/jozu/model:v1") as current:
+                current.bytes = 10
+    finally:
+        remove_sink(sink)
+    assert caplog.messages[-1].startswith("train jozu.ml/jozu/model:v1 took ")
+    assert caplog.messages[-1].endswith(" ms (10 bytes)")
+
+
+def test_sink_errors_do_not_break_commands(fake_kit, sink):
+    class Broken(InMemorySink):
+        def on_start(self, span):
+            raise RuntimeError("broken")
+
+    broken = Broken()
+    add_sink(broken)
+    try:
+        assert kit.version() == "Version: 0.0.0-fake"
+    finally:
+        remove_sink(broken)
+    assert [s.name for s in broken.spans] == ["kit version"]
+
+
+def test_open_telemetry_sink_exports_spans(fake_kit):
+    sdk = pytest.importorskip("opentelemetry.sdk.trace")
+    export = pytest.importorskip("opentelemetry.sdk.trace.export")
+    in_memory = pytest.importorskip("opentelemetry.sdk.trace.export.in_memory_span_exporter")
+
+    exporter = in_memory.InMemorySpanExporter()
+    provider = sdk.TracerProvider()
+    provider.add_span_processor(export.SimpleSpanProcessor(exporter))
+    sink = OpenTelemetrySink(provider.get_tracer("test"))
+    add_sink(sink)
+    try:
+        with span("outer"):
+            kit.version()
+    finally:
+        remove_sink(sink)
+    inner, outer = exporter.get_finished_spans()
+    assert (inner.name, outer.name) == ("kit version", "outer")
+    assert inner.parent.span_id == outer.context.span_id
+    assert inner.attributes["kitops.exit_code"] == 0
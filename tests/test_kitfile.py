@@ -4,6 +4,7 @@ import pytest
 import yaml
 from pydantic import ValidationError
 
+from kitops.modelkit import CompactEntries, DatasetEntry
 from kitops.modelkit.kitfile import Kitfile
 
 
@@ -293,3 +294,201 @@ class TestKitfileAttributeAccess:
 
                 if "type" in expected_part:
                     assert part.type == expected_part["type"]
+
+
+def test_from_data_matches_validated_load(fixtures):
+    path = fixtures["Kitfile_full"]
+    validated = Kitfile(path)
+    assert Kitfile.from_data(path).to_yaml() == validated.to_yaml()
+    data = validated.model_dump(exclude_unset=True, exclude_none=True)
+    assert Kitfile.from_data(data).to_yaml() == validated.to_yaml()
+
+
+def test_list_assignment_validates_in_bulk():
+    kitfile = Kitfile()
+    kitfile.datasets = [{"name": f"split-{i}", "path": f"data/{i}.csv"} for i in range(3)]
+    assert [entry.path for entry in kitfile.datasets] == ["data/0.csv", "data/1.csv", "data/2.csv"]
+    with pytest.raises(ValidationError):
+        kitfile.code = [{"description": "no path"}]
+
+
+class TestSave:
+    def test_unchanged_kitfile_is_not_rewritten(self, fixtures, tmp_path):
+        path = tmp_path / "Kitfile"
+        kitfile = Kitfile(fixtures["Kitfile_full"])
+        assert kitfile.save(str(path), print=False) is True
+        before = path.stat().st_mtime_ns
+
+        assert Kitfile(path).save(str(path), print=False) is False
+        assert kitfile.save(str(path), print=False) is False
+        assert path.stat().st_mtime_ns == before
+
+    def test_in_place_changes_are_saved(self, fixtures, tmp_path):
+        path = tmp_path / "Kitfile"
+        kitfile = Kitfile(fixtures["Kitfile_full"])
+        kitfile.save(str(path), print=False)
+
+        kitfile.package.name = "renamed"
+        assert kitfile.save(str(path), print=False) is True
+        assert Kitfile(path).package.name == "renamed"
+
+    def test_symlinked_kitfile_is_written_through(self, fixtures, tmp_path):
+        target = tmp_path / "real" / "Kitfile"
+        target.parent.mkdir()
+        target.write_text("manifestVersion: '0.1'\n")
+        link = tmp_path / "Kitfile"
+        link.symlink_to(target)
+
+        assert Kitfile(fixtures["Kitfile_full"]).save(str(link), print=False) is True
+
+        assert link.is_symlink()
+        assert Kitfile(target).package.name == Kitfile(fixtures["Kitfile_full"]).package.name
+
+    def test_write_is_atomic_and_keeps_mode(self, fixtures, tmp_path):
+        path = tmp_path / "Kitfile"
+        path.write_text("manifestVersion: '0.1'\n")
+        path.chmod(0o640)
+
+        Kitfile(fixtures["Kitfile_full"]).save(str(path), print=False)
+
+        assert path.stat().st_mode & 0o777 == 0o640
+        assert [p.name for p in tmp_path.iterdir()] == ["Kitfile"]
+
+
+class TestEntryIndex:
+    @pytest.fixture
+    def kitfile(self):
+        return Kitfile.from_data(
+            {
+                "manifestVersion": "1.0",
+                "model": {
+                    "name": "model",
+                    "path": "model",
+                    "parts": [{"name": "lora", "path": "model/adapters/lora.safetensors"}],
+                },
+                "code": [{"path": "./src/"}],
+                "datasets": [{"name": "train", "path": "data/train.csv"}, {"name": "test", "path": "data/test.csv"}],
+                "docs": [{"path": "README.md"}],
+            }
+        )
+
+    def test_find_by_path(self, kitfile):
+        assert kitfile.find_by_path("data/train.csv").section == "datasets"
+        assert kitfile.find_by_path("src").entry is kitfile.code[0]
+        assert kitfile.find_by_path("./model/").entry is kitfile.model
+        assert kitfile.find_by_path("data") is None
+        assert kitfile.section_of("model/adapters/lora.safetensors") == "parts"
+        assert kitfile.section_of("missing") is None
+
+    def test_find_containing(self, kitfile):
+        assert kitfile.find_containing("model/weights/shard-1.bin").entry is kitfile.model
+        assert kitfile.find_containing("model/adapters/lora.safetensors").section == "parts"
+        assert kitfile.find_containing("src/train.py").section == "code"
+        assert kitfile.find_containing("data/validation.csv") is None
+
+    def test_find_by_name(self, kitfile):
+        assert [found.entry for found in kitfile.find_by_name("test")] == [kitfile.datasets[1]]
+        assert kitfile.find_by_name("model")[0].section == "model"
+        assert kitfile.find_by_name("missing") == []
+
+    def test_entries_under(self, kitfile):
+        assert [found.entry.path for found in kitfile.entries_under("data")] == ["data/test.csv", "data/train.csv"]
+        assert [found.section for found in kitfile.entries_under("model")] == ["parts"]
+        assert kitfile.entries_under("dat") == []
+        assert len(kitfile.entries_under("")) == 6
+
+    def test_index_follows_changes(self, kitfile):
+        assert kitfile.find_by_path("data/train.csv") is not None
+
+        kitfile.datasets = [{"name": "all", "path": "data/all.csv"}]
+        assert kitfile.find_by_path("data/train.csv") is None
+        assert kitfile.find_by_name("all")[0].entry is kitfile.datasets[0]
+
+        kitfile.datasets.append(DatasetEntry(path="data/extra.csv"))
+        assert kitfile.section_of("data/extra.csv") == "datasets"
+
+        kitfile.model = {"path": "weights"}
+        assert kitfile.find_containing("model/adapters/lora.safetensors") is None
+        assert kitfile.find_by_path("weights").section == "model"
+
+    def test_index_follows_replaced_entries(self, kitfile):
+        assert kitfile.find_by_path("data/train.csv").entry is kitfile.datasets[0]
+
+        kitfile.datasets[0] = DatasetEntry(path="data/z.csv")
+        assert kitfile.find_by_path("data/z.csv").entry is kitfile.datasets[0]
+        assert kitfile.find_by_path("data/train.csv") is None
+        assert kitfile.find_by_name("train") == []
+
+        kitfile.datasets.pop()
+        kitfile.datasets.append(DatasetEntry(path="data/other.csv"))
+        assert kitfile.find_by_path("data/test.csv") is None
+        assert kitfile.section_of("data/other.csv") == "datasets"
+
+    def test_index_follows_in_place_renames(self, kitfile):
+        assert kitfile.find_by_name("test")[0].entry is kitfile.datasets[1]
+
+        kitfile.datasets[1].path = "data/holdout.csv"
+        kitfile.datasets[1].name = "holdout"
+        assert kitfile.find_by_path("data/holdout.csv").entry is kitfile.datasets[1]
+        assert kitfile.find_by_path("data/test.csv") is None
+        assert kitfile.find_by_name("test") == []
+
+        kitfile.model.name = "renamed"
+        assert kitfile.find_by_name("renamed")[0].section == "model"
+        assert kitfile.find_by_name("model") == []
+
+        kitfile.model.parts[0] = kitfile.model.parts[0].model_copy(update={"path": "model/adapters/dora.safetensors"})
+        assert kitfile.section_of("model/adapters/dora.safetensors") == "parts"
+
+
+class TestCompactStorage:
+    def test_compact_kitfile_serializes_like_a_regular_one(self, fixtures):
+        regular = Kitfile(fixtures["Kitfile_full"])
+        compact = Kitfile.from_data(fixtures["Kitfile_full"], compact=True)
+        assert compact.is_compact and not regular.is_compact
+        assert isinstance(compact.datasets, CompactEntries)
+        assert isinstance(compact.model.parts, CompactEntries)
+        assert compact.to_yaml() == regular.to_yaml()
+        assert compact.model_dump_json() == regular.model_dump_json()
+
+    def test_compact_entries_read_like_lists(self, fixtures):
+        regular = Kitfile(fixtures["Kitfile_full"])
+        compact = Kitfile(fixtures["Kitfile_full"]).compact()
+        assert compact.datasets == regular.datasets
+        assert compact.datasets[-1] == regular.datasets[-1]
+        assert compact.code[:2] == regular.code[:2]
+        assert [entry.path for entry in compact.docs] == [entry.path for entry in regular.docs]
+        assert list(compact.datasets.values("path")) == [entry.path for entry in regular.datasets]
+
+    def test_compact_entries_are_changed_by_assignment(self):
+        kitfile = Kitfile().compact()
+        kitfile.datasets = [{"path": "data/train.csv"}]
+        kitfile.datasets.append({"path": "data/test.csv", "name": "test"})
+        kitfile.datasets[0] = DatasetEntry(path="data/all.csv")
+        kitfile.datasets[0].path = "ignored"
+        assert isinstance(kitfile.datasets, CompactEntries)
+        assert [entry.path for entry in kitfile.datasets] == ["data/all.csv", "data/test.csv"]
+        assert kitfile.find_by_name("test")[0].entry.path == "data/test.csv"
+
+        del kitfile.datasets[0]
+        assert kitfile.find_by_path("data/all.csv") is None
+        with pytest.raises(ValidationError):
+            kitfile.datasets.append({"description": "no path"})
+
+    def test_assigned_model_parts_stay_compact(self):
+        kitfile = Kitfile().compact()
+        kitfile.model = {"path": "model", "parts": [{"path": "model/lora.safetensors", "type": "lora"}]}
+        assert isinstance(kitfile.model.parts, CompactEntries)
+        assert kitfile.find_containing("model/lora.safetensors").section == "parts"
+        assert "type: lora" in kitfile.to_yaml()
+
+
+def test_iter_entries_streams_one_section(fixtures):
+    path = fixtures["Kitfile_full"]
+    kitfile = Kitfile(path)
+    assert list(Kitfile.iter_entries(path)) == kitfile.datasets
+    assert list(Kitfile.iter_entries(path, "code")) == kitfile.code
+    assert list(Kitfile.iter_entries(path, section="parts")) == kitfile.model.parts
+    assert list(Kitfile.iter_entries(fixtures["Kitfile_base"], "prompts")) == []
+    with pytest.raises(ValueError, match="Invalid section"):
+        Kitfile.iter_entries(path, "package")
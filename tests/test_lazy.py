@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+from kitops.modelkit.manager import ModelKitManager
+from kitops.modelkit.user import UserCredentials
+from kitops.oci import LazyModelKit, RegistryClient, push_modelkit
+from tests.test_oci import make_layer, make_source_tree
+
+
+@pytest.fixture
+def pushed(fake_registry, tmp_path):
+    with RegistryClient(fake_registry.address, plain_http=True) as client:
+        push_modelkit(client, "jozu/model", "v1", make_source_tree(tmp_path / "src"))
+        yield client
+
+
+def blob_fetches(registry) -> int:
+    return registry.count("GET", "/blobs/")
+
+
+class TestLazyModelKit:
+    def test_writes_kitfile_and_index_without_layers(self, fake_registry, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+
+        assert (tmp_path / "dst" / "Kitfile").exists()
+        assert [layer["path"] for layer in lazy.layers] == ["model", "data/train.csv", "README.md"]
+        assert not (tmp_path / "dst" / "model").exists()
+        assert blob_fetches(fake_registry) == 1
+
+    def test_fetches_only_the_layer_holding_a_path(self, fake_registry, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+
+        with lazy.open("model/weights.bin") as f:
+            assert f.read() == b"\x00\x01" * 1000
+        assert lazy.resolve("model/weights.bin").exists()
+
+        assert blob_fetches(fake_registry) == 2
+        assert not (tmp_path / "dst" / "data").exists()
+        assert not lazy.materialized
+
+    def test_prefetch_and_resume(self, fake_registry, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+        lazy.resolve("README.md")
+        for future in lazy.prefetch():
+            future.result()
+        assert lazy.materialized
+        assert (tmp_path / "dst" / "data" / "train.csv").read_text() == "a,b\n1,2\n"
+        fetched = blob_fetches(fake_registry)
+
+        reopened = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+        reopened.resolve("model/weights.bin")
+        assert reopened.materialized
+        assert blob_fetches(fake_registry) == fetched
+        assert json.loads((tmp_path / "dst" / ".kitops-lazy.json").read_text())["digest"] == reopened.digest
+
+    def test_unknown_path(self, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+        assert lazy.resolve("Kitfile").exists()
+        with pytest.raises(FileNotFoundError):
+            lazy.resolve("missing.txt")
+
+    def test_layer_failing_verification_is_not_materialized(self, fake_registry, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst")
+        model = next(layer for layer in lazy.layers if layer["path"] == "model")
+        fake_registry.blobs[model["digest"]] = make_layer({"model/weights.bin": b"tampered"})
+
+        with pytest.raises(ValueError, match="digest mismatch"):
+            lazy.resolve("model/weights.bin")
+
+        assert not (tmp_path / "dst" / "model").exists()
+        assert not model["materialized"]
+        assert not json.loads((tmp_path / "dst" / ".kitops-lazy.json").read_text())["layers"][0]["materialized"]
+
+    def test_filters_limit_fetchable_layers(self, pushed, tmp_path):
+        lazy = LazyModelKit.from_registry(pushed, "jozu/model", "v1", tmp_path / "dst", filters=["datasets"])
+        assert [layer["path"] for layer in lazy.layers] == ["data/train.csv"]
+
+
+def test_manager_lazy_unpack(fake_kit, fake_registry, pushed, tmp_path):
+    manager = ModelKitManager(
+        working_directory=str(tmp_path / "dst"),
+        user_credentials=UserCredentials(username="user", password="secret"),
+        modelkit_tag=f"{fake_registry.address}/jozu/model:v1",
+    )
+    manager.registry_client = pushed
+
+    lazy = manager.lazy_unpack_modelkit(load_kitfile=True)
+
+    assert lazy.resolve(manager.kitfile.model.path).is_dir()
+    assert (tmp_path / "dst" / "model" / "weights.bin").exists()
+    assert fake_kit.calls() == []
@@ -0,0 +1,214 @@
+import subprocess
+
+import pytest
+
+from kitops.modelkit.manager import ModelKitManager
+from kitops.modelkit.reference import ModelKitReference, Reference
+from kitops.modelkit.session import RegistrySession
+from kitops.modelkit.user import UserCredentials
+from kitops.oci import RegistryClient
+
+DIGEST = "sha256:" + "0123456789abcdef" * 4
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return ModelKitManager(
+        working_directory=str(tmp_path / "work"),
+        user_credentials=UserCredentials(username="user", password="secret"),
+    )
+
+
+class TestPullMany:
+    def test_dedupes_and_logs_in_once_per_registry(self, fake_kit, manager):
+        results = manager.pull_many(
+            [
+                "jozu.ml/jozu/model-a:latest",
+                "jozu.ml/jozu/model-b:v1",
+                "jozu.ml/jozu/model-a:latest",
+                "ghcr.io/org/model-c:v2",
+            ],
+            max_workers=2,
+        )
+
+        assert list(results) == [
+            "jozu.ml/jozu/model-a:latest",
+            "jozu.ml/jozu/model-b:v1",
+            "ghcr.io/org/model-c:v2",
+        ]
+        assert all(result.ok for result in results.values())
+        assert results["ghcr.io/org/model-c:v2"].directory.endswith("ghcr.io/org/model-c/v2")
+
+        commands = fake_kit.commands()
+        assert commands.count("login") == 2
+        assert commands.count("logout") == 2
+        assert commands.count("pull") == 3
+        assert commands.count("unpack") == 3
+        assert commands[:2] == ["login", "login"]
+        assert commands[-2:] == ["logout", "logout"]
+
+    def test_failures_are_reported_per_reference(self, fake_kit, manager, monkeypatch):
+        monkeypatch.setenv("FAKE_KIT_EXIT", "1")
+        monkeypatch.setenv("FAKE_KIT_FAIL_ON", "jozu.ml/jozu/broken:latest")
+
+        results = manager.pull_many(["jozu.ml/jozu/broken:latest", "jozu.ml/jozu/model:latest"])
+
+        assert isinstance(results["jozu.ml/jozu/broken:latest"].error, subprocess.CalledProcessError)
+        assert results["jozu.ml/jozu/model:latest"].ok
+        assert fake_kit.commands()[-1] == "logout"
+
+    def test_login_failure_skips_registry(self, fake_kit, manager, monkeypatch):
+        monkeypatch.setenv("FAKE_KIT_EXIT", "1")
+        monkeypatch.setenv("FAKE_KIT_FAIL_ON", "ghcr.io")
+
+        results = manager.pull_many(["ghcr.io/org/model:v1", "jozu.ml/jozu/model:latest"])
+
+        assert not results["ghcr.io/org/model:v1"].ok
+        assert results["jozu.ml/jozu/model:latest"].ok
+        assert ["logout", "ghcr.io"] not in fake_kit.calls()
+        assert ["logout", "jozu.ml"] in fake_kit.calls()
+
+    def test_logout_failure_does_not_mask_results(self, fake_kit, manager, monkeypatch, caplog):
+        monkeypatch.setenv("FAKE_KIT_EXIT", "1")
+        monkeypatch.setenv("FAKE_KIT_FAIL_ON", "logout")
+
+        results = manager.pull_many(["ghcr.io/org/model:v1", "jozu.ml/jozu/model:latest"])
+
+        assert all(result.ok for result in results.values())
+        assert ["logout", "ghcr.io"] in fake_kit.calls()
+        assert ["logout", "jozu.ml"] in fake_kit.calls()
+        assert "Logout from ghcr.io failed" in caplog.text
+        assert "Logout from jozu.ml failed" in caplog.text
+
+    def test_filters_skip_pull(self, fake_kit, manager):
+        manager.pull_many(["jozu.ml/jozu/model:latest"], filters=["model"], with_login_and_logout=False)
+        assert fake_kit.commands() == ["unpack"]
+
+    def test_invalid_reference_raises(self, manager):
+        with pytest.raises(ValueError):
+            manager.pull_many(["not-a-reference"])
+
+    def test_invalid_max_workers_raises(self, manager):
+        with pytest.raises(ValueError):
+            manager.pull_many([], max_workers=0)
+
+
+class TestSession:
+    def test_session_logs_in_once_and_out_on_exit(self, fake_kit, manager, tmp_path):
+        manager.modelkit_reference = ModelKitReference("jozu.ml/jozu/model:latest")
+        with manager.session() as session:
+            manager.pull_and_unpack_modelkit()
+            manager.remove_modelkit(local=True)
+            manager.pack_and_push_modelkit()
+            assert session.authenticated_registries == frozenset({"jozu.ml"})
+            assert "logout" not in fake_kit.commands()
+
+        commands = fake_kit.commands()
+        assert commands.count("login") == 1
+        assert commands.count("logout") == 1
+        assert commands[-1] == "logout"
+        assert manager.active_session is None
+
+    def test_session_shared_between_managers(self, fake_kit, tmp_path):
+        credentials = UserCredentials(username="user", password="secret")
+        manager_a = ModelKitManager(
+            working_directory=str(tmp_path / "a"),
+            user_credentials=credentials,
+            modelkit_tag="jozu.ml/jozu/model-a:latest",
+        )
+        manager_b = ModelKitManager(
+            working_directory=str(tmp_path / "b"),
+            user_credentials=credentials,
+            modelkit_tag="jozu.ml/jozu/model-b:latest",
+        )
+
+        with RegistrySession() as session:
+            with manager_a.session(session), manager_b.session(session):
+                manager_a.pull_and_unpack_modelkit()
+                manager_b.pull_and_unpack_modelkit()
+                manager_a.pull_many(["ghcr.io/org/model:v1"])
+            # a given session outlives the managers' blocks.
+            assert session.is_authenticated("ghcr.io")
+            assert "logout" not in fake_kit.commands()
+
+        commands = fake_kit.commands()
+        assert commands.count("login") == 2
+        assert commands.count("logout") == 2
+
+    def test_without_session_logs_in_and_out_per_operation(self, fake_kit, manager):
+        manager.modelkit_reference = ModelKitReference("jozu.ml/jozu/model:latest")
+        manager.pull_and_unpack_modelkit()
+        manager.remove_modelkit(local=True)
+        assert fake_kit.commands() == ["login", "pull", "unpack", "logout", "login", "remove", "logout"]
+
+
+class TestDigests:
+    @pytest.fixture
+    def registry_manager(self, manager, fake_registry):
+        with RegistryClient(fake_registry.address, plain_http=True) as client:
+            manager.registry_client = client
+            yield manager
+
+    def test_resolve_digests_heads_each_tag_once(self, fake_registry, registry_manager):
+        latest = fake_registry.add_manifest("jozu/model", "latest", {"schemaVersion": 2, "layers": []})
+        v1 = fake_registry.add_manifest("team/vision/model", "v1", {"schemaVersion": 2, "layers": [], "v": 1})
+        pinned = f"{fake_registry.address}/other/model:v9@{DIGEST}"
+
+        resolved = registry_manager.resolve_digests(
+            [
+                f"{fake_registry.address}/jozu/model:latest",
+                ModelKitReference(f"{fake_registry.address}/team/vision/model:v1"),
+                f"{fake_registry.address}/jozu/model:latest",
+                pinned,
+            ]
+        )
+
+        assert list(resolved) == [
+            f"{fake_registry.address}/jozu/model:latest",
+            f"{fake_registry.address}/team/vision/model:v1",
+            pinned,
+        ]
+        assert resolved[f"{fake_registry.address}/jozu/model:latest"].digest == latest
+        assert resolved[f"{fake_registry.address}/team/vision/model:v1"] == Reference(
+            fake_registry.address, "team/vision", "model", "v1", v1
+        )
+        assert str(resolved[pinned]) == pinned
+        assert fake_registry.count("HEAD", "/manifests/") == 2
+
+    def test_resolve_digest_pins_the_manager(self, fake_registry, registry_manager):
+        digest = fake_registry.add_manifest("jozu/model", "latest", {"schemaVersion": 2, "layers": []})
+        registry_manager.modelkit_reference = ModelKitReference(f"{fake_registry.address}/jozu/model:latest")
+
+        assert registry_manager.resolve_digest() == digest
+        assert registry_manager.modelkit_reference.modelkit_tag == f"{fake_registry.address}/jozu/model:latest@{digest}"
+
+    def test_missing_modelkit_raises(self, fake_registry, registry_manager):
+        with pytest.raises(ValueError, match="ModelKit not found"):
+            registry_manager.resolve_digests([f"{fake_registry.address}/jozu/missing:latest"])
+
+    def test_pinned_references_are_pulled_by_digest(self, fake_kit, manager):
+        results = manager.pull_many([f"jozu.ml/jozu/model@{DIGEST}", f"jozu.ml/jozu/model:v1@{DIGEST}"])
+
+        directory = results[f"jozu.ml/jozu/model@{DIGEST}"].directory
+        assert directory.endswith(f"jozu.ml/jozu/model/{DIGEST.replace(':', '-')}")
+        assert results[f"jozu.ml/jozu/model:v1@{DIGEST}"].directory.endswith(
+            f"jozu.ml/jozu/model/v1@{DIGEST.replace(':', '-')}"
+        )
+        assert ["pull", f"jozu.ml/jozu/model@{DIGEST}"] in fake_kit.calls()
+
+    def test_tag_and_pinned_tag_are_unpacked_apart(self, fake_kit, manager):
+        results = manager.pull_many(["jozu.ml/jozu/model:v1", f"jozu.ml/jozu/model:v1@{DIGEST}"])
+
+        directories = [result.directory for result in results.values()]
+        assert len(set(directories)) == 2
+        assert directories[0].endswith("jozu.ml/jozu/model/v1")
+        assert fake_kit.commands().count("pull") == 2
+
+    def test_push_uses_the_tag_of_a_pinned_reference(self, fake_kit, manager):
+        manager.modelkit_reference = ModelKitReference(f"jozu.ml/jozu/model:v1@{DIGEST}")
+        manager.pack_and_push_modelkit(with_login_and_logout=False)
+        assert ["push", "jozu.ml/jozu/model:v1"] in fake_kit.calls()
+
+        manager.modelkit_reference.tag = None
+        with pytest.raises(ValueError, match="A tag is required"):
+            manager.pack_and_push_modelkit(with_login_and_logout=False)
@@ -0,0 +1,315 @@
+import io
+import json
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from kitops.modelkit.kitfile import Kitfile
+from kitops.modelkit.manager import ModelKitManager
+from kitops.modelkit.user import UserCredentials
+from kitops.oci import BlobDownloader, RegistryClient, RegistryError, pull_modelkit, push_modelkit
+from kitops.oci.client import compute_digest
+from kitops.oci.download import DEFAULT_RANGE_SIZE
+from kitops.oci.modelkit import stream_layer
+from tests.fake_registry import FakeRegistry
+
+
+def make_layer(files: dict) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def make_source_tree(root: Path) -> Path:
+    (root / "model").mkdir(parents=True)
+    (root / "model" / "weights.bin").write_bytes(b"\x00\x01" * 1000)
+    (root / "data").mkdir()
+    (root / "data" / "train.csv").write_text("a,b\n1,2\n")
+    (root / "README.md").write_text("# readme\n")
+    Kitfile(
+        manifestVersion="1.0",
+        package={"name": "demo"},
+        model={"name": "demo-model", "path": "model"},
+        datasets=[{"name": "training", "path": "data/train.csv"}],
+        docs=[{"path": "README.md"}],
+    ).save(str(root / "Kitfile"), print=False)
+    return root
+
+
+@pytest.fixture
+def client(fake_registry):
+    with RegistryClient(fake_registry.address, plain_http=True) as client:
+        yield client
+
+
+class TestRegistryClient:
+    def test_manifest_get_and_head(self, fake_registry, client):
+        digest = fake_registry.add_manifest("jozu/model", "latest", {"schemaVersion": 2, "layers": []})
+
+        manifest, fetched_digest = client.get_manifest("jozu/model", "latest")
+        assert manifest["schemaVersion"] == 2
+        assert fetched_digest == digest
+        assert client.head_manifest("jozu/model", "latest") == digest
+        assert client.head_manifest("jozu/model", "missing") is None
+
+    def test_blob_ranges(self, fake_registry, client):
+        digest = fake_registry.add_blob(b"0123456789")
+
+        assert client.get_blob("jozu/model", digest) == b"0123456789"
+        assert client.get_blob("jozu/model", digest, start=2, end=4) == b"234"
+        assert client.get_blob("jozu/model", digest, start=7) == b"789"
+
+    def test_chunked_upload_and_dedupe(self, fake_registry, client):
+        data = bytes(range(256)) * 10
+        digest = client.upload_blob("jozu/model", io.BytesIO(data), chunk_size=1000)
+
+        assert digest == compute_digest(data)
+        assert fake_registry.blobs[digest] == data
+        assert fake_registry.count("PATCH") == 3
+
+        client.upload_blob("jozu/model", data, digest=digest)
+        assert fake_registry.count("POST") == 1
+
+    def test_missing_blob_raises(self, client):
+        with pytest.raises(RegistryError) as excinfo:
+            client.get_blob("jozu/model", "sha256:" + "0" * 64)
+        assert excinfo.value.status == 404
+
+    def test_connections_are_reused(self, fake_registry, client):
+        digest = fake_registry.add_blob(b"payload")
+        for _ in range(20):
+            client.get_blob("jozu/model", digest)
+        assert fake_registry.connections == 1
+
+    def test_bearer_token_auth(self):
+        registry = FakeRegistry(username="user", password="secret", token="t0k3n")
+        try:
+            digest = registry.add_blob(b"secret payload")
+            with RegistryClient(registry.address, "user", "secret", plain_http=True) as client:
+                assert client.get_blob("jozu/model", digest) == b"secret payload"
+                assert client.get_blob("jozu/model", digest) == b"secret payload"
+            assert registry.count("GET", "/token") == 1
+
+            with RegistryClient(registry.address, "user", "wrong", plain_http=True) as client:
+                with pytest.raises(RegistryError):
+                    client.get_blob("jozu/model", digest)
+        finally:
+            registry.close()
+
+
+class TestBlobDownloader:
+    def test_downloads_in_ranges(self, fake_registry, client, tmp_path):
+        data = bytes(range(256)) * 40
+        digest = fake_registry.add_blob(data)
+
+        path = BlobDownloader(client, range_size=1000, max_workers=3).download(
+            "jozu/model", {"digest": digest, "size": len(data)}, tmp_path / "blob"
+        )
+
+        assert path.read_bytes() == data
+        assert fake_registry.count("GET", "/blobs/") == 11
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["blob"]
+
+    def test_resumes_from_journal(self, fake_registry, client, tmp_path):
+        data = bytes(range(256)) * 40
+        digest = fake_registry.add_blob(data)
+        partial = tmp_path / "blob.partial"
+        partial.write_bytes(data[:4000] + bytes(len(data) - 4000))
+        (tmp_path / "blob.partial.json").write_text(
+            json.dumps({"digest": digest, "size": len(data), "range_size": 1000, "completed": [0, 1, 2, 3]})
+        )
+
+        path = BlobDownloader(client, range_size=1000).download(
+            "jozu/model", {"digest": digest, "size": len(data)}, tmp_path / "blob"
+        )
+
+        assert path.read_bytes() == data
+        assert fake_registry.count("GET", "/blobs/") == 7
+
+    def test_digest_mismatch_discards_partial(self, fake_registry, client, tmp_path):
+        data = b"x" * 3000
+        fake_registry.blobs["sha256:" + "0" * 64] = data
+
+        with pytest.raises(ValueError):
+            BlobDownloader(client, range_size=1000).download(
+                "jozu/model", {"digest": "sha256:" + "0" * 64, "size": len(data)}, tmp_path / "blob"
+            )
+        assert list(tmp_path.iterdir()) == []
+
+    def test_falls_back_when_range_is_ignored(self, fake_registry, client, tmp_path):
+        data = b"abc" * 1000
+        digest = fake_registry.add_blob(data)
+        fake_registry.ignore_range = True
+
+        path = BlobDownloader(client, range_size=1000, max_workers=1).download(
+            "jozu/model", {"digest": digest, "size": len(data)}, tmp_path / "blob"
+        )
+
+        assert path.read_bytes() == data
+        # the first full response stops the remaining ranges; the blob is then fetched once.
+        assert fake_registry.count("GET", "/blobs/") == 2
+
+    def test_small_blob_resumes_within_its_range(self, fake_registry, client, tmp_path):
+        data = bytes(range(256)) * 12
+        digest = fake_registry.add_blob(data)
+        (tmp_path / "blob.partial").write_bytes(data[:1000] + bytes(len(data) - 1000))
+        (tmp_path / "blob.partial.json").write_text(
+            json.dumps(
+                {
+                    "digest": digest,
+                    "size": len(data),
+                    "range_size": DEFAULT_RANGE_SIZE,
+                    "completed": [],
+                    "progress": {"0": 1000},
+                }
+            )
+        )
+
+        path = BlobDownloader(client).download("jozu/model", {"digest": digest, "size": len(data)}, tmp_path / "blob")
+
+        assert path.read_bytes() == data
+        assert fake_registry.ranges == [f"bytes=1000-{len(data) - 1}"]
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["blob"]
+
+
+class TestModelKitTransfer:
+    def test_pull_unpacks_layers_and_kitfile(self, fake_registry, client, tmp_path):
+        layer = make_layer({"data/train.csv": b"a,b\n"})
+        config = json.dumps({"manifestVersion": "1.0", "datasets": [{"path": "data/train.csv"}]}).encode()
+        fake_registry.add_manifest(
+            "jozu/model",
+            "latest",
+            {
+                "schemaVersion": 2,
+                "config": {"digest": fake_registry.add_blob(config), "size": len(config)},
+                "layers": [
+                    {
+                        "mediaType": "application/vnd.kitops.modelkit.dataset.v1.tar+gzip",
+                        "digest": fake_registry.add_blob(layer),
+                        "size": len(layer),
+                    }
+                ],
+            },
+        )
+
+        pull_modelkit(client, "jozu/model", "latest", tmp_path / "out")
+
+        assert (tmp_path / "out" / "data" / "train.csv").read_bytes() == b"a,b\n"
+        assert Kitfile(tmp_path / "out" / "Kitfile").datasets[0].path == "data/train.csv"
+
+    @pytest.mark.parametrize("digest", ["sha256:../../../escape", "sha256:" + "A" * 64, "sha512:" + "0" * 128])
+    def test_crafted_layer_digest_is_rejected(self, fake_registry, client, tmp_path, digest):
+        config = json.dumps({"manifestVersion": "1.0"}).encode()
+        fake_registry.add_manifest(
+            "jozu/model",
+            "latest",
+            {
+                "schemaVersion": 2,
+                "config": {"digest": fake_registry.add_blob(config), "size": len(config)},
+                "layers": [{"mediaType": "application/vnd.kitops.modelkit.code.v1.tar", "digest": digest, "size": 1}],
+            },
+        )
+
+        with pytest.raises(ValueError, match="Unsupported digest"):
+            pull_modelkit(client, "jozu/model", "latest", tmp_path / "out" / "dst")
+
+        assert fake_registry.count("GET", "/blobs/") == 0
+        assert list((tmp_path / "out").iterdir()) == [tmp_path / "out" / "dst"]
+
+    def test_streamed_pull(self, fake_registry, client, tmp_path):
+        source = make_source_tree(tmp_path / "src")
+        push_modelkit(client, "jozu/model", "v1", source)
+
+        pull_modelkit(client, "jozu/model", "v1", tmp_path / "dst", stream=True)
+
+        assert (tmp_path / "dst" / "model" / "weights.bin").read_bytes() == b"\x00\x01" * 1000
+        assert (tmp_path / "dst" / "data" / "train.csv").read_text() == "a,b\n1,2\n"
+        assert (tmp_path / "dst" / "README.md").exists()
+        assert not (tmp_path / "dst" / ".kitops-download").exists()
+
+    def test_streamed_layer_is_verified(self, fake_registry, client, tmp_path):
+        layer = make_layer({"f": b"content"})
+        digest = "sha256:" + "0" * 64
+        fake_registry.blobs[digest] = layer
+        descriptor = {"mediaType": "application/vnd.kitops.modelkit.code.v1.tar+gzip", "digest": digest}
+
+        with pytest.raises(ValueError, match="digest mismatch"):
+            stream_layer(client, "jozu/model", descriptor, tmp_path)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_tampered_streamed_layer_leaves_nothing_behind(self, fake_registry, client, tmp_path):
+        source = make_source_tree(tmp_path / "src")
+        push_modelkit(client, "jozu/model", "v1", source)
+        manifest, _ = client.get_manifest("jozu/model", "v1")
+        model = next(layer for layer in manifest["layers"] if layer["mediaType"].endswith("model.v1.tar+gzip"))
+        fake_registry.blobs[model["digest"]] = make_layer({"model/weights.bin": b"tampered"})
+
+        with pytest.raises(ValueError, match="mismatch"):
+            pull_modelkit(client, "jozu/model", "v1", tmp_path / "dst", stream=True)
+
+        assert not (tmp_path / "dst" / "model" / "weights.bin").exists()
+        assert not any(path.name.startswith(".kitops-layer-") for path in (tmp_path / "dst").iterdir())
+
+    def test_push_then_pull_round_trip(self, fake_registry, client, tmp_path):
+        source = make_source_tree(tmp_path / "src")
+
+        digest = push_modelkit(client, "jozu/model", "v1", source)
+        manifest, pulled_digest = client.get_manifest("jozu/model", "v1")
+        assert pulled_digest == digest
+        assert [layer["annotations"]["org.opencontainers.image.title"] for layer in manifest["layers"]] == [
+            "model",
+            "data/train.csv",
+            "README.md",
+        ]
+
+        pull_modelkit(client, "jozu/model", digest, tmp_path / "dst", filters=["datasets"])
+        assert (tmp_path / "dst" / "data" / "train.csv").read_text() == "a,b\n1,2\n"
+        assert not (tmp_path / "dst" / "model").exists()
+
+    def test_layers_are_reproducible(self, fake_registry, client, tmp_path):
+        source = make_source_tree(tmp_path / "src")
+        first = push_modelkit(client, "jozu/model", "v1", source)
+        second = push_modelkit(client, "jozu/model", "v2", source)
+        assert first == second
+
+
+def test_manager_native_pull_and_push(fake_kit, fake_registry, tmp_path):
+    make_source_tree(tmp_path / "src")
+    credentials = UserCredentials(username="user", password="secret")
+    tag = f"{fake_registry.address}/jozu/model:latest"
+
+    pusher = ModelKitManager(working_directory=str(tmp_path / "src"), user_credentials=credentials, modelkit_tag=tag)
+    pusher.registry_client = RegistryClient(fake_registry.address, plain_http=True)
+    pusher.pack_and_push_modelkit(native=True)
+
+    puller = ModelKitManager(working_directory=str(tmp_path / "dst"), user_credentials=credentials, modelkit_tag=tag)
+    puller.registry_client = RegistryClient(fake_registry.address, plain_http=True)
+    puller.pull_and_unpack_modelkit(load_kitfile=True, native=True)
+
+    assert puller.kitfile.model.path == "model"
+    assert (tmp_path / "dst" / "model" / "weights.bin").stat().st_size == 2000
+    assert fake_kit.calls() == []
+
+
+def test_manager_native_pull_by_digest(fake_kit, fake_registry, tmp_path):
+    make_source_tree(tmp_path / "src")
+    credentials = UserCredentials(username="user", password="secret")
+    tag = f"{fake_registry.address}/jozu/model:latest"
+    pusher = ModelKitManager(working_directory=str(tmp_path / "src"), user_credentials=credentials, modelkit_tag=tag)
+    pusher.registry_client = RegistryClient(fake_registry.address, plain_http=True)
+    pusher.pack_and_push_modelkit(native=True)
+
+    puller = ModelKitManager(working_directory=str(tmp_path / "dst"), user_credentials=credentials, modelkit_tag=tag)
+    puller.registry_client = RegistryClient(fake_registry.address, plain_http=True)
+    digest = puller.resolve_digest()
+    fake_registry.requests.clear()
+    puller.pull_and_unpack_modelkit(native=True)
+
+    assert (tmp_path / "dst" / "model" / "weights.bin").exists()
+    assert fake_registry.count("GET", f"/manifests/{digest}") == 1
+    assert fake_registry.count("GET", "/manifests/latest") == 0
@@ -0,0 +1,67 @@
+import subprocess
+import sys
+
+import pytest
+
+from kitops.cli import kit
+from kitops.cli.progress import TAIL_LINES, _LineSplitter, parse_progress_line, stream_command
+
+
+def test_parse_progress_line():
+    event = parse_progress_line("Copying sha256:0123456789ab 512 KiB / 2 MiB (1.5 MB/s)", "stderr")
+    assert event.digest == "sha256:0123456789ab"
+    assert (event.transferred, event.total) == (512 * 1024, 2 * 1024 * 1024)
+    assert event.rate == 1_500_000
+    assert event.percent == 25.0
+    assert event.is_progress
+
+    assert parse_progress_line("Pulling layers 40%").percent == 40.0
+    message = parse_progress_line("Model jozu.ml/jozu/model:latest pushed")
+    assert not message.is_progress and message.digest is None
+
+
+def test_line_splitter_handles_carriage_returns_and_split_characters():
+    splitter = _LineSplitter()
+    data = "one\r\ntwo\rthré".encode() + b"e\n"
+    assert splitter.feed(data[:13]) == ["one", "two"]
+    assert splitter.feed(data[13:]) == ["thrée"]
+    assert splitter.feed(b"tail", final=True) == ["tail"]
+
+
+def test_pull_streams_progress(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_PROGRESS", "4")
+    events = []
+    kit.pull("jozu.ml/jozu/model:latest", on_progress=events.append)
+
+    progress = [event for event in events if event.is_progress]
+    assert [event.transferred for event in progress] == [n * 1024 * 1024 for n in range(1, 5)]
+    assert progress[-1].percent == 100.0
+    assert all(event.stream == "stderr" for event in progress)
+    assert ("stdout", "kit pull jozu.ml/jozu/model:latest") in [(event.stream, event.line) for event in events]
+
+
+def test_streamed_output_is_bounded():
+    command = [sys.executable, "-c", f"for i in range({TAIL_LINES * 5}): print(i)"]
+    count = []
+    result = stream_command(command, lambda event: count.append(1))
+    assert len(count) == TAIL_LINES * 5
+    lines = result.stdout.splitlines()
+    assert len(lines) == TAIL_LINES and lines[-1] == str(TAIL_LINES * 5 - 1)
+
+
+def test_streamed_failure_raises_called_process_error(fake_kit, monkeypatch):
+    monkeypatch.setenv("FAKE_KIT_EXIT", "2")
+    with pytest.raises(subprocess.CalledProcessError) as excinfo:
+        kit.push("jozu.ml/jozu/model:latest", on_progress=lambda event: None)
+    assert excinfo.value.returncode == 2
+    assert "fake kit failure" in excinfo.value.stderr
+
+
+def test_callback_error_kills_the_command():
+    command = [sys.executable, "-c", "import time\nprint('start', flush=True)\ntime.sleep(30)"]
+
+    def fail(event):
+        raise RuntimeError(event.line)
+
+    with pytest.raises(RuntimeError, match="start"):
+        stream_command(command, fail)
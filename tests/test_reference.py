@@ -0,0 +1,86 @@
+import pytest
+
+from kitops.modelkit.reference import ModelKitReference, Reference, parse_reference
+from kitops.modelkit.utils import parse_modelkit_tag
+
+DIGEST = "sha256:" + "0123456789abcdef" * 4
+
+
+@pytest.mark.parametrize(
+    ("reference", "expected"),
+    [
+        (
+            "jozu.ml/jozu-demos/titanic-survivability:latest",
+            Reference("jozu.ml", "jozu-demos", "titanic-survivability", "latest"),
+        ),
+        (
+            "localhost:5000/org/team/vision/resnet_50:v1.0",
+            Reference("localhost:5000", "org/team/vision", "resnet_50", "v1.0"),
+        ),
+        (f"ghcr.io/org/model@{DIGEST}", Reference("ghcr.io", "org", "model", None, DIGEST)),
+        (f"[::1]:5000/org/model:v1@{DIGEST}", Reference("[::1]:5000", "org", "model", "v1", DIGEST)),
+    ],
+)
+def test_parse_reference(reference, expected):
+    parsed = parse_reference(reference)
+    assert parsed == expected
+    assert str(parsed) == reference
+
+
+@pytest.mark.parametrize(
+    "reference",
+    [
+        "jozu.ml/model:latest",
+        "jozu.ml/jozu/model",
+        "jozu.ml/Jozu/model:latest",
+        "jozu.ml/jozu/model:.latest",
+        "jozu.ml/jozu//model:latest",
+        "jozu.ml/jozu/model@sha256:0123",
+        "-jozu.ml/jozu/model:latest",
+        "jozu.ml/" + "a" * 250 + "/model:latest",
+    ],
+)
+def test_invalid_references_are_rejected(reference):
+    with pytest.raises(ValueError):
+        parse_reference(reference)
+
+
+def test_parsing_is_cached():
+    assert parse_reference("jozu.ml/jozu/model:v1") is parse_reference("jozu.ml/jozu/model:v1")
+    assert Reference.parse("jozu.ml/jozu/model:v1") is parse_reference("jozu.ml/jozu/model:v1")
+
+
+def test_reference_is_immutable_hashable_and_ordered():
+    reference = parse_reference("jozu.ml/jozu/model:v2")
+    with pytest.raises(AttributeError):
+        reference.tag = "v3"  # type: ignore[misc]
+    assert not hasattr(reference, "__dict__")
+    assert {reference, Reference("jozu.ml", "jozu", "model", "v2")} == {reference}
+    assert sorted([reference, reference.with_tag("v1"), reference.with_digest(DIGEST)]) == [
+        reference.with_tag("v1"),
+        reference,
+        reference.with_digest(DIGEST),
+    ]
+    assert reference.name == "jozu.ml/jozu/model"
+
+
+def test_modelkit_reference_round_trip():
+    reference = ModelKitReference(f"localhost:5000/org/team/model:v1@{DIGEST}")
+    assert (reference.registry, reference.namespace, reference.repository) == ("localhost:5000", "org/team", "model")
+    assert reference.digest == DIGEST
+    reference.tag = "v2"
+    assert reference.modelkit_tag == f"localhost:5000/org/team/model:v2@{DIGEST}"
+    assert reference.freeze() == parse_reference(reference.modelkit_tag)
+    assert ModelKitReference(reference.freeze()).modelkit_tag == reference.modelkit_tag
+    with pytest.raises(ValueError, match="Error parsing modelkit tag"):
+        ModelKitReference("jozu.ml/model:v1")
+
+
+def test_parse_modelkit_tag():
+    assert parse_modelkit_tag("jozu.ml/jozu/model:v1") == {
+        "registry": "jozu.ml",
+        "namespace": "jozu",
+        "model": "model",
+        "tag": "v1",
+        "digest": None,
+    }
@@ -0,0 +1,106 @@
+from pathlib import Path
+
+import pytest
+
+from kitops.modelkit.kitfile import Kitfile
+from kitops.modelkit.scanner import classify, kitfile_data, scan_directory
+
+
+def make_tree(root: Path, files: dict) -> Path:
+    for name, size in files.items():
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x" * size)
+    return root
+
+
+@pytest.fixture
+def project(tmp_path):
+    return make_tree(
+        tmp_path / "project",
+        {
+            "README.md": 1,
+            "LICENSE": 1,
+            "Kitfile": 1,
+            ".git/HEAD": 1,
+            "train.py": 1,
+            "model/config.json": 1,
+            "model/model-00001.safetensors": 100,
+            "model/model-00002.safetensors": 100,
+            "adapters/lora.safetensors": 50,
+            "data/train/0.parquet": 10,
+            "data/train/1.parquet": 10,
+            "data/validation.csv": 5,
+            "src/pkg/module.py": 1,
+            "src/pkg/data.csv": 1,
+            "prompts/system.prompt": 1,
+        },
+    )
+
+
+@pytest.mark.parametrize(
+    "name, section",
+    [
+        ("model.safetensors", "model"),
+        ("weights.GGUF", "model"),
+        ("train.parquet", "datasets"),
+        ("README", "docs"),
+        ("readme.rst", "docs"),
+        ("config.json", "config"),
+        ("serve.py", "code"),
+        ("Makefile", "code"),
+        ("system.prompt", "prompts"),
+    ],
+)
+def test_classify(name, section):
+    assert classify(name) == section
+
+
+def test_homogeneous_directories_are_collapsed(project):
+    entries = scan_directory(project)
+    paths = {section: [entry["path"] for entry in section_entries] for section, section_entries in entries.items()}
+    assert paths == {
+        "model": ["adapters/lora.safetensors", "model"],
+        "datasets": ["data", "src/pkg/data.csv"],
+        "code": ["src/pkg/module.py", "train.py"],
+        "docs": ["LICENSE", "README.md"],
+        "prompts": ["prompts/system.prompt"],
+    }
+    assert entries["model"][1] == {"path": "model", "size": 201}
+
+
+def test_collapse_threshold_and_custom_rules(project):
+    entries = scan_directory(project, collapse_threshold=1, extension_rules={"prompt": "docs"}, max_workers=1)
+    assert [entry["path"] for entry in entries["model"]] == ["adapters", "model"]
+    assert [entry["path"] for entry in entries["docs"]] == ["LICENSE", "README.md", "prompts"]
+
+    entries = scan_directory(project, collapse_threshold=4)
+    assert [entry["path"] for entry in entries["datasets"]] == [
+        "data/train/0.parquet",
+        "data/train/1.parquet",
+        "data/validation.csv",
+        "src/pkg/data.csv",
+    ]
+
+
+def test_kitfile_data_picks_the_largest_model():
+    entries = {"model": [{"path": "adapter.bin", "size": 5}, {"path": "model", "size": 50}], "datasets": []}
+    data = kitfile_data(entries, "demo", author="Jozu")
+    assert data["model"] == {"name": "demo", "path": "model", "parts": [{"name": "adapter.bin", "path": "adapter.bin"}]}
+    assert data["package"] == {"name": "demo", "authors": ["Jozu"]}
+    assert "datasets" not in data
+
+
+def test_from_directory(project):
+    kitfile = Kitfile.from_directory(project, description="A demo")
+    assert kitfile.package.name == "project"
+    assert kitfile.package.description == "A demo"
+    assert kitfile.model.path == "model"
+    assert [part.path for part in kitfile.model.parts] == ["adapters/lora.safetensors"]
+    assert [entry.path for entry in kitfile.prompts] == ["prompts/system.prompt"]
+    assert not (project / "Kitfile").read_bytes().startswith(b"manifestVersion")
+
+
+def test_from_directory_requires_a_directory(project):
+    with pytest.raises(NotADirectoryError):
+        Kitfile.from_directory(project / "train.py")
@@ -0,0 +1,93 @@
+import io
+
+import pytest
+import yaml
+
+from kitops.modelkit import serialization
+from kitops.modelkit.kitfile import Kitfile
+from kitops.modelkit.serialization import dump_yaml, get_yaml_backend, load_yaml, set_yaml_backend
+
+requires_libyaml = pytest.mark.skipif(
+    "libyaml" not in serialization.AVAILABLE_BACKENDS, reason="PyYAML was built without libyaml"
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_backend(monkeypatch):
+    monkeypatch.delenv("KITOPS_YAML_BACKEND", raising=False)
+    yield
+    set_yaml_backend(None)
+
+
+@requires_libyaml
+def test_libyaml_is_the_default():
+    assert get_yaml_backend() == "libyaml"
+
+
+@requires_libyaml
+def test_backends_produce_identical_output(fixtures):
+    for name, path in fixtures.items():
+        text = path.read_text(encoding="utf-8")
+        data = load_yaml(text, backend="python")
+        assert load_yaml(text, backend="libyaml") == data, name
+        assert dump_yaml(data, backend="libyaml") == dump_yaml(data, backend="python"), name
+
+
+def test_python_backend_matches_safe_dump(fixtures):
+    data = Kitfile(fixtures["Kitfile_full"]).model_dump(exclude_unset=True, exclude_none=True)
+    expected = yaml.safe_dump(data, sort_keys=False, default_flow_style=False)
+    assert dump_yaml(data, backend="python") == expected
+
+
+def test_select_backend(monkeypatch):
+    set_yaml_backend("python")
+    assert get_yaml_backend() == "python"
+
+    set_yaml_backend(None)
+    monkeypatch.setenv("KITOPS_YAML_BACKEND", "python")
+    assert get_yaml_backend() == "python"
+
+
+def test_invalid_backend():
+    with pytest.raises(ValueError):
+        set_yaml_backend("ruamel")
+
+
+def test_parse_errors_are_reported_with_either_backend(tmp_path):
+    path = tmp_path / "Kitfile"
+    path.write_text("manifestVersion: [1.0\n")
+    for backend in serialization.AVAILABLE_BACKENDS:
+        set_yaml_backend(backend)
+        with pytest.raises(yaml.YAMLError, match="line"):
+            Kitfile(path)
+
+
+@pytest.mark.parametrize("backend", serialization.AVAILABLE_BACKENDS)
+def test_iter_sequence_items_matches_load(fixtures, backend):
+    text = fixtures["Kitfile_full"].read_text(encoding="utf-8")
+    data = load_yaml(text)
+    for keys in [("datasets",), ("code",), ("model", "parts")]:
+        expected = data
+        for key in keys:
+            expected = expected[key]
+        with open(fixtures["Kitfile_full"], encoding="utf-8") as stream:
+            assert list(serialization.iter_sequence_items(stream, keys, backend=backend)) == expected, keys
+
+
+def test_iter_sequence_items_resolves_tags_and_aliases():
+    document = io.StringIO(
+        "package: {name: demo, tags: [a, b]}\n"
+        "items:\n"
+        "- {path: a, size: 3, enabled: true, note: null}\n"
+        "- {path: b, shards: &shards [1, 2], copy: *shards, quoted: '3'}\n"
+    )
+    assert list(serialization.iter_sequence_items(document, ["items"])) == [
+        {"path": "a", "size": 3, "enabled": True, "note": None},
+        {"path": "b", "shards": [1, 2], "copy": [1, 2], "quoted": "3"},
+    ]
+
+
+def test_iter_sequence_items_missing_sequence():
+    assert list(serialization.iter_sequence_items(io.StringIO("package: {name: demo}\n"), ["datasets"])) == []
+    assert list(serialization.iter_sequence_items(io.StringIO("- 1\n"), ["datasets"])) == []
+    assert list(serialization.iter_sequence_items(io.StringIO(""), ["datasets"])) == []
@@ -0,0 +1,109 @@
+import os
+import time
+
+import pytest
+
+from kitops.oci import BlobStore, RegistryClient, pull_modelkit
+from tests.test_oci import make_layer
+
+
+def add_layer(store: BlobStore, digest: str, files: dict) -> None:
+    def populate(directory):
+        for name, content in files.items():
+            path = directory / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(content)
+
+    store.add(digest, populate)
+
+
+DIGEST_A = "sha256:" + "a" * 64
+DIGEST_B = "sha256:" + "b" * 64
+DIGEST_C = "sha256:" + "c" * 64
+
+
+class TestBlobStore:
+    def test_hardlinks_into_working_directories(self, tmp_path):
+        store = BlobStore(tmp_path / "store")
+        add_layer(store, DIGEST_A, {"model/weights.bin": b"w" * 100})
+
+        store.materialize(DIGEST_A, tmp_path / "one")
+        store.materialize(DIGEST_A, tmp_path / "two")
+
+        one = tmp_path / "one" / "model" / "weights.bin"
+        two = tmp_path / "two" / "model" / "weights.bin"
+        assert one.read_bytes() == b"w" * 100
+        assert os.path.samefile(one, two)
+        assert not os.access(one, os.W_OK) or os.geteuid() == 0
+
+    def test_copy_mode_gives_writable_files(self, tmp_path):
+        store = BlobStore(tmp_path / "store", link_mode="copy")
+        add_layer(store, DIGEST_A, {"data.csv": b"a,b\n"})
+
+        store.materialize(DIGEST_A, tmp_path / "out")
+        copied = tmp_path / "out" / "data.csv"
+        copied.write_bytes(b"changed")
+
+        store.materialize(DIGEST_A, tmp_path / "again")
+        assert (tmp_path / "again" / "data.csv").read_bytes() == b"a,b\n"
+
+    def test_reflink_mode_falls_back_to_copy(self, tmp_path):
+        store = BlobStore(tmp_path / "store", link_mode="reflink")
+        add_layer(store, DIGEST_A, {"data.csv": b"a,b\n"})
+
+        store.materialize(DIGEST_A, tmp_path / "out")
+        assert (tmp_path / "out" / "data.csv").read_bytes() == b"a,b\n"
+
+    def test_add_is_idempotent(self, tmp_path):
+        store = BlobStore(tmp_path / "store")
+        add_layer(store, DIGEST_A, {"f": b"1"})
+        store.add(DIGEST_A, lambda directory: pytest.fail("layer unpacked twice"))
+        assert store.has(DIGEST_A)
+        assert store.size == 1
+
+    def test_garbage_collection_evicts_least_recently_used(self, tmp_path):
+        store = BlobStore(tmp_path / "store", max_size=250)
+        for index, digest in enumerate((DIGEST_A, DIGEST_B, DIGEST_C)):
+            add_layer(store, digest, {"f": b"x" * 100})
+            record = tmp_path / "store" / "layers" / "sha256" / f"{digest[7:]}.json"
+            os.utime(record, (time.time() - 100 + index, time.time() - 100 + index))
+        store.materialize(DIGEST_A, tmp_path / "out")
+
+        assert store.collect_garbage() == 100
+        assert [store.has(d) for d in (DIGEST_A, DIGEST_B, DIGEST_C)] == [True, False, True]
+        assert (tmp_path / "out" / "f").read_bytes() == b"x" * 100
+
+    def test_invalid_link_mode(self, tmp_path):
+        with pytest.raises(ValueError):
+            BlobStore(tmp_path, link_mode="symlink")
+
+
+def test_pull_through_store_downloads_each_layer_once(fake_registry, tmp_path):
+    layer = make_layer({"model/weights.bin": b"\x01" * 5000})
+    config = b'{"manifestVersion": "1.0", "model": {"path": "model"}}'
+    fake_registry.add_manifest(
+        "jozu/model",
+        "latest",
+        {
+            "schemaVersion": 2,
+            "config": {"digest": fake_registry.add_blob(config), "size": len(config)},
+            "layers": [
+                {
+                    "mediaType": "application/vnd.kitops.modelkit.model.v1.tar+gzip",
+                    "digest": fake_registry.add_blob(layer),
+                    "size": len(layer),
+                }
+            ],
+        },
+    )
+    store = BlobStore(tmp_path / "store")
+
+    with RegistryClient(fake_registry.address, plain_http=True) as client:
+        for name in ("svc-a", "svc-b", "svc-c"):
+            pull_modelkit(client, "jozu/model", "latest", tmp_path / name, store=store)
+
+    assert fake_registry.count("GET", "/blobs/") == 3 + 1
+    weights = [tmp_path / name / "model" / "weights.bin" for name in ("svc-a", "svc-b", "svc-c")]
+    assert weights[0].read_bytes() == b"\x01" * 5000
+    assert os.path.samefile(weights[0], weights[2])
+    assert (tmp_path / "svc-b" / "Kitfile").exists()